@@ -0,0 +1,361 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from predictions.plotting import MAX_POINTS, plot_series, thin_markers
+import matplotlib.pyplot as plt
+import pandas as pd
+import numpy as np
+import tabulate
+
+BUY_ACTION = 1
+SELL_ACTION = 2
+
+TRADE_COLUMNS = ['t', 'action', 'units', 'price', 'value', 'cash', 'quantity', 'inventory_value', 'pnl']
+
+
+def window_states(prices: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Computes the state of every time step at once.
+
+    Row t holds the `window_size` price differences ending at t, the series
+    being left-padded with its first price, which is what
+    DataHandler.get_state(prices, t, window_size + 1) returns for a single t.
+
+    Args:
+        prices (np.ndarray): The price series, or a (series, time) matrix of aligned series.
+        window_size (int): The number of price differences per state.
+
+    Returns:
+        np.ndarray: A (..., time, window_size) read-only view.
+    """
+    prices = np.asarray(prices)
+    padded = np.concatenate([np.repeat(prices[..., :1], window_size, axis=-1), prices], axis=-1)
+    return np.lib.stride_tricks.sliding_window_view(np.diff(padded, axis=-1), window_size, axis=-1)
+
+
+def stack_series(series: Sequence[Sequence[float]], length: Optional[int] = None) -> np.ndarray:
+    """
+    Aligns several price series (coins, or date ranges of the same coin) into
+    a (series, time) matrix, keeping the last `length` prices of each.
+
+    Args:
+        series (Sequence[Sequence[float]]): The price series.
+        length (int): The number of prices kept, defaults to the length of the shortest series.
+
+    Returns:
+        np.ndarray: The price matrix.
+    """
+    length = length or min(len(prices) for prices in series)
+    if any(len(prices) < length for prices in series):
+        raise ValueError('Every series must hold at least %d prices' % length)
+    return np.array([np.asarray(prices, dtype=float)[len(prices) - length :] for prices in series])
+
+
+def decision_steps(length: int, skip: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the time steps at which the agent acts, and the time step of the
+    state it acts on.
+
+    The agent acts on the state built at the end of its previous step, so
+    the state lags behind the time step when skip > 1.
+
+    Args:
+        length (int): The length of the price series.
+        skip (int): The number of time steps between two decisions.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The decision time steps and their state time steps.
+    """
+    steps = np.arange(0, length - 1, skip)
+    state_steps = np.concatenate([[0], steps[:-1] + 1]) if len(steps) else steps
+    return steps, state_steps
+
+
+def simulate(prices: Sequence[float],
+             steps: np.ndarray,
+             actions: np.ndarray,
+             buys: np.ndarray,
+             initial_money: float,
+             max_buy: float,
+             max_sell: float,
+             record: bool = False
+             ) -> Tuple[float, Optional[list]]:
+    """
+    Replays the decisions of the agent on the price series.
+
+    Only the steps with a buy or sell decision are visited. Buying is
+    allowed while there is money left, selling once something was bought.
+
+    Args:
+        prices (Sequence[float]): The price series.
+        steps (np.ndarray): The decision time steps.
+        actions (np.ndarray): The action taken at each decision step.
+        buys (np.ndarray): The requested buy size at each decision step.
+        initial_money (float): The starting cash.
+        max_buy (float): The maximum number of units bought at once.
+        max_sell (float): The maximum number of units sold at once.
+        record (bool): Whether to return the executed trades.
+
+    Returns:
+        Tuple[float, Optional[list]]: The final cash, and the executed trades as tuples of TRADE_COLUMNS.
+    """
+    if isinstance(prices, np.ndarray):
+        prices = prices.tolist()
+
+    mask = (actions == BUY_ACTION) | (actions == SELL_ACTION)
+    money = initial_money
+    quantity = 0.0
+    cost = 0.0
+    bought = False
+    trades = [] if record else None
+
+    for t, action, buy in zip(steps[mask].tolist(), actions[mask].tolist(), buys[mask].tolist()):
+        price = prices[t]
+
+        if action == BUY_ACTION and money > 0:
+            if buy < 0:
+                # buy unit is 10% of what you can afford
+                units = (money * 0.1) / price
+            elif (buy * price) > money or buy > max_buy:
+                # restrict buy units to what we can afford without exceeding the maximum buy limit
+                units = min((money * 0.9) / price, max_buy)
+            else:
+                units = buy
+
+            total = units * price
+            money -= total
+            quantity += units
+            cost += total
+            bought = True
+
+            if record:
+                trades.append((t, 'buy', units, price, total, money, quantity, quantity * price, 0.0))
+
+        elif action == SELL_ACTION and bought:
+            units = max_sell if quantity > max_sell else quantity
+            if units <= 0:
+                continue
+
+            average_cost = cost / quantity
+            total = units * price
+            money += total
+            quantity -= units
+            cost -= units * average_cost
+
+            if record:
+                trades.append((t, 'sell', units, price, total, money, quantity, quantity * price, units * (price - average_cost)))
+
+    return money, trades
+
+
+def batch_forward(weight_sets: Sequence[List[np.ndarray]], states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs the DES network of every weight set on every state in one pass.
+
+    Args:
+        weight_sets (Sequence[List[np.ndarray]]): The weights of each individual, as returned by DES.get_weights.
+        states (np.ndarray): A (series, steps, window_size) array of states.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (individuals, series, steps) actions and buy sizes.
+    """
+    stacked = [np.stack([weights[index] for weights in weight_sets]) for index in range(4)]
+    feed = np.matmul(states[None], stacked[0][:, None]) + stacked[3][:, None]
+    actions = np.argmax(np.matmul(feed, stacked[1][:, None]), axis=-1)
+    buys = np.matmul(feed, stacked[2][:, None])[..., 0]
+    return actions, buys
+
+
+def simulate_batch(prices: np.ndarray,
+                   steps: np.ndarray,
+                   actions: np.ndarray,
+                   buys: np.ndarray,
+                   initial_money: float,
+                   max_buy: float,
+                   max_sell: float
+                   ) -> np.ndarray:
+    """
+    Replays the decisions of many (individual, series) pairs at once.
+    The arithmetic matches simulate, so every final cash is identical to
+    the one of the corresponding single-series run.
+
+    Args:
+        prices (np.ndarray): The (series, time) price matrix.
+        steps (np.ndarray): The decision time steps, shared by every series.
+        actions (np.ndarray): The (..., series, steps) actions.
+        buys (np.ndarray): The (..., series, steps) buy sizes.
+        initial_money (float): The starting cash.
+        max_buy (float): The maximum number of units bought at once.
+        max_sell (float): The maximum number of units sold at once.
+
+    Returns:
+        np.ndarray: The (..., series) final cash.
+    """
+    shape = actions.shape[:-1]
+    money = np.full(shape, float(initial_money))
+    quantity = np.zeros(shape)
+    bought = np.zeros(shape, dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for j, t in enumerate(steps.tolist()):
+            price = prices[:, t]
+            action = actions[..., j]
+            buy = buys[..., j]
+
+            buying = (action == BUY_ACTION) & (money > 0)
+            units = np.where(
+                buy < 0,
+                (money * 0.1) / price,
+                np.where(((buy * price) > money) | (buy > max_buy), np.minimum((money * 0.9) / price, max_buy), buy),
+            )
+            units = np.where(buying, units, 0.0)
+            money -= units * price
+            quantity += units
+            bought |= buying
+
+            selling = (action == SELL_ACTION) & bought
+            units = np.where(selling, np.where(quantity > max_sell, max_sell, quantity), 0.0)
+            quantity -= units
+            money += units * price
+
+    return money
+
+
+def batch_rewards(weight_sets: Sequence[List[np.ndarray]],
+                  prices: np.ndarray,
+                  window_size: int,
+                  initial_money: float,
+                  max_buy: float,
+                  max_sell: float,
+                  skip: int = 1
+                  ) -> np.ndarray:
+    """
+    Computes the percentage return of every weight set on every price series
+    in a single vectorized pass.
+
+    Args:
+        weight_sets (Sequence[List[np.ndarray]]): The weights of each individual.
+        prices (np.ndarray): The (series, time) price matrix, see stack_series.
+        window_size (int): The window size of the agent.
+        initial_money (float): The starting cash.
+        max_buy (float): The maximum number of units bought at once.
+        max_sell (float): The maximum number of units sold at once.
+        skip (int): The number of time steps between two decisions.
+
+    Returns:
+        np.ndarray: The (individuals, series) reward matrix.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    steps, state_steps = decision_steps(prices.shape[1], skip)
+    states = window_states(prices, window_size)[:, state_steps].astype(weight_sets[0][0].dtype, copy=False)
+
+    actions, buys = batch_forward(weight_sets, states)
+    money = simulate_batch(prices, steps, actions, buys, initial_money, max_buy, max_sell)
+    return ((money - initial_money) / initial_money) * 100
+
+
+class BacktestResult:
+    """
+    The outcome of a backtest: a columnar trade log, the equity curve and
+    summary statistics. Plotting is left to the plot method.
+    """
+    def __init__(self, prices: Sequence[float], trades: pd.DataFrame, equity: pd.Series, initial_money: float) -> None:
+        self.prices = prices
+        self.trades = trades
+        self.equity = equity
+        self.initial_money = initial_money
+        self.summary = self._summarize()
+
+    @staticmethod
+    def from_trades(prices: Sequence[float], trades: list, initial_money: float, index: Optional[Sequence] = None) -> 'BacktestResult':
+        """
+        Builds the result of the trades returned by simulate(record=True).
+
+        Args:
+            prices (Sequence[float]): The price series.
+            trades (list): The executed trades.
+            initial_money (float): The starting cash.
+            index (Sequence): The timestamps of the price series, defaults to the time steps.
+        """
+        prices = np.asarray(prices, dtype=float)
+        index = pd.Index(np.arange(len(prices)) if index is None else index)
+        # an empty trade list gives object columns, which cannot index the time steps
+        trades = pd.DataFrame(trades, columns=TRADE_COLUMNS).astype(
+            {column: np.float64 for column in TRADE_COLUMNS if column not in ('t', 'action')}
+        ).astype({'t': np.int64})
+
+        # cash and quantity only change on trades, so forward-fill them over every time step
+        cash = np.full(len(prices), np.nan)
+        quantity = np.full(len(prices), np.nan)
+        last = trades.drop_duplicates('t', keep='last')
+        cash[last['t'].values] = last['cash'].values
+        quantity[last['t'].values] = last['quantity'].values
+        cash = pd.Series(cash).ffill().fillna(initial_money).values
+        quantity = pd.Series(quantity).ffill().fillna(0.0).values
+        equity = pd.Series(cash + quantity * prices, index=index, name='equity')
+
+        trades.index = index[trades['t'].values]
+        trades.index.name = index.name or 'timestamp'
+        return BacktestResult(prices, trades, equity, initial_money)
+
+    def _summarize(self) -> Dict[str, Any]:
+        sells = self.trades[self.trades['action'] == 'sell']
+        final_cash = self.trades['cash'].iloc[-1] if len(self.trades) else self.initial_money
+        drawdown = 1 - self.equity / self.equity.cummax()
+        return {
+            'initial_money': self.initial_money,
+            'final_cash': final_cash,
+            'final_equity': self.equity.iloc[-1] if len(self.equity) else self.initial_money,
+            'total_gain': final_cash - self.initial_money,
+            'return': ((final_cash - self.initial_money) / self.initial_money) * 100,
+            'nb_buys': int((self.trades['action'] == 'buy').sum()),
+            'nb_sells': len(sells),
+            'realized_pnl': sells['pnl'].sum(),
+            'win_rate': (sells['pnl'] > 0).mean() if len(sells) else float('nan'),
+            'max_drawdown': drawdown.max() * 100 if len(drawdown) else 0.0,
+        }
+
+    def print(self) -> None:
+        """
+        Prints the summary statistics.
+        """
+        print(tabulate.tabulate(list(self.summary.items()), headers=['Metric', 'Value'], tablefmt='github'))
+
+    def print_trades(self) -> None:
+        """
+        Prints one line per trade, the way DESAgent.buy used to.
+        """
+        for t, trade in zip(self.trades['t'], self.trades.itertuples()):
+            if trade.action == 'buy':
+                print('day %d: buy %f units at price %f, total balance %f' % (t, trade.units, trade.value, trade.cash))
+            else:
+                invest = (trade.pnl / (trade.value - trade.pnl)) * 100 if trade.value != trade.pnl else 0
+                print(
+                    'day %d, sell %f units at price %f, investment %f %%, total balance %f,'
+                    % (t, trade.units, trade.value, invest, trade.cash)
+                )
+
+    def plot(self, show: bool = True, max_points: int = MAX_POINTS, method: str = 'minmax'):
+        """
+        Plots the price series with the buy and sell markers. The series is
+        downsampled to max_points points and drawn against its original time
+        steps, and the markers are thinned to one per bin, so long backtests
+        render quickly with the markers on the price line.
+
+        Args:
+            show (bool): Whether to call plt.show.
+            max_points (int): The number of points of the price line and the number of marker bins.
+            method (str): The downsampling method, either 'minmax', which keeps every extremum, or 'lttb'.
+
+        Returns:
+            matplotlib.figure.Figure: The figure.
+        """
+        figure, ax = plt.subplots(figsize=(20, 10))
+        prices = np.asarray(self.prices, dtype=float)
+        plot_series(ax, prices, max_points, method, label='true price', c='g')
+        buys = thin_markers(self.trades[self.trades['action'] == 'buy']['t'].values, len(prices), max_points)
+        sells = thin_markers(self.trades[self.trades['action'] == 'sell']['t'].values, len(prices), max_points)
+        ax.plot(buys, prices[buys], 'X', label='predict buy', c='b')
+        ax.plot(sells, prices[sells], 'o', label='predict sell', c='r')
+        ax.legend()
+        if show:
+            plt.show()
+        return figure
@@ -1,10 +1,15 @@
 from agents.strategies.deep_evolution_strategy import Deep_Evolution_Strategy as DES
+from agents.backtest import BacktestResult, batch_rewards, decision_steps, simulate, stack_series, window_states
+from agents.strategies.callbacks import Callback, load_checkpoint
+from typing import Sequence, Tuple, List, Optional, Union
 import matplotlib.pyplot as plt
-from typing import Tuple, List
 import numpy as np
+import threading
 
 class DataHandler:
-    def __init__(self, data_points: List[float], window_size: int, skip) -> None:
+    MAX_CACHED_STATES = 4
+
+    def __init__(self, data_points: List[float], window_size: int, skip, dtype: np.dtype = np.float64) -> None:
         self.data_points = data_points
         self.train = data_points
         self.test = data_points
@@ -15,6 +20,21 @@ class DataHandler:
         self.length_test = len(self.test) - 1
         
         self.skip = skip
+        self.dtype = np.dtype(dtype)
+        self.train_series = None
+        self._states = {}
+        self._states_lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # process workers rebuild their own cache, and locks cannot be pickled
+        state = self.__dict__.copy()
+        state['_states'] = {}
+        del state['_states_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._states_lock = threading.Lock()
         
     def train_test_split(self, test_size: float = 0.2) -> None:
         """
@@ -44,6 +64,39 @@ class DataHandler:
         for i in range(n - 1):
             res.append(block[i + 1] - block[i])
         return np.array([res])
+
+    def get_states(self, data: Sequence[float]) -> np.ndarray:
+        """
+        Get the state of every time step of the given data at once, row t
+        being equal to get_state(data, t, window_size + 1)[0].
+        The price differences are computed in double precision, then cast to dtype.
+
+        Parameters:
+        - data: The input data.
+
+        Returns:
+        - states: A (len(data), window_size) numpy array.
+        """
+        return window_states(np.asarray(data, dtype=float), self.window_size).astype(self.dtype, copy=False)
+
+    def _get_decision_states(self, data: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the decision steps of the given data and the states the agent acts on.
+        The result for the last few data sets is cached, the cache being shared
+        by the threads evaluating a population.
+        """
+        key = id(data)
+        with self._states_lock:
+            if key not in self._states or self._states[key][0] is not data:
+                if len(self._states) >= self.MAX_CACHED_STATES:
+                    del self._states[next(iter(self._states))]
+                steps, state_steps = decision_steps(len(data), self.skip)
+                self._states[key] = (data, steps, np.ascontiguousarray(self.get_states(data)[state_steps]))
+            return self._states[key][1:]
+
+    def _clear_states(self) -> None:
+        with self._states_lock:
+            self._states.clear()
     
     def set_train_data(self, data: List[float]) -> None:
         """
@@ -51,25 +104,37 @@ class DataHandler:
         """
         self.train = data
         self.length_train = len(self.train) - 1
+        self._clear_states()
         
+    def set_train_series(self, series: Optional[Sequence[Sequence[float]]]) -> None:
+        """
+        Sets several aligned training series (coins, or date ranges of the same
+        coin), on which the agent is then trained at once. None goes back to
+        training on the training data.
+        """
+        self.train_series = None if series is None else stack_series(series)
+
     def set_test_data(self, data: List[float]) -> None:
         """
         Sets the testing data.
         """
         self.test = data
         self.length_test = len(self.test) - 1
+        self._clear_states()
 
     def set_window_size(self, window_size: int) -> None:
         """
         Sets the window size.
         """
         self.window_size = window_size
+        self._clear_states()
         
     def set_skip(self, skip: int) -> None:
         """
         Sets the skip value.
         """
         self.skip = skip
+        self._clear_states()
 
 class DESAgent(DataHandler):
 
@@ -89,9 +154,15 @@ class DESAgent(DataHandler):
                  max_sell: int,
                  data_points: List[float],
                  window_size: int,
-                 skip: int = 1
+                 skip: int = 1,
+                 population_size: int = POPULATION_SIZE,
+                 sigma: float = SIGMA,
+                 learning_rate: float = LEARNING_RATE,
+                 seed: Union[int, np.random.SeedSequence, None] = None,
+                 workers: int = 1,
+                 executor: str = 'process'
                  ) -> None:
-        super().__init__(data_points, window_size, skip)
+        super().__init__(data_points, window_size, skip, model.get_weights()[0].dtype)
         self.model = model
         
         self.initial_money = money
@@ -101,137 +172,147 @@ class DESAgent(DataHandler):
         self.es = DES(
             self.model.get_weights(),
             self.get_reward,
-            self.POPULATION_SIZE,
-            self.SIGMA,
-            self.LEARNING_RATE,
+            population_size,
+            sigma,
+            learning_rate,
+            seed=seed,
+            workers=workers,
+            executor=executor,
         )
                 
-    def fit(self, iterations: int, checkpoint: int) -> None:
+    def fit(self,
+            iterations: int,
+            checkpoint: int,
+            callbacks: Optional[List[Callback]] = None,
+            validation_data: Optional[List[float]] = None,
+            validation_every: int = 1,
+            resume_from: Optional[str] = None
+            ) -> None:
             """
             Trains the agent using the Evolution Strategy algorithm.
 
             Args:
                 iterations (int): The number of iterations to train the agent.
-                checkpoint (int): The interval at which to print training progress.
+                checkpoint (int): The interval at which to print training progress, 0 disables printing.
+                callbacks (List[Callback]): The observers notified with the telemetry of every iteration,
+                    e.g. ModelCheckpoint or EarlyStopping.
+                validation_data (List[float]): The prices on which the `val_reward` is computed.
+                validation_every (int): The interval at which the validation reward is computed.
+                resume_from (str): The path of a ModelCheckpoint file to resume training from,
+                    in which case training stops at the same iteration as the interrupted run.
 
             Returns:
                 None
             """
-            self.es.train(iterations, print_every=checkpoint)
+            initial_epoch = 0
+            if resume_from is not None:
+                self.es.set_state(load_checkpoint(resume_from))
+                initial_epoch = self.es.epoch
+
+            validation_function = None
+            if validation_data is not None:
+                validation_function = lambda weights: self._simulate(validation_data, weights)
+
+            self.es.train(
+                iterations,
+                print_every=checkpoint,
+                callbacks=callbacks,
+                validation_function=validation_function,
+                validation_every=validation_every,
+                initial_epoch=initial_epoch,
+            )
+            self.model.set_weights(self.es.get_weights())
 
     def act(self, sequence: List[np.ndarray]) -> Tuple[int, float]:
         decision, buy = self.model.predict(np.array(sequence))
-        return np.argmax(decision[0]), float(buy[0])
+        return np.argmax(decision[0]), float(buy[0, 0])
     
-    def _calculate_buy_units(self, initial_money: float, price: float, buy: float, t: int) -> float:
-        if buy < 0:
-            # buy unit is 10% of what you can afford
-            buy_units = (initial_money * 0.1) / price[t]
-        elif (buy * price[t]) > initial_money or buy > self.max_buy:
-            # if we want to buy more than we can afford
-            # restrict buy_units to the maximum we can buy with the money we have
-            # without going into debt and without exceeding the maximum buy limit
-            buy_units = min((initial_money * 0.9) / price[t], self.max_buy)
-        else:
-            buy_units = buy
-            
-        return buy_units
-    
-    def _calculate_sell_units(self, quantity: float) -> float:
-        return self.max_sell if quantity > self.max_sell else quantity
-
     def get_reward(self, weights: List[np.ndarray]) -> float:
-        initial_money = self.initial_money
-        starting_money = initial_money
-        
-        self.model.weights = weights
-        state = self.get_state(self.train, 0, self.window_size + 1)
-        
-        inventory = []
-        quantity = 0
-        
-        for t in range(0, self.length_train, self.skip):
-            action, buy = self.act(state)
-            next_state = self.get_state(self.train, t + 1, self.window_size + 1)
-            
-            if action == self.BUY_ACTION and initial_money > 0:
-                buy_units = self._calculate_buy_units(initial_money, self.train, buy, t)
-                
-                total_buy = buy_units * self.train[t]
-                initial_money -= total_buy
-                inventory.append(total_buy)
-                quantity += buy_units
-                
-            elif action == self.SELL_ACTION and len(inventory) > 0:
-                sell_units = self._calculate_sell_units(quantity)
-                    
-                quantity -= sell_units
-                total_sell = sell_units * self.train[t]
-                initial_money += total_sell
-
-            state = next_state
-        return ((initial_money - starting_money) / starting_money) * 100
-
-    def buy(self):
-        initial_money = self.initial_money
-        state = self.get_state(self.test, 0, self.window_size + 1)
-        starting_money = initial_money
-        
-        states_sell = []
-        states_buy = []
+        """
+        Returns the percentage return of the given weights on the training data,
+        or their mean return over the training series when they are set.
+        """
+        if self.train_series is not None:
+            return float(np.mean(self.get_rewards([weights])))
+        return self._simulate(self.train, weights)
 
-        inventory = []
-        quantity = 0
-        
-        for t in range(0, self.length_test, self.skip):
-            action, buy = self.act(state)
-            next_state = self.get_state(self.test, t + 1, self.window_size + 1)
-            if action == self.BUY_ACTION and initial_money > 0:
-                buy_units = self._calculate_buy_units(initial_money, self.test, buy, t)
-                    
-                total_buy = buy_units * self.test[t]
-                initial_money -= total_buy
-                inventory.append(total_buy)
-                quantity += buy_units
-                states_buy.append(t)
-                
-                print(
-                    'day %d: buy %f units at price %f, total balance %f'
-                    % (t, buy_units, total_buy, initial_money)
-                )
-                
-            elif action == self.SELL_ACTION and len(inventory) > 0:
-                bought_price = inventory.pop(0)
-                sell_units = self._calculate_sell_units(quantity)
-                
-                if sell_units <= 0:
-                    continue
-                   
-                quantity -= sell_units
-                total_sell = sell_units * self.test[t]
-                initial_money += total_sell
-                states_sell.append(t)
-                
-                try:
-                    invest = ((total_sell - bought_price) / bought_price) * 100
-                except:
-                    invest = 0
-                
-                print(
-                    'day %d, sell %f units at price %f, investment %f %%, total balance %f,'
-                    % (t, sell_units, total_sell, invest, initial_money)
-                )
-                
-            state = next_state
+    def get_rewards(self, weight_sets: Sequence[List[np.ndarray]], series: Optional[Sequence[Sequence[float]]] = None) -> np.ndarray:
+        """
+        Returns the percentage return of every weight set on every series,
+        computed in a single vectorized pass.
+
+        Args:
+            weight_sets (Sequence[List[np.ndarray]]): The weights of each individual.
+            series (Sequence[Sequence[float]]): The aligned price series, the training series by default.
+
+        Returns:
+            np.ndarray: The (individuals, series) reward matrix.
+        """
+        series = self.train_series if series is None else stack_series(series)
+        if series is None:
+            raise ValueError('No series given and no training series set')
+        return batch_rewards(weight_sets, series, self.window_size, self.initial_money, self.max_buy, self.max_sell, self.skip)
 
-        invest = ((initial_money - starting_money) / starting_money) * 100
+    def get_test_reward(self, weights: List[np.ndarray] = None) -> float:
+        """
+        Returns the percentage return of the given weights (the current model
+        weights by default) on the testing data, without printing or plotting.
+        """
+        if weights is None:
+            weights = self.model.get_weights()
+        return self._simulate(self.test, weights)
+
+    def _decide(self, data: Sequence[float], weights: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Runs the model once on the states of every decision step.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The decision steps, actions and buy sizes.
+        """
+        steps, states = self._get_decision_states(data)
+        decision, buy = self.model.forward(weights, states)
+        return steps, np.argmax(decision, axis=1), buy[:, 0]
+
+    def _simulate(self, data: Sequence[float], weights: List[np.ndarray]) -> float:
+        steps, actions, buys = self._decide(data, weights)
+        money, _ = simulate(data, steps, actions, buys, self.initial_money, self.max_buy, self.max_sell)
+        return ((money - self.initial_money) / self.initial_money) * 100
+
+    def backtest(self,
+                 data: Optional[Sequence[float]] = None,
+                 weights: Optional[List[np.ndarray]] = None,
+                 index: Optional[Sequence] = None
+                 ) -> BacktestResult:
+        """
+        Backtests the agent with the same kernel as get_reward, without any
+        printing or plotting.
+
+        Args:
+            data (Sequence[float]): The prices, the testing data by default.
+            weights (List[np.ndarray]): The weights, the current model weights by default.
+            index (Sequence): The timestamps of the prices, used as the index of the trade log.
+
+        Returns:
+            BacktestResult: The trade log, equity curve and summary statistics.
+        """
+        data = self.test if data is None else data
+        weights = self.model.get_weights() if weights is None else weights
+
+        steps, actions, buys = self._decide(data, weights)
+        _, trades = simulate(data, steps, actions, buys, self.initial_money, self.max_buy, self.max_sell, record=True)
+        return BacktestResult.from_trades(data, trades, self.initial_money, index)
+
+    def buy(self, plot: bool = True) -> BacktestResult:
+        """
+        Backtests the agent on the testing data, printing every trade and the
+        total gain, and plotting the trades when `plot` is set.
+        """
+        result = self.backtest()
+        result.print_trades()
         print(
             '\ntotal gained %f, total investment %f %%'
-            % (initial_money - starting_money, invest)
+            % (result.summary['total_gain'], result.summary['return'])
         )
-        plt.figure(figsize = (20, 10))
-        plt.plot(self.test, label = 'true price', c = 'g')
-        plt.plot(self.test, 'X', label = 'predict buy', markevery = states_buy, c = 'b')
-        plt.plot(self.test, 'o', label = 'predict sell', markevery = states_sell, c = 'r')
-        plt.legend()
-        plt.show()
\ No newline at end of file
+        if plot:
+            result.plot()
+        return result
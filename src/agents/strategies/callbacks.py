@@ -0,0 +1,412 @@
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import numpy as np
+import logging
+import json
+import csv
+import os
+
+class Callback:
+    """
+    Base class of the observers of Deep_Evolution_Strategy.train.
+
+    The logs of every epoch hold the epoch number, the time spent generating
+    the noise, evaluating the population and updating the weights, the
+    number of evaluations per second, the mean/std/min/max of the population
+    rewards and the norm of the weights. The raw rewards of the last epoch
+    are available as `self.strategy.rewards`.
+    """
+    def __init__(self) -> None:
+        self.strategy = None
+
+    def set_strategy(self, strategy) -> None:
+        self.strategy = strategy
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        pass
+
+    def on_epoch_complete(self, epoch: int, logs: Dict[str, Any]) -> None:
+        """
+        Called once every callback has processed the end of the epoch,
+        e.g. to checkpoint the states they reached at that epoch.
+        """
+        pass
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def get_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns what the callback needs to carry on after a resume, saved in the
+        checkpoints along with the training state, or None when it has nothing to save.
+        The values are JSON-serializable, or lists of arrays.
+        """
+        return None
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores a state returned by get_state, after on_train_begin.
+        """
+        pass
+
+
+class CallbackList(Callback):
+    """
+    Dispatches every event to a list of callbacks.
+    """
+    def __init__(self, callbacks: Optional[List[Callback]] = None) -> None:
+        super().__init__()
+        self.callbacks = list(callbacks or [])
+
+    def set_strategy(self, strategy) -> None:
+        super().set_strategy(strategy)
+        for callback in self.callbacks:
+            callback.set_strategy(strategy)
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        for callback in self.callbacks:
+            callback.on_train_begin(logs)
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        for callback in self.callbacks:
+            callback.on_epoch_end(epoch, logs)
+        for callback in self.callbacks:
+            callback.on_epoch_complete(epoch, logs)
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        for callback in self.callbacks:
+            callback.on_train_end(logs)
+
+    def _names(self) -> List[str]:
+        """
+        Names every callback after its class and its rank among the callbacks of that class.
+        """
+        counts = {}
+        names = []
+        for callback in self.callbacks:
+            name = type(callback).__name__
+            names.append('%s_%d' % (name, counts.get(name, 0)))
+            counts[name] = counts.get(name, 0) + 1
+        return names
+
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        states = {}
+        for name, callback in zip(self._names(), self.callbacks):
+            state = callback.get_state()
+            if state is not None:
+                states[name] = state
+        return states
+
+    def set_state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        for name, callback in zip(self._names(), self.callbacks):
+            if name in state:
+                callback.set_state(state[name])
+
+
+class History(Callback):
+    """
+    Keeps the logs of every epoch in memory.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.history = []
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        self.history.append(dict(logs))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the logs as a DataFrame indexed by epoch.
+        """
+        return pd.DataFrame(self.history).set_index('epoch')
+
+
+class CSVLogger(Callback):
+    """
+    Streams the logs of every epoch to a CSV file.
+    """
+    def __init__(self, path: str, append: bool = False) -> None:
+        super().__init__()
+        self.path = path
+        self.append = append
+        self._file = None
+        self._writer = None
+        self._write_header = True
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        write_header = not (self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0)
+        self._file = open(self.path, 'a' if self.append else 'w', newline='')
+        self._writer = None
+        self._write_header = write_header
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(logs))
+            if self._write_header:
+                self._writer.writeheader()
+        self._writer.writerow(logs)
+        self._file.flush()
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JSONLLogger(Callback):
+    """
+    Streams the logs of every epoch to a JSON lines file.
+    """
+    def __init__(self, path: str, append: bool = False) -> None:
+        super().__init__()
+        self.path = path
+        self.append = append
+        self._file = None
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        self._file = open(self.path, 'a' if self.append else 'w')
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(logs) + '\n')
+        self._file.flush()
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LoggingCallback(Callback):
+    """
+    Sends a summary of the logs to a logger every `every` epochs.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO, every: int = 1) -> None:
+        super().__init__()
+        self.logger = logger or logging.getLogger('agents.strategies')
+        self.level = level
+        self.every = every
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        if epoch % self.every == 0:
+            self.logger.log(
+                self.level,
+                'epoch %d: reward mean %f, std %f, max %f, %.1f evaluations/s (noise %.3fs, evaluation %.3fs, update %.3fs)',
+                epoch, logs['reward_mean'], logs['reward_std'], logs['reward_max'], logs['evaluations_per_second'],
+                logs['noise_time'], logs['evaluation_time'], logs['update_time'],
+            )
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        self.logger.log(self.level, 'time taken to train: %f seconds', logs['train_time'])
+
+
+class ProgressPrinter(Callback):
+    """
+    Prints the mean population reward every `print_every` epochs, and the
+    total training time at the end.
+    """
+    def __init__(self, print_every: int = 1) -> None:
+        super().__init__()
+        self.print_every = print_every
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        if epoch % self.print_every == 0:
+            print('iter %d. reward: %f' % (epoch, logs['reward_mean']))
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        print('time taken to train:', logs['train_time'], 'seconds')
+
+
+def save_checkpoint(path: str, state: dict, best_reward: float = None, best_weights: Optional[List[np.ndarray]] = None) -> None:
+    """
+    Atomically writes a training state returned by Deep_Evolution_Strategy.get_state
+    to an npz file, along with the best reward and weights seen so far.
+
+    Args:
+        path (str): The path of the checkpoint file.
+        state (dict): The training state.
+        best_reward (float): The best monitored reward so far.
+        best_weights (List[np.ndarray]): The weights that reached the best reward.
+    """
+    meta = {
+        'epoch': state['epoch'],
+        'nb_weights': len(state['weights']),
+        'rng': state['rng_state'],
+        'best_reward': best_reward,
+        'nb_best_weights': len(best_weights) if best_weights is not None else 0,
+        'callbacks': {},
+    }
+
+    arrays = {'weight_%d' % i: w for i, w in enumerate(state['weights'])}
+    arrays.update({'best_weight_%d' % i: w for i, w in enumerate(best_weights or [])})
+
+    # the lists of arrays of the callback states are stored as arrays, the rest in the metadata
+    for name, callback_state in state.get('callbacks', {}).items():
+        meta['callbacks'][name] = {}
+        for key, value in callback_state.items():
+            if isinstance(value, list) and value and all(isinstance(w, np.ndarray) for w in value):
+                meta['callbacks'][name][key] = {'nb_arrays': len(value)}
+                arrays.update({'callback_%s_%s_%d' % (name, key, i): w for i, w in enumerate(value)})
+            else:
+                meta['callbacks'][name][key] = {'value': value}
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta, default=lambda value: value.tolist())), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    Reads a checkpoint written by save_checkpoint.
+
+    Args:
+        path (str): The path of the checkpoint file.
+
+    Returns:
+        dict: The training state, with the additional `best_reward` and `best_weights` keys.
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        callbacks = {
+            name: {
+                key: [data['callback_%s_%s_%d' % (name, key, i)] for i in range(entry['nb_arrays'])] if 'nb_arrays' in entry else entry['value']
+                for key, entry in callback_state.items()
+            }
+            for name, callback_state in meta.get('callbacks', {}).items()
+        }
+        return {
+            'weights': [data['weight_%d' % i] for i in range(meta['nb_weights'])],
+            'epoch': meta['epoch'],
+            'rng_state': meta['rng'],
+            'callbacks': callbacks,
+            'best_reward': meta['best_reward'],
+            'best_weights': [data['best_weight_%d' % i] for i in range(meta['nb_best_weights'])] or None,
+        }
+
+
+class ModelCheckpoint(Callback):
+    """
+    Periodically saves the training state (weights, epoch, RNG state and
+    the states of the callbacks) and the best-so-far reward, so that an
+    interrupted run can be resumed bit-exactly with
+    DESAgent.fit(..., resume_from=path).
+
+    The training state is taken once every callback has processed the
+    epoch, and the final save holds the weights of the last epoch even
+    when EarlyStopping restores the best ones: these are saved apart, as
+    the best weights.
+    """
+    def __init__(self, path: str, every: int = 10, monitor: str = 'val_reward') -> None:
+        """
+        Args:
+            path (str): The path of the checkpoint file, overwritten at every save.
+            every (int): The number of epochs between two saves.
+            monitor (str): The log entry tracked as the best-so-far reward. It must be evaluated on
+                the weights of the strategy, like 'val_reward', for the best weights to have earned it.
+        """
+        super().__init__()
+        self.path = path
+        self.every = every
+        self.monitor = monitor
+        self.best_reward = None
+        self.best_weights = None
+        self._state = None
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        self._state = None
+        if self.best_reward is None and os.path.exists(self.path):
+            checkpoint = load_checkpoint(self.path)
+            if checkpoint['epoch'] <= self.strategy.epoch:
+                self.best_reward = checkpoint['best_reward']
+                self.best_weights = checkpoint['best_weights']
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        reward = logs.get(self.monitor)
+        if reward is not None and not np.isnan(reward) and (self.best_reward is None or reward > self.best_reward):
+            self.best_reward = reward
+            self.best_weights = [w.copy() for w in self.strategy.weights]
+
+    def on_epoch_complete(self, epoch: int, logs: Dict[str, Any]) -> None:
+        self._state = self.strategy.get_state()
+        if epoch % self.every == 0:
+            self.save()
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        self.save()
+
+    def save(self) -> None:
+        """
+        Saves the training state of the last completed epoch.
+        """
+        state = self._state if self._state is not None else self.strategy.get_state()
+        save_checkpoint(self.path, state, self.best_reward, self.best_weights)
+
+
+class EarlyStopping(Callback):
+    """
+    Stops training once the monitored reward (the validation reward by
+    default) has not improved by more than `min_delta` for `patience`
+    evaluations. Its counters and best weights are saved in the
+    checkpoints, so a resumed run keeps its patience.
+    """
+    def __init__(self, monitor: str = 'val_reward', patience: int = 10, min_delta: float = 0.0, restore_best_weights: bool = False) -> None:
+        """
+        Args:
+            monitor (str): The log entry to monitor.
+            patience (int): The number of evaluations without improvement before stopping.
+            min_delta (float): The minimum increase counted as an improvement.
+            restore_best_weights (bool): Whether to restore the best weights when training ends.
+        """
+        super().__init__()
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.restore_best_weights = restore_best_weights
+
+    def on_train_begin(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        self.wait = 0
+        self.best_reward = None
+        self.best_weights = None
+        self.stopped_epoch = None
+
+    def on_epoch_end(self, epoch: int, logs: Dict[str, Any]) -> None:
+        reward = logs.get(self.monitor)
+        if reward is None or np.isnan(reward):
+            return
+
+        if self.best_reward is None or reward > self.best_reward + self.min_delta:
+            self.best_reward = reward
+            self.best_weights = [w.copy() for w in self.strategy.weights]
+            self.wait = 0
+            return
+
+        self.wait += 1
+        if self.wait >= self.patience:
+            self.stopped_epoch = epoch
+            self.strategy.stop_training = True
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            'wait': self.wait,
+            'best_reward': self.best_reward,
+            'best_weights': [w.copy() for w in self.best_weights] if self.best_weights is not None else None,
+            'stopped_epoch': self.stopped_epoch,
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.wait = state['wait']
+        self.best_reward = state['best_reward']
+        self.best_weights = [np.array(w) for w in state['best_weights']] if state['best_weights'] is not None else None
+        self.stopped_epoch = state['stopped_epoch']
+
+    def on_train_end(self, logs: Optional[Dict[str, Any]] = None) -> None:
+        if self.restore_best_weights and self.best_weights is not None:
+            for index, w in enumerate(self.best_weights):
+                self.strategy.weights[index] = w.copy()
@@ -1,6 +1,42 @@
-import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from agents.strategies.callbacks import Callback, CallbackList, ProgressPrinter
+from typing import List, Callable, Optional, Tuple, Union
 import numpy as np
-from typing import List, Callable
+import time
+
+_worker_reward_function = None
+
+
+def generate_noise(seed_sequence: np.random.SeedSequence, epoch: int, index: int, weights: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Draws the noise of one individual from its own stream, the child of the
+    seed sequence with the spawn key (epoch, index). The noise only depends on
+    the seed, the epoch and the index, whichever worker draws it.
+
+    Args:
+        seed_sequence (np.random.SeedSequence): The root seed sequence of the training run.
+        epoch (int): The epoch of the individual.
+        index (int): The index of the individual in the population.
+        weights (List[np.ndarray]): The weights giving the shapes and dtype of the noise.
+
+    Returns:
+        List[np.ndarray]: The noise of the individual.
+    """
+    child = np.random.SeedSequence(seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (epoch, index))
+    rng = np.random.default_rng(child)
+    return [rng.standard_normal(w.shape, dtype=w.dtype) for w in weights]
+
+
+def _init_worker(reward_function: Callable[[List[np.ndarray]], float]) -> None:
+    global _worker_reward_function
+    _worker_reward_function = reward_function
+
+
+def _evaluate_individual(weights: List[np.ndarray], sigma: float, seed_sequence: np.random.SeedSequence, epoch: int, index: int) -> Tuple[float, List[np.ndarray]]:
+    # the noise is only drawn here, and sent back for the update of the weights
+    noise = generate_noise(seed_sequence, epoch, index, weights)
+    return _worker_reward_function([w + sigma * n for w, n in zip(weights, noise)]), noise
+
 
 class Deep_Evolution_Strategy:
     """
@@ -12,11 +48,17 @@ class Deep_Evolution_Strategy:
         population_size (int): The size of the population.
         sigma (float): The standard deviation for the mutation.
         learning_rate (float): The learning rate for updating the weights.
+        seed_sequence (np.random.SeedSequence): The root of the per-individual noise streams.
+        workers (int): The number of workers evaluating the population.
+        dtype (np.dtype): The dtype of the weights, shared by the noise.
 
     Methods:
         _get_weight_from_population(weights, population): Returns the weights after applying mutation.
         get_weights(): Returns the current weights.
-        train(epoch, print_every): Trains the algorithm for a specified number of epochs.
+        get_state(): Returns the weights, epoch and RNG state needed to resume training.
+        set_state(state): Restores a state returned by get_state.
+        train(epoch, print_every, callbacks, validation_function, validation_every, initial_epoch):
+            Trains the algorithm for a specified number of epochs.
     """
 
     inputs = None
@@ -27,7 +69,10 @@ class Deep_Evolution_Strategy:
         reward_function: Callable[[List[np.ndarray]], float],
         population_size: int,
         sigma: float,
-        learning_rate: float
+        learning_rate: float,
+        seed: Union[int, np.random.SeedSequence, None] = None,
+        workers: int = 1,
+        executor: str = 'process'
     ) -> None:
         """
         Initializes the Deep_Evolution_Strategy class.
@@ -38,15 +83,33 @@ class Deep_Evolution_Strategy:
             population_size (int): The size of the population.
             sigma (float): The standard deviation for the mutation.
             learning_rate (float): The learning rate for updating the weights.
+            seed (Union[int, np.random.SeedSequence]): The seed of the noise streams. Defaults to a seed
+                drawn from the global numpy random state, so np.random.seed keeps runs reproducible.
+            workers (int): The number of workers evaluating the population. The training trajectory
+                is bit-identical whatever the number of workers.
+            executor (str): 'process' or 'thread', the kind of workers used when workers > 1.
 
         Returns:
             None
         """
         self.weights = weights
+        self.dtype = weights[0].dtype
+        if seed is None:
+            seed = np.random.randint(2**31 - 1)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        if executor not in ('process', 'thread'):
+            raise ValueError("executor must be either 'process' or 'thread'")
+        self.workers = workers
+        self.executor = executor
         self.reward_function = reward_function
         self.population_size = population_size
         self.sigma = sigma
         self.learning_rate = learning_rate
+        self.rewards = None
+        self.epoch = 0
+        self.stop_training = False
+        self.callbacks = None
+        self.callback_states = {}
 
     def _get_weight_from_population(self, weights: List[np.ndarray], population: List[List[np.ndarray]]) -> List[np.ndarray]:
         """
@@ -75,50 +138,186 @@ class Deep_Evolution_Strategy:
         """
         return self.weights
     
-    def _generate_individual(self) -> List[List[np.ndarray]]:
+    def get_state(self) -> dict:
+        """
+        Returns everything needed to resume training bit-exactly after the
+        current epoch: a copy of the weights, the number of completed epochs,
+        the seed of the noise streams and the states of the callbacks.
+
+        Returns:
+            dict: The training state.
+        """
+        return {
+            'weights': [w.copy() for w in self.weights],
+            'epoch': self.epoch,
+            'rng_state': {'entropy': self.seed_sequence.entropy, 'spawn_key': list(self.seed_sequence.spawn_key)},
+            'callbacks': self.callbacks.get_state() if self.callbacks is not None else {},
+        }
+
+    def set_state(self, state: dict) -> None:
+        """
+        Restores a training state returned by get_state. The callback states
+        are restored at the beginning of the next training.
+
+        Args:
+            state (dict): The training state.
         """
-        Generates an individual for the deep evolution strategy.
+        self.weights = [w.copy() for w in state['weights']]
+        self.epoch = state['epoch']
+        self.seed_sequence = np.random.SeedSequence(state['rng_state']['entropy'], spawn_key=tuple(state['rng_state']['spawn_key']))
+        self.callback_states = state.get('callbacks', {})
+
+    def _generate_individual(self, epoch: int, index: int) -> List[List[np.ndarray]]:
+        """
+        Generates an individual for the deep evolution strategy,
+        with noise of the same dtype as the weights.
+
+        Args:
+            epoch (int): The epoch of the individual.
+            index (int): The index of the individual in the population.
 
         Returns:
             List[List[np.ndarray]]: The generated individual.
         """
-        x = []
-        for w in self.weights:
-            x.append(np.random.randn(*w.shape))
-        return x
+        return generate_noise(self.seed_sequence, epoch, index, self.weights)
+
+    def _create_executor(self) -> Optional[Executor]:
+        if self.workers <= 1:
+            return None
+        if self.executor == 'thread':
+            return ThreadPoolExecutor(max_workers=self.workers)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.reward_function,))
+
+    def _evaluate_population(self,
+                             executor: Optional[Executor],
+                             epoch: int,
+                             population: Optional[List[List[np.ndarray]]]
+                             ) -> Tuple[np.ndarray, List[List[np.ndarray]]]:
+        """
+        Evaluates every individual of the population, in the workers when there are some.
+        Process workers draw the noise of their individuals themselves, the population
+        is then None and the noise they drew is returned with the rewards.
+        """
+        if executor is None:
+            rewards = [
+                self.reward_function(self._get_weight_from_population(self.weights, individual))
+                for individual in population
+            ]
+        elif isinstance(executor, ThreadPoolExecutor):
+            rewards = executor.map(
+                lambda individual: self.reward_function(self._get_weight_from_population(self.weights, individual)),
+                population,
+            )
+        else:
+            futures = [
+                executor.submit(_evaluate_individual, self.weights, self.sigma, self.seed_sequence, epoch, k)
+                for k in range(self.population_size)
+            ]
+            rewards, population = zip(*[future.result() for future in futures])
+            population = list(population)
+        return np.array(list(rewards), dtype=float), population
     
-    def train(self, epoch: int = 100, print_every: int = 1) -> None:
+    def train(self,
+              epoch: int = 100,
+              print_every: int = 1,
+              callbacks: Optional[List[Callback]] = None,
+              validation_function: Optional[Callable[[List[np.ndarray]], float]] = None,
+              validation_every: int = 1,
+              initial_epoch: int = 0
+              ) -> None:
         """
         Trains the algorithm for a specified number of epochs.
 
         Args:
-            epoch (int): The number of epochs to train the algorithm. Default is 100.
-            print_every (int): The frequency of printing the reward during training. Default is 1.
+            epoch (int): The epoch at which to stop training. Default is 100.
+            print_every (int): The frequency of printing the mean population reward during training.
+                Default is 1, 0 disables printing.
+            callbacks (List[Callback]): The observers notified with the telemetry of every epoch.
+            validation_function (Callable[[List[np.ndarray]], float]): The reward function evaluated on
+                the updated weights, reported as `val_reward` in the epoch logs.
+            validation_every (int): The frequency of the validation. Default is 1.
+            initial_epoch (int): The epoch at which to start training, to resume a previous run. Default is 0.
 
         Returns:
             None
         """
-        lasttime = time.time()
-        for i in range(epoch):
-            rewards = np.zeros(self.population_size)
-            population = []
-                
-            for k in range(self.population_size):
-                population.append(self._generate_individual())
-                weights_population = self._get_weight_from_population(self.weights, population[k])
-                rewards[k] = self.reward_function(weights_population)
-
-            rewards = (rewards - np.mean(rewards)) / np.std(rewards)
+        callbacks = CallbackList(list(callbacks or []) + ([ProgressPrinter(print_every)] if print_every else []))
+        callbacks.set_strategy(self)
+        self.callbacks = callbacks
+
+        self.stop_training = False
+        executor = self._create_executor()
+        lasttime = time.perf_counter()
+        callbacks.on_train_begin()
+        callbacks.set_state(self.callback_states)
+        self.callback_states = {}
+        try:
+            self._train(executor, callbacks, epoch, validation_function, validation_every, initial_epoch)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        callbacks.on_train_end({'train_time': time.perf_counter() - lasttime})
+
+    def _train(self,
+               executor: Optional[Executor],
+               callbacks: CallbackList,
+               epoch: int,
+               validation_function: Optional[Callable[[List[np.ndarray]], float]],
+               validation_every: int,
+               initial_epoch: int
+               ) -> None:
+        for i in range(initial_epoch, epoch):
+            start = time.perf_counter()
+            population = None
+            if not isinstance(executor, ProcessPoolExecutor):
+                population = [self._generate_individual(i, k) for k in range(self.population_size)]
+            noise_end = time.perf_counter()
+
+            rewards, population = self._evaluate_population(executor, i, population)
+            evaluation_end = time.perf_counter()
+
+            self.rewards = rewards
+            normalized_rewards = ((rewards - np.mean(rewards)) / np.std(rewards)).astype(self.dtype)
             for index, w in enumerate(self.weights):
                 A = np.array([p[index] for p in population])
                 self.weights[index] = (
                     w
                     + self.learning_rate
                     / (self.population_size * self.sigma)
-                    * np.dot(A.T, rewards).T
+                    * np.dot(A.T, normalized_rewards).T
                 )
-                
-            if (i + 1) % print_every == 0:
-                print('iter %d. reward: %f'% (i + 1, self.reward_function(self.weights)))
-                
-        print('time taken to train:', time.time() - lasttime, 'seconds')
\ No newline at end of file
+            update_end = time.perf_counter()
+            self.epoch = i + 1
+
+            logs = self._epoch_logs(i + 1, start, noise_end, evaluation_end, update_end)
+            if validation_function is not None:
+                validate = (i + 1) % validation_every == 0
+                logs['val_reward'] = float(validation_function(self.weights)) if validate else float('nan')
+
+            callbacks.on_epoch_end(i + 1, logs)
+            if self.stop_training:
+                break
+
+    def _epoch_logs(self, epoch: int, start: float, noise_end: float, evaluation_end: float, update_end: float) -> dict:
+        """
+        Builds the telemetry of an epoch from its timings and the rewards already computed.
+        """
+        evaluation_time = evaluation_end - noise_end
+        logs = {
+            'epoch': epoch,
+            'epoch_time': update_end - start,
+            'noise_time': noise_end - start,
+            'evaluation_time': evaluation_time,
+            'update_time': update_end - evaluation_end,
+            'evaluations_per_second': self.population_size / evaluation_time if evaluation_time > 0 else float('inf'),
+            'reward_mean': float(np.mean(self.rewards)),
+            'reward_std': float(np.std(self.rewards)),
+            'reward_min': float(np.min(self.rewards)),
+            'reward_max': float(np.max(self.rewards)),
+        }
+        norms = [float(np.linalg.norm(w)) for w in self.weights]
+        logs['weight_norm'] = float(np.sqrt(np.sum(np.square(norms))))
+        for index, norm in enumerate(norms):
+            logs['weight_norm_%d' % index] = norm
+        return logs
@@ -0,0 +1,194 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import numpy as np
+import itertools
+import json
+import time
+import os
+
+DEFAULT_SEARCH_SPACE = {
+    'population_size': [10, 15, 25, 50],
+    'sigma': [0.05, 0.1, 0.2],
+    'learning_rate': [0.01, 0.03, 0.1],
+    'layer_size': [100, 250, 500],
+    'window_size': [10, 20, 30, 60],
+    'skip': [1, 2],
+}
+
+
+class TrialStore:
+    """
+    Append-only JSON lines store of the trial results, one line per trial and rung.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns every stored record, with one column per hyperparameter.
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return pd.json_normalize(records)
+
+
+def _run_trial(prices: List[float],
+               params: Dict[str, Any],
+               weights: Optional[List[np.ndarray]],
+               epochs: int,
+               agent_kwargs: dict,
+               seed: int
+               ) -> tuple:
+    """
+    Trains a DES agent for the given number of epochs, resuming from the
+    given weights, and returns its weights and training reward.
+    """
+    from predictions.models.des import DES
+    from agents.des_agent import DESAgent
+
+    start = time.time()
+    np.random.seed(seed)
+
+    model = DES(params['window_size'], params['layer_size'], 3)
+    if weights is not None:
+        model.set_weights(weights)
+
+    agent = DESAgent(
+        model,
+        data_points=prices,
+        window_size=params['window_size'],
+        skip=params['skip'],
+        population_size=params['population_size'],
+        sigma=params['sigma'],
+        learning_rate=params['learning_rate'],
+        **agent_kwargs
+    )
+    agent.fit(epochs, 0)
+
+    weights = agent.es.get_weights()
+    return weights, agent.get_reward(weights), time.time() - start
+
+
+class SuccessiveHalving:
+    """
+    Hyperparameter search for DES agents using successive halving.
+
+    Every rung trains the surviving trials concurrently on a process pool,
+    keeps the best 1 / eta of them by training reward, and multiplies the
+    epoch budget of the survivors by eta. Trials resume from the weights
+    reached on the previous rung.
+    """
+    def __init__(self,
+                 search_space: Optional[Dict[str, list]] = None,
+                 n_trials: int = 27,
+                 min_epochs: int = 10,
+                 eta: int = 3,
+                 max_workers: Optional[int] = None,
+                 store_path: str = 'tuning/trials.jsonl',
+                 seed: int = 42
+                 ) -> None:
+        """
+        Args:
+            search_space (Dict[str, list]): The candidate values of each hyperparameter,
+                missing ones are taken from DEFAULT_SEARCH_SPACE.
+            n_trials (int): The number of sampled configurations.
+            min_epochs (int): The epoch budget of the first rung.
+            eta (int): The reduction factor between rungs.
+            max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+            store_path (str): The JSON lines file where the results are written.
+            seed (int): The seed of the sampling and of the trials.
+        """
+        if eta < 2:
+            raise ValueError('eta must be at least 2')
+
+        self.search_space = {**DEFAULT_SEARCH_SPACE, **(search_space or {})}
+        self.n_trials = n_trials
+        self.min_epochs = min_epochs
+        self.eta = eta
+        self.max_workers = max_workers
+        self.store = TrialStore(store_path)
+        self.seed = seed
+        self.best_weights = None
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """
+        Samples n_trials distinct configurations from the search space,
+        or returns the whole grid when it is smaller.
+        """
+        names = list(self.search_space)
+        grid = list(itertools.product(*(self.search_space[name] for name in names)))
+        rng = np.random.RandomState(self.seed)
+        indices = rng.permutation(len(grid))[: self.n_trials]
+        return [dict(zip(names, self._to_builtin(grid[i]))) for i in indices]
+
+    @staticmethod
+    def _to_builtin(values: tuple) -> list:
+        return [value.item() if isinstance(value, np.generic) else value for value in values]
+
+    def run(self, prices: List[float], agent_kwargs: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Runs the search on the given price series.
+
+        Args:
+            prices (List[float]): The training price series.
+            agent_kwargs (dict): The remaining DESAgent arguments (money, max_buy, max_sell).
+
+        Returns:
+            pd.DataFrame: The last rung reached by every trial, best first.
+        """
+        agent_kwargs = {'money': 100, 'max_buy': 5, 'max_sell': 5, **(agent_kwargs or {})}
+        prices = list(prices)
+
+        trials = [{'trial': i, 'params': params, 'weights': None, 'epochs': 0, 'reward': None}
+                  for i, params in enumerate(self.sample())]
+        alive = trials
+        rung = 0
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while alive:
+                budget = self.min_epochs * self.eta ** rung
+                futures = [
+                    executor.submit(
+                        _run_trial, prices, trial['params'], trial['weights'],
+                        budget - trial['epochs'], agent_kwargs, self.seed + 1000 * trial['trial'] + rung
+                    )
+                    for trial in alive
+                ]
+
+                for trial, future in zip(alive, futures):
+                    trial['weights'], trial['reward'], seconds = future.result()
+                    trial['epochs'] = budget
+                    trial['rung'] = rung
+                    self.store.append({
+                        'trial': trial['trial'],
+                        'rung': rung,
+                        'epochs': budget,
+                        'reward': trial['reward'],
+                        'seconds': seconds,
+                        'params': trial['params'],
+                    })
+
+                if len(alive) == 1:
+                    break
+
+                survivors = max(1, len(alive) // self.eta)
+                alive = sorted(alive, key=lambda trial: trial['reward'], reverse=True)[:survivors]
+                rung += 1
+
+        results = pd.DataFrame([
+            {'trial': trial['trial'], 'rung': trial['rung'], 'epochs': trial['epochs'], 'reward': trial['reward'], **trial['params']}
+            for trial in trials
+        ])
+        self.best_weights = max(trials, key=lambda trial: (trial['epochs'], trial['reward']))['weights']
+        return results.sort_values(['epochs', 'reward'], ascending=False).reset_index(drop=True)
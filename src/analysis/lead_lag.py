@@ -0,0 +1,394 @@
+from typing import Optional, Tuple
+import pandas as pd
+import numpy as np
+
+PRICE_FILE = 'data/timeseries/2015/external.csv'
+DIRECTIONS = ('out', 'in', 'total')
+
+
+def load_price(path: str = PRICE_FILE, column: str = 'PriceUSD') -> pd.Series:
+    """
+    Loads the daily price series of the external time series file.
+
+    Args:
+        path (str): The path to the CSV file, with year, month and day columns.
+        column (str): The price column.
+
+    Returns:
+        pd.Series: The price, indexed by date.
+    """
+    df = pd.read_csv(path)
+    dates = pd.DatetimeIndex(pd.to_datetime(df[['year', 'month', 'day']]), name='date')
+    return pd.Series(df[column].values, index=dates, name=column)
+
+
+def activity_matrix(edges,
+                    labels: Optional[np.ndarray] = None,
+                    direction: str = 'out',
+                    weight: str = 'value'
+                    ) -> pd.DataFrame:
+    """
+    Builds the day × entity activity matrix of an EdgeTable, the entities
+    being the actors or, given community labels, the communities.
+
+    Args:
+        edges (EdgeTable): The daily networks.
+        labels (np.ndarray): The community of each actor id, -1 outside every community,
+            e.g. from network.quotient.labels_from_partition. Defaults to one entity per actor.
+        direction (str): Whether to sum the outgoing ('out'), incoming ('in') or both ('total') edges.
+        weight (str): Either 'value' or 'nb_transactions'.
+
+    Returns:
+        pd.DataFrame: The summed weight of each entity on each day, indexed by date.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError('direction must be one of {}'.format(', '.join(DIRECTIONS)))
+
+    weights = getattr(edges, weight).astype(float)
+    ends = {'out': [edges.src], 'in': [edges.dst], 'total': [edges.src, edges.dst]}[direction]
+
+    if labels is None:
+        nb_entities = edges.nb_actors
+        columns = pd.Index(edges.actors.get_names(np.arange(edges.nb_actors)), name='actor')
+    else:
+        labels = np.asarray(labels)
+        nb_entities = int(labels.max()) + 1 if len(labels) else 0
+        columns = pd.RangeIndex(nb_entities, name='community')
+
+    matrix = np.zeros(edges.nb_days * nb_entities)
+    for actors in ends:
+        entities = actors if labels is None else labels[actors]
+        mask = entities >= 0
+        matrix += np.bincount(
+            edges.day[mask].astype(np.int64) * nb_entities + entities[mask],
+            weights=weights[mask],
+            minlength=len(matrix),
+        )
+
+    return pd.DataFrame(matrix.reshape(edges.nb_days, nb_entities), index=pd.DatetimeIndex(edges.dates, name='date'), columns=columns)
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    """
+    Centers and scales series along their time axis (-2), to limit the cancellation in the overlap moments.
+    """
+    std = np.maximum(values.std(axis=-2, keepdims=True), 1e-300)
+    return (values - values.mean(axis=-2, keepdims=True)) / std
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sums along the time axis (-2), starting from 0.
+    """
+    zeros = np.zeros(values.shape[:-2] + (1,) + values.shape[-1:])
+    return np.concatenate([zeros, np.cumsum(values, axis=-2)], axis=-2)
+
+
+class LaggedCorrelation:
+    """
+    Computes the Pearson correlation of y[t] and x[t + k] for every lag k in
+    [-max_lag, max_lag], on the overlapping part of the series. The lagged
+    cross-products of all the series are computed at once with real FFTs, and
+    the means and variances of each overlap with cumulative sums, so the cost
+    is O(T log T) per series instead of O(T × lags). The spectra and sums of
+    y are computed once, so that many reference series (e.g. permutations)
+    can be correlated against the same series cheaply.
+
+    A positive lag means that y leads x.
+    """
+    def __init__(self, y: np.ndarray, max_lag: int) -> None:
+        """
+        Initializes a LaggedCorrelation object.
+
+        Args:
+            y (np.ndarray): The series to correlate, of shape (..., T, N).
+            max_lag (int): The largest lag, smaller than T - 1.
+        """
+        y = np.asarray(y, dtype=float)
+        self.length = y.shape[-2]
+        if max_lag >= self.length - 1:
+            raise ValueError('max_lag must be smaller than the series length minus one')
+
+        self.max_lag = max_lag
+        self.lags = np.arange(-max_lag, max_lag + 1)
+        self.nfft = 1 << int(2 * self.length - 1).bit_length()
+
+        # y[negative:length - positive] is paired with x[positive:length - negative]
+        self._positive = np.maximum(self.lags, 0)
+        self._negative = np.maximum(-self.lags, 0)
+        self._n = (self.length - np.abs(self.lags))[:, None]
+
+        y = _standardize(y)
+        self._spectrum = np.conj(np.fft.rfft(y, self.nfft, axis=-2))
+        self._sy = self._window_sum(_prefix(y), self._negative, self.length - self._positive)
+        self._syy = self._window_sum(_prefix(y ** 2), self._negative, self.length - self._positive)
+
+    @staticmethod
+    def _window_sum(prefixes: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        return np.take(prefixes, end, axis=-2) - np.take(prefixes, start, axis=-2)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+        Correlates reference series with y.
+
+        Args:
+            x (np.ndarray): The reference series, of shape (..., T), broadcast against y.
+
+        Returns:
+            np.ndarray: The correlations, of shape (..., 2 * max_lag + 1, N), lags in increasing order.
+        """
+        x = _standardize(np.asarray(x, dtype=float)[..., :, None])
+        cross = np.fft.irfft(self._spectrum * np.fft.rfft(x, self.nfft, axis=-2), self.nfft, axis=-2)
+        sxy = np.take(cross, self.lags % self.nfft, axis=-2)
+
+        sx = self._window_sum(_prefix(x), self._positive, self.length - self._negative)
+        sxx = self._window_sum(_prefix(x ** 2), self._positive, self.length - self._negative)
+
+        n = self._n
+        covariance = n * sxy - sx * self._sy
+        variance = (n * sxx - sx ** 2) * (n * self._syy - self._sy ** 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(variance > 1e-12 * n ** 4, covariance / np.sqrt(variance), np.nan)
+
+
+def lagged_correlation(x: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Computes the correlation of y[t] and x[t + k] for every lag k in [-max_lag, max_lag],
+    see LaggedCorrelation.
+
+    Args:
+        x (np.ndarray): The reference series, of shape (..., T).
+        y (np.ndarray): The series to correlate, of shape (..., T, N), broadcast against x.
+        max_lag (int): The largest lag, smaller than T - 1.
+
+    Returns:
+        np.ndarray: The correlations, of shape (..., 2 * max_lag + 1, N), lags in increasing order.
+    """
+    return LaggedCorrelation(y, max_lag)(x)
+
+
+def _batch_size(length: int, nb_series: int, budget: int = 2 ** 24) -> int:
+    """
+    Number of batched correlations whose FFT buffers stay within the budget of elements.
+    """
+    return max(1, budget // (2 * length * max(nb_series, 1)))
+
+
+def rolling_lagged_correlation(x: np.ndarray,
+                               y: np.ndarray,
+                               window: int,
+                               max_lag: int,
+                               step: int = 1
+                               ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the lagged correlations over trailing windows, the windows being
+    processed in batches through lagged_correlation.
+
+    Args:
+        x (np.ndarray): The reference series, of shape (T,).
+        y (np.ndarray): The series to correlate, of shape (T, N).
+        window (int): The window length.
+        max_lag (int): The largest lag.
+        step (int): The number of time steps between two windows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The end position of each window, and the
+        correlations of shape (windows, 2 * max_lag + 1, N).
+    """
+    ends = np.arange(window, len(x) + 1, step)
+    x_windows = np.lib.stride_tricks.sliding_window_view(np.asarray(x, dtype=float), window)
+    y_windows = np.lib.stride_tricks.sliding_window_view(np.asarray(y, dtype=float), window, axis=0)
+
+    batch = _batch_size(window, y.shape[1])
+    correlations = []
+    for i in range(0, len(ends), batch):
+        starts = ends[i:i + batch] - window
+        # sliding_window_view puts the window last, lagged_correlation expects it before the series
+        correlations.append(lagged_correlation(x_windows[starts], np.swapaxes(y_windows[starts], -1, -2), max_lag))
+    return ends - 1, np.concatenate(correlations) if correlations else np.empty((0, 2 * max_lag + 1, y.shape[1]))
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """
+    Adjusts p-values for the false discovery rate of multiple tests.
+
+    Args:
+        p_values (np.ndarray): The p-values.
+
+    Returns:
+        np.ndarray: The q-values, in the order of the p-values.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    order = np.argsort(p_values)
+    ranked = p_values[order] * len(p_values) / np.arange(1, len(p_values) + 1)
+    q_values = np.empty(len(p_values))
+    q_values[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1)
+    return q_values
+
+
+class LeadLagScan:
+    """
+    Scans which entities' activity leads or lags the price, by correlating
+    the activity changes of every entity with the price returns at every lag
+    in one batched computation.
+
+    Both series are differenced in log space by default (log returns of the
+    price, log1p changes of the activity), since the correlation of trending
+    levels is mostly spurious. The significance of the strongest lag of each
+    entity is assessed by permutations: the returns are circularly shifted
+    at random, which keeps their autocorrelation, and the strongest absolute
+    correlation over the lags is recomputed for all the entities at once.
+    """
+    def __init__(self,
+                 activity: pd.DataFrame,
+                 price: pd.Series,
+                 max_lag: int = 14,
+                 differences: bool = True,
+                 min_active_days: int = 30
+                 ) -> None:
+        """
+        Initializes a LeadLagScan object.
+
+        Args:
+            activity (pd.DataFrame): The day × entity activity, e.g. from activity_matrix.
+            price (pd.Series): The daily price, e.g. from load_price.
+            max_lag (int): The largest lag in days, in both directions.
+            differences (bool): Whether to correlate the log changes rather than the levels.
+            min_active_days (int): The entities active on fewer of the common days are left out,
+                their correlations being driven by a handful of days.
+        """
+        price = price.dropna()
+        dates = activity.index.intersection(price.index)
+        if len(dates) <= 2 * max_lag + 2:
+            raise ValueError('Not enough common days for a max_lag of {}'.format(max_lag))
+
+        activity = activity.loc[dates].fillna(0)
+        activity = activity.loc[:, (activity > 0).sum() >= min_active_days]
+
+        x = price.loc[dates].values.astype(float)
+        y = activity.values.astype(float)
+        if differences:
+            x = np.diff(np.log(x))
+            y = np.diff(np.log1p(np.maximum(y, 0)), axis=0)
+            dates = dates[1:]
+
+        self.dates = dates
+        self.entities = activity.columns
+        self.max_lag = max_lag
+        self.lags = np.arange(-max_lag, max_lag + 1)
+        self._x = x
+        self._y = y
+        self._correlation = LaggedCorrelation(y, max_lag)
+        self._correlations = None
+
+    def correlations(self) -> pd.DataFrame:
+        """
+        Gets the correlation of every entity at every lag.
+
+        Returns:
+            pd.DataFrame: The correlations, indexed by lag, a positive lag meaning that the entity leads the price.
+        """
+        if self._correlations is None:
+            self._correlations = self._correlation(self._x)
+        return pd.DataFrame(self._correlations, index=pd.Index(self.lags, name='lag'), columns=self.entities)
+
+    def _peaks(self, correlations: np.ndarray, lags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Strongest absolute correlation over the given lags, and its lag, along axis -2.
+        """
+        selected = np.abs(np.take(correlations, lags + self.max_lag, axis=-2))
+        selected = np.where(np.isnan(selected), -np.inf, selected)
+        best = selected.argmax(axis=-2)
+        return np.take_along_axis(selected, best[..., None, :], axis=-2)[..., 0, :], lags[best]
+
+    def permutation_test(self,
+                         n_permutations: int = 200,
+                         min_lag: int = 1,
+                         seed: Optional[int] = None
+                         ) -> np.ndarray:
+        """
+        Computes the permutation p-value of the strongest correlation of each
+        entity over the lags [min_lag, max_lag].
+
+        Args:
+            n_permutations (int): The number of random circular shifts of the returns.
+            min_lag (int): The smallest lag considered, 1 to only look for leaders.
+            seed (int): The seed of the shifts.
+
+        Returns:
+            np.ndarray: The p-value of each entity.
+        """
+        rng = np.random.default_rng(seed)
+        lags = np.arange(min_lag, self.max_lag + 1)
+        observed, _ = self._peaks(self.correlations().values, lags)
+
+        length = len(self._x)
+        shifts = rng.integers(self.max_lag + 1, length - self.max_lag, size=n_permutations)
+        exceed = np.zeros(len(observed))
+        batch = _batch_size(length, self._y.shape[1])
+        for i in range(0, n_permutations, batch):
+            shifted = np.stack([np.roll(self._x, shift) for shift in shifts[i:i + batch]])
+            null, _ = self._peaks(self._correlation(shifted), lags)
+            exceed += (null >= observed).sum(axis=0)
+
+        p_values = (exceed + 1) / (n_permutations + 1)
+        p_values[~np.isfinite(observed)] = np.nan
+        return p_values
+
+    def get_leaders(self,
+                    top_n: Optional[int] = 20,
+                    min_lag: int = 1,
+                    n_permutations: int = 0,
+                    seed: Optional[int] = None
+                    ) -> pd.DataFrame:
+        """
+        Ranks the entities by their strongest correlation with the future returns.
+
+        Args:
+            top_n (int): The number of entities kept, None for all of them.
+            min_lag (int): The smallest lag considered, negative to also consider the entities following the price.
+            n_permutations (int): The number of permutations of the significance test, 0 to skip it.
+            seed (int): The seed of the permutations.
+
+        Returns:
+            pd.DataFrame: The lag and correlation of the strongest lag of each entity,
+            with its p-value and false discovery rate q-value when permutations are run.
+        """
+        lags = np.arange(min_lag, self.max_lag + 1)
+        correlations = self.correlations().values
+        strength, lag = self._peaks(correlations, lags)
+        correlation = np.take_along_axis(correlations, (lag + self.max_lag)[None, :], axis=0)[0]
+
+        leaders = pd.DataFrame({'lag': lag, 'correlation': correlation}, index=self.entities)
+        if n_permutations:
+            p_values = self.permutation_test(n_permutations, min_lag, seed)
+            leaders['p_value'] = p_values
+            leaders['q_value'] = np.nan
+            tested = ~np.isnan(p_values)
+            leaders.loc[tested, 'q_value'] = benjamini_hochberg(p_values[tested])
+
+        leaders = leaders[np.isfinite(strength)].iloc[np.argsort(-strength[np.isfinite(strength)], kind='stable')]
+        return leaders if top_n is None else leaders.head(top_n)
+
+    def rolling(self, window: int = 90, step: int = 7, min_lag: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Tracks the strongest lag of each entity over trailing windows.
+
+        Args:
+            window (int): The window length in days.
+            step (int): The number of days between two windows.
+            min_lag (int): The smallest lag considered.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: The correlation and the lag of the strongest
+            lag of each entity, indexed by the last date of each window.
+        """
+        ends, correlations = rolling_lagged_correlation(self._x, self._y, window, self.max_lag, step)
+        lags = np.arange(min_lag, self.max_lag + 1)
+        strength, lag = self._peaks(correlations, lags)
+        correlation = np.take_along_axis(correlations, (lag + self.max_lag)[:, None, :], axis=1)[:, 0, :]
+
+        index = pd.DatetimeIndex(self.dates[ends], name='date')
+        correlation = np.where(np.isfinite(strength), correlation, np.nan)
+        return (pd.DataFrame(correlation, index=index, columns=self.entities),
+                pd.DataFrame(np.where(np.isfinite(strength), lag, -1), index=index, columns=self.entities))
@@ -0,0 +1,82 @@
+"""
+Compares the memory footprint and throughput of DES training with float64
+and float32 weights, noise and states.
+
+Run from the src directory:
+    python -m benchmarks.dtype --layer-size 500 --population-size 15 --epochs 20
+"""
+from benchmarks.synthetic import synthetic_prices
+from agents.strategies.callbacks import History
+from predictions.models.des import DES
+from agents.des_agent import DESAgent
+from typing import Any, Dict, List
+import numpy as np
+import tracemalloc
+import argparse
+import tabulate
+
+
+def benchmark_dtype(dtype: np.dtype,
+                    prices: List[float],
+                    window_size: int,
+                    layer_size: int,
+                    population_size: int,
+                    epochs: int,
+                    seed: int = 42
+                    ) -> Dict[str, Any]:
+    """
+    Trains a DES agent with the given dtype and reports its memory usage and timings.
+    """
+    np.random.seed(seed)
+    model = DES(window_size, layer_size, 3, dtype=dtype)
+    agent = DESAgent(model, 100, 5, 5, prices, window_size, population_size=population_size)
+
+    # warm up the state cache and the BLAS threads
+    agent.get_reward(model.get_weights())
+
+    history = History()
+    tracemalloc.start()
+    agent.fit(epochs, 0, callbacks=[history])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    logs = history.to_frame()
+    weights_bytes = sum(w.nbytes for w in model.get_weights())
+    return {
+        'dtype': np.dtype(dtype).name,
+        'weights (MB)': weights_bytes / 2**20,
+        'population noise (MB)': weights_bytes * population_size / 2**20,
+        'states (MB)': agent._get_decision_states(agent.train)[1].nbytes / 2**20,
+        'peak traced (MB)': peak / 2**20,
+        'noise (ms/epoch)': logs['noise_time'].mean() * 1000,
+        'evaluation (ms/epoch)': logs['evaluation_time'].mean() * 1000,
+        'update (ms/epoch)': logs['update_time'].mean() * 1000,
+        'evaluations/s': logs['evaluations_per_second'].median(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--length', type=int, default=5000, help='number of synthetic prices')
+    parser.add_argument('--window-size', type=int, default=30)
+    parser.add_argument('--layer-size', type=int, default=500)
+    parser.add_argument('--population-size', type=int, default=15)
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    prices = synthetic_prices(args.length, args.seed)
+    rows = [
+        benchmark_dtype(dtype, prices, args.window_size, args.layer_size, args.population_size, args.epochs, args.seed)
+        for dtype in (np.float64, np.float32)
+    ]
+
+    print(tabulate.tabulate([row.values() for row in rows], headers=list(rows[0]), tablefmt='github', floatfmt='.2f'))
+    print('\nfloat32 speedup: %.2fx evaluations/s, %.2fx noise generation' % (
+        rows[1]['evaluations/s'] / rows[0]['evaluations/s'],
+        rows[0]['noise (ms/epoch)'] / rows[1]['noise (ms/epoch)'],
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Checks that DES training is bit-identical whatever the number of workers
+evaluating the population, and reports the speedup.
+
+Run from the src directory:
+    python -m benchmarks.reproducibility --workers 4
+"""
+from benchmarks.synthetic import synthetic_prices
+from agents.strategies.callbacks import History
+from predictions.models.des import DES
+from agents.des_agent import DESAgent
+from typing import List, Tuple
+import numpy as np
+import argparse
+import sys
+
+
+def train(prices: List[float], workers: int, executor: str, seed: int, epochs: int, layer_size: int) -> Tuple[List[np.ndarray], np.ndarray, float]:
+    """
+    Trains a DES agent and returns its final weights, its reward trajectory
+    and its mean evaluation time per epoch.
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    np.random.seed(seed)
+    model = DES(30, layer_size, 3)
+
+    agent = DESAgent(model, 100, 5, 5, prices, 30, seed=seed_sequence, workers=workers, executor=executor)
+
+    history = History()
+    agent.fit(epochs, 0, callbacks=[history])
+    logs = history.to_frame()
+    return model.get_weights(), logs['reward_mean'].values, logs['evaluation_time'].mean()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process')
+    parser.add_argument('--length', type=int, default=3000)
+    parser.add_argument('--layer-size', type=int, default=200)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    prices = synthetic_prices(args.length, args.seed)
+    weights, rewards, single_time = train(prices, 1, args.executor, args.seed, args.epochs, args.layer_size)
+    parallel_weights, parallel_rewards, parallel_time = train(prices, args.workers, args.executor, args.seed, args.epochs, args.layer_size)
+
+    identical = np.array_equal(rewards, parallel_rewards) and all(
+        np.array_equal(w, parallel_w) for w, parallel_w in zip(weights, parallel_weights)
+    )
+    print('1 worker vs %d %s workers: %s trajectories, %.2fx evaluation speedup' % (
+        args.workers, args.executor, 'identical' if identical else 'DIFFERENT', single_time / parallel_time
+    ))
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Times and records the peak traced memory of the hot paths of the project
+on seeded synthetic data, and writes the results as a JSON baseline that
+later runs are compared against.
+
+Run from the src directory:
+    python -m benchmarks.suite --scale small --output baseline.json
+    python -m benchmarks.suite --scale small --compare baseline.json --threshold 1.2
+"""
+from benchmarks.synthetic import synthetic_network, synthetic_prices, synthetic_timeseries, write_network_dir
+from network.utils import build_actors, load_all_csv_in_dir
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from predictions.models.des import DES
+from agents.des_agent import DESAgent
+from network.community import Community
+from network.network import Network
+from predictions.etl import ETL
+import pandas as pd
+import numpy as np
+import tracemalloc
+import platform
+import tempfile
+import argparse
+import datetime
+import fnmatch
+import tabulate
+import shutil
+import json
+import time
+import sys
+
+SCALES = {
+    'small': {
+        'length': 2000, 'window_size': 30, 'layer_size': 200, 'population_size': 15, 'epochs': 3,
+        'nb_features': 10, 'timestep': 6, 'nb_days': 5, 'nb_actors': 2000, 'nb_edges': 5000,
+    },
+    'medium': {
+        'length': 20000, 'window_size': 30, 'layer_size': 500, 'population_size': 15, 'epochs': 3,
+        'nb_features': 20, 'timestep': 6, 'nb_days': 30, 'nb_actors': 10000, 'nb_edges': 20000,
+    },
+    'large': {
+        'length': 200000, 'window_size': 30, 'layer_size': 500, 'population_size': 30, 'epochs': 2,
+        'nb_features': 40, 'timestep': 6, 'nb_days': 90, 'nb_actors': 30000, 'nb_edges': 60000,
+    },
+}
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmarked operation: setup builds a fresh state outside the timing,
+    run is the timed operation on that state, and units is the number of
+    operations run performs (e.g. epochs), the timings being reported per unit.
+    """
+    name: str
+    setup: Callable[[Dict[str, Any]], Any]
+    run: Callable[[Any], Any]
+    units: Callable[[Dict[str, Any]], int] = lambda params: 1
+
+
+def _des_agent(params: Dict[str, Any]) -> DESAgent:
+    np.random.seed(params['seed'])
+    model = DES(params['window_size'], params['layer_size'], 3)
+    return DESAgent(
+        model, 10000, 5, 5, synthetic_prices(params['length'], params['seed']), params['window_size'],
+        population_size=params['population_size'], seed=params['seed'],
+    )
+
+
+def _etl(params: Dict[str, Any]) -> ETL:
+    df = params['timeseries']
+    return ETL(df, [column for column in df.columns if column not in ('week', 'weekday', 'year', 'month', 'day')], timestep=params['timestep'])
+
+
+def _network(params: Dict[str, Any]) -> Network:
+    network = Network(build_actors(params['network'], pd.Timestamp('2015-01-01')))
+    network.construct_network()
+    return network
+
+
+def _community(params: Dict[str, Any]) -> Community:
+    actors = build_actors(params['network'], pd.Timestamp('2015-01-01'))
+    transactions = [transaction for actor in actors for transaction in actor.transactions]
+    return Community(
+        [actor.name for actor in actors],
+        sum(actor.sended for actor in actors),
+        sum(actor.received for actor in actors),
+        sum(actor.nb_transactions for actor in actors),
+        sum(actor.nb_unique_transactions for actor in actors),
+        transactions,
+    )
+
+
+BENCHMARKS = [
+    Benchmark('des.get_reward', _des_agent, lambda agent: agent.get_reward(agent.model.get_weights())),
+    Benchmark(
+        'des.train_epoch',
+        lambda params: (_des_agent(params), params['epochs']),
+        lambda state: state[0].es.train(state[1], print_every=0),
+        lambda params: params['epochs'],
+    ),
+    Benchmark('etl.construction', lambda params: params, _etl),
+    Benchmark('etl.window', _etl, lambda etl: etl._window(etl.train)),
+    Benchmark('network.load_all_csv_in_dir', lambda params: params['network_dir'], load_all_csv_in_dir, lambda params: params['nb_days']),
+    Benchmark(
+        'network.construct_network',
+        lambda params: Network(build_actors(params['network'], pd.Timestamp('2015-01-01'))),
+        lambda network: network.construct_network(),
+    ),
+    Benchmark('network.louvain', _network, lambda network: network.process_communities_louvain(random_state=42)),
+    Benchmark('community.process_volume_by_day', _community, lambda community: community.process_volume_by_day()),
+]
+
+
+def measure(benchmark: Benchmark, params: Dict[str, Any], repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times a benchmark over fresh states, then records its peak traced memory
+    in a separate run, since tracing slows the allocations down.
+
+    Args:
+        benchmark (Benchmark): The benchmark.
+        params (Dict[str, Any]): The scale parameters and the shared synthetic data.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        Dict[str, Any]: The median, minimum and maximum time per unit in seconds, and the peak memory in MB.
+    """
+    units = benchmark.units(params)
+    timings = []
+    for _ in range(repeat):
+        state = benchmark.setup(params)
+        start = time.perf_counter()
+        benchmark.run(state)
+        timings.append((time.perf_counter() - start) / units)
+
+    state = benchmark.setup(params)
+    tracemalloc.start()
+    benchmark.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_s': float(np.median(timings)),
+        'min_s': float(np.min(timings)),
+        'max_s': float(np.max(timings)),
+        'repeat': repeat,
+        'units': units,
+        'peak_mb': peak / 2**20,
+    }
+
+
+def run_suite(scale: str = 'small',
+              repeat: int = 5,
+              seed: int = 42,
+              only: Optional[List[str]] = None,
+              verbose: bool = True
+              ) -> Dict[str, Any]:
+    """
+    Generates the synthetic data of a scale and measures the selected benchmarks.
+
+    Args:
+        scale (str): One of the SCALES.
+        repeat (int): The number of timed runs per benchmark.
+        seed (int): The seed of the synthetic data.
+        only (List[str]): Glob patterns of the benchmark names to run. Defaults to all of them.
+        verbose (bool): Whether to print every result as it completes.
+
+    Returns:
+        Dict[str, Any]: The metadata of the run and the results of each benchmark.
+    """
+    params = dict(SCALES[scale], seed=seed)
+    params['timeseries'] = synthetic_timeseries(params['length'], params['nb_features'], seed)
+    params['network'] = synthetic_network(params['nb_actors'], params['nb_edges'], seed)
+
+    network_dir = tempfile.mkdtemp(prefix='benchmark_networks_')
+    results = {}
+    try:
+        write_network_dir(network_dir, params['nb_days'], params['nb_actors'], params['nb_edges'], seed)
+        params['network_dir'] = network_dir
+
+        for benchmark in BENCHMARKS:
+            if only and not any(fnmatch.fnmatch(benchmark.name, pattern) for pattern in only):
+                continue
+            results[benchmark.name] = measure(benchmark, params, repeat)
+            if verbose:
+                print('%-35s %10.4fs %10.1f MB' % (benchmark.name, results[benchmark.name]['median_s'], results[benchmark.name]['peak_mb']))
+    finally:
+        shutil.rmtree(network_dir, ignore_errors=True)
+
+    return {
+        'metadata': {
+            'scale': scale,
+            'params': SCALES[scale],
+            'seed': seed,
+            'repeat': repeat,
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 1.2) -> pd.DataFrame:
+    """
+    Compares the results of a run with a baseline.
+
+    Args:
+        current (Dict[str, Any]): The results of run_suite.
+        baseline (Dict[str, Any]): The baseline results, e.g. loaded from a JSON file.
+        threshold (float): The time or memory ratio above which a benchmark is a regression.
+
+    Returns:
+        pd.DataFrame: The baseline and current median time and peak memory of the benchmarks
+        of both runs, their ratios and whether they regressed.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        reference = baseline['results'][name]
+        time_ratio = result['median_s'] / max(reference['median_s'], 1e-12)
+        memory_ratio = result['peak_mb'] / max(reference['peak_mb'], 1e-12)
+        rows.append({
+            'benchmark': name,
+            'baseline_s': reference['median_s'],
+            'current_s': result['median_s'],
+            'time_ratio': time_ratio,
+            'baseline_mb': reference['peak_mb'],
+            'current_mb': result['peak_mb'],
+            'memory_ratio': memory_ratio,
+            'regression': time_ratio > threshold or memory_ratio > threshold,
+        })
+    return pd.DataFrame(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='*', help='glob patterns of the benchmarks to run, e.g. "network.*"')
+    parser.add_argument('--output', help='path of the JSON file the results are written to')
+    parser.add_argument('--compare', help='path of a JSON baseline to compare the results with')
+    parser.add_argument('--threshold', type=float, default=1.2, help='time or memory ratio counted as a regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.repeat, args.seed, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline['metadata']['scale'] != args.scale:
+            print('warning: the baseline was run at the %s scale' % baseline['metadata']['scale'])
+
+        comparison = compare(results, baseline, args.threshold)
+        print()
+        print(tabulate.tabulate(comparison, headers='keys', tablefmt='github', floatfmt='.4f', showindex=False))
+        sys.exit(1 if comparison['regression'].any() else 0)
+
+
+if __name__ == '__main__':
+    main()
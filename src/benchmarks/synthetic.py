@@ -0,0 +1,92 @@
+"""
+Seeded synthetic data generators for the benchmarks, at any scale: price
+series, feature tables shaped like the time series CSV files, and daily
+transaction networks shaped like the data/networks files.
+"""
+from typing import List
+import pandas as pd
+import numpy as np
+import os
+
+
+def synthetic_prices(length: int, seed: int = 42) -> List[float]:
+    """
+    Generates a geometric random walk starting at 300.
+    """
+    rng = np.random.default_rng(seed)
+    return (300 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))).tolist()
+
+
+def synthetic_timeseries(length: int, nb_features: int = 10, seed: int = 42, start: str = '2015-01-01') -> pd.DataFrame:
+    """
+    Generates a daily feature table with the date columns of the time series
+    files, a PriceUSD random walk and features correlated with it.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=length, freq='D')
+    price = np.array(synthetic_prices(length, seed))
+
+    df = pd.DataFrame({
+        'week': ((dates - dates[0]).days // 7).values,
+        'weekday': dates.weekday,
+        'year': dates.year,
+        'month': dates.month,
+        'day': dates.day,
+        'PriceUSD': price,
+    })
+    for i in range(nb_features):
+        loading = rng.normal()
+        df['feature_%d' % i] = loading * price + rng.normal(0, price.std(), length)
+    return df
+
+
+def synthetic_network(nb_actors: int, nb_edges: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates the edges of a daily transaction network. The actors are drawn
+    with Zipf-like popularities, so a few hubs (exchanges, mixers) take part
+    in most edges, like in the real networks. There are no self-loops and
+    no duplicate (Source, Target) pairs.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, nb_actors + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    # draw extra pairs, since the self-loops and duplicates are dropped
+    size = int(nb_edges * 1.5) + 100
+    src = rng.choice(nb_actors, size=size, p=popularity)
+    dst = rng.choice(nb_actors, size=size, p=popularity)
+    keys = src.astype(np.int64) * nb_actors + dst
+    _, first = np.unique(keys[src != dst], return_index=True)
+    pairs = np.flatnonzero(src != dst)[np.sort(first)][:nb_edges]
+
+    names = np.array([str(i) for i in rng.permutation(10 ** 7)[:nb_actors]], dtype=object)
+    return pd.DataFrame({
+        'Source': names[src[pairs]],
+        'Target': names[dst[pairs]],
+        'value': np.round(rng.lognormal(16, 2.5, len(pairs))).astype(np.int64) + 1,
+        'nb_transactions': rng.geometric(0.6, len(pairs)),
+    })
+
+
+def write_network_dir(data_dir: str,
+                      nb_days: int,
+                      nb_actors: int,
+                      nb_edges: int,
+                      seed: int = 42,
+                      start: str = '2015-01-01'
+                      ) -> List[str]:
+    """
+    Writes one synthetic network per day as YYYY-M-D.csv files, like data/networks.
+
+    Returns:
+        List[str]: The paths of the files written.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    seeds = np.random.SeedSequence(seed).generate_state(nb_days)
+
+    paths = []
+    for date, day_seed in zip(pd.date_range(start, periods=nb_days, freq='D'), seeds):
+        path = os.path.join(data_dir, '%d-%d-%d.csv' % (date.year, date.month, date.day))
+        synthetic_network(nb_actors, nb_edges, int(day_seed)).to_csv(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,303 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from network.utils import build_actors
+from network.network import Network
+import networkx as nx
+import pandas as pd
+import numpy as np
+import sqlite3
+import glob
+import json
+import time
+import zlib
+import os
+
+ALGORITHMS = ("louvain", "girvan_newman")
+
+
+def _params_key(params):
+    return json.dumps(params or {}, sort_keys=True)
+
+
+class CommunityStore:
+    """
+    The CommunityStore class persists the community detection results of
+    daily snapshots in a SQLite file, keyed by (day, algorithm, parameters).
+    Partitions are stored as zlib-compressed member and label arrays.
+    """
+    def __init__(self, path):
+        """
+        Initialize a CommunityStore object.
+
+        Parameters:
+        path (str): The path of the SQLite file.
+        """
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS communities (
+                    day TEXT NOT NULL,
+                    algorithm TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    nb_actors INTEGER,
+                    nb_communities INTEGER,
+                    modularity REAL,
+                    seconds REAL,
+                    partition BLOB,
+                    PRIMARY KEY (day, algorithm, params)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        # the connection context manager only commits, closing releases the file
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            yield connection
+
+    def get_days(self, algorithm, params=None):
+        """
+        Get the days already processed with an algorithm and its parameters.
+
+        Parameters:
+        algorithm (str): The community detection algorithm.
+        params (dict): The parameters of the algorithm.
+
+        Returns:
+        set: The processed days, as YYYY-MM-DD strings.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT day FROM communities WHERE algorithm = ? AND params = ?",
+                (algorithm, _params_key(params)),
+            ).fetchall()
+        return {day for day, in rows}
+
+    def put(self, result):
+        """
+        Insert or replace the result of a day.
+
+        Parameters:
+        result (dict): The result returned by detect_communities.
+        """
+        partition = zlib.compress(json.dumps([result["members"], result["labels"]]).encode())
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO communities VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result["day"],
+                    result["algorithm"],
+                    _params_key(result["params"]),
+                    result["nb_actors"],
+                    result["nb_communities"],
+                    result["modularity"],
+                    result["seconds"],
+                    partition,
+                ),
+            )
+
+    def get_partition(self, day, algorithm, params=None):
+        """
+        Get the partition of a day.
+
+        Parameters:
+        day (str or datetime): The day.
+        algorithm (str): The community detection algorithm.
+        params (dict): The parameters of the algorithm.
+
+        Returns:
+        dict: The community id of each actor, or None when the day was not processed.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT partition FROM communities WHERE day = ? AND algorithm = ? AND params = ?",
+                (pd.Timestamp(day).strftime("%Y-%m-%d"), algorithm, _params_key(params)),
+            ).fetchone()
+
+        if row is None:
+            return None
+        members, labels = json.loads(zlib.decompress(row[0]))
+        return dict(zip(members, labels))
+
+    def get_communities(self, day, algorithm, params=None):
+        """
+        Get the communities of a day, as Network.get_communities returns them.
+
+        Parameters:
+        day (str or datetime): The day.
+        algorithm (str): The community detection algorithm.
+        params (dict): The parameters of the algorithm.
+
+        Returns:
+        list: The list of members of each community.
+        """
+        partition = self.get_partition(day, algorithm, params)
+        if partition is None:
+            return None
+
+        communities = {}
+        for member, label in partition.items():
+            communities.setdefault(label, []).append(member)
+        return [communities[label] for label in sorted(communities)]
+
+    def to_frame(self, algorithm=None, params=None):
+        """
+        Get the summary of the stored results, without the partitions.
+
+        Parameters:
+        algorithm (str): Only keep the results of this algorithm.
+        params (dict): Only keep the results with these parameters.
+
+        Returns:
+        pd.DataFrame: The number of actors and communities, modularity and timing of each result.
+        """
+        query = "SELECT day, algorithm, params, nb_actors, nb_communities, modularity, seconds FROM communities"
+        conditions, arguments = [], []
+        if algorithm is not None:
+            conditions.append("algorithm = ?")
+            arguments.append(algorithm)
+        if params is not None:
+            conditions.append("params = ?")
+            arguments.append(_params_key(params))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._connect() as connection:
+            df = pd.read_sql_query(query + " ORDER BY day", connection, params=arguments)
+        df["day"] = pd.to_datetime(df["day"])
+        return df
+
+
+def detect_communities(filename, day, algorithm="louvain", params=None):
+    """
+    Build the network of a daily file and detect its communities.
+
+    Parameters:
+    filename (str): The path to the daily CSV file.
+    day (str): The day, as YYYY-MM-DD.
+    algorithm (str): Either "louvain" or "girvan_newman".
+    params (dict): The keyword arguments of the Network community detection method.
+
+    Returns:
+    dict: The partition, modularity and timing of the day.
+    """
+    start = time.time()
+
+    df = pd.read_csv(filename, dtype={"Source": str, "Target": str})
+    network = Network(build_actors(df, pd.Timestamp(day)))
+    network.construct_network()
+    getattr(network, "process_communities_" + algorithm)(**(params or {}))
+
+    communities = [sorted(community) for community in network.get_communities()]
+    communities.sort(key=len, reverse=True)
+    members = [member for community in communities for member in community]
+    labels = np.repeat(np.arange(len(communities)), [len(community) for community in communities]).tolist()
+
+    return {
+        "day": day,
+        "algorithm": algorithm,
+        "params": params or {},
+        "nb_actors": len(members),
+        "nb_communities": len(communities),
+        "modularity": nx.community.modularity(network.get_graph().to_undirected(), communities, weight=None),
+        "seconds": time.time() - start,
+        "members": members,
+        "labels": labels,
+    }
+
+
+class BatchCommunityDetection:
+    """
+    The BatchCommunityDetection class detects the communities of many daily
+    snapshots in a process pool, every worker loading its own day, and writes
+    each result to a CommunityStore as soon as it completes. Days already in
+    the store for the same algorithm and parameters are skipped, so an
+    interrupted run resumes where it stopped.
+    """
+    def __init__(self, data_dir, store_path, algorithm="louvain", params=None, max_workers=None):
+        """
+        Initialize a BatchCommunityDetection object.
+
+        Parameters:
+        data_dir (str): The directory of the YYYY-M-D.csv files.
+        store_path (str): The path of the SQLite results file.
+        algorithm (str): Either "louvain" or "girvan_newman".
+        params (dict): The keyword arguments of the community detection, e.g. {"resolution": 1.0, "random_state": 42}.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError("algorithm must be one of {}".format(", ".join(ALGORITHMS)))
+
+        self.data_dir = data_dir
+        self.store = CommunityStore(store_path)
+        self.algorithm = algorithm
+        self.params = params or {}
+        self.max_workers = max_workers
+
+    def get_files(self):
+        """
+        Get the daily files of the data directory.
+
+        Returns:
+        dict: The path of each day, as YYYY-MM-DD, in chronological order.
+        """
+        files = {}
+        for filename in glob.glob(os.path.join(self.data_dir, "*.csv")):
+            date = pd.to_datetime(os.path.basename(filename).split(".")[0], format="%Y-%m-%d")
+            files[date.strftime("%Y-%m-%d")] = filename
+        return dict(sorted(files.items()))
+
+    def get_missing_days(self, days=None):
+        """
+        Get the days that are not in the store yet.
+
+        Parameters:
+        days (list): The days to consider. Defaults to every day of the data directory.
+
+        Returns:
+        list: The missing days, as YYYY-MM-DD strings.
+        """
+        files = self.get_files()
+        days = files if days is None else [pd.Timestamp(day).strftime("%Y-%m-%d") for day in days]
+        done = self.store.get_days(self.algorithm, self.params)
+        return [day for day in days if day not in done and day in files]
+
+    def run(self, days=None, verbose=True):
+        """
+        Detect the communities of the missing days.
+
+        Parameters:
+        days (list): The days to process. Defaults to every day of the data directory.
+        verbose (bool): Whether to print the progress.
+
+        Returns:
+        pd.DataFrame: The stored summary of the requested days.
+        """
+        files = self.get_files()
+        missing = self.get_missing_days(days)
+        start = time.time()
+
+        if self.max_workers == 1:
+            for i, day in enumerate(missing):
+                self._store(detect_communities(files[day], day, self.algorithm, self.params), i, len(missing), verbose)
+        elif missing:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(detect_communities, files[day], day, self.algorithm, self.params) for day in missing]
+                for i, future in enumerate(as_completed(futures)):
+                    self._store(future.result(), i, len(missing), verbose)
+
+        if verbose:
+            print("processed {} days in {:.1f}s".format(len(missing), time.time() - start))
+
+        summary = self.store.to_frame(self.algorithm, self.params)
+        if days is not None:
+            summary = summary[summary["day"].isin(pd.to_datetime(list(days)))]
+        return summary.reset_index(drop=True)
+
+    def _store(self, result, i, total, verbose):
+        self.store.put(result)
+        if verbose:
+            print("{}/{} {}: {} communities, modularity {:.3f}, {:.1f}s".format(
+                i + 1, total, result["day"], result["nb_communities"], result["modularity"], result["seconds"]
+            ))
@@ -0,0 +1,284 @@
+import scipy.sparse as sp
+import pandas as pd
+import numpy as np
+
+
+def _transition_weights(adjacency):
+    """
+    Row-normalize an adjacency matrix, returning the transition matrix and the dangling nodes mask.
+    """
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros_like(out_weight), where=~dangling)
+    return sp.diags(inverse) @ adjacency, dangling
+
+
+def pagerank(adjacency, alpha=0.85, personalization=None, x0=None, tol=1.0e-6, max_iter=100):
+    """
+    Compute the weighted PageRank of a graph by power iteration, with the same
+    conventions as networkx.pagerank: the mass of dangling nodes is
+    redistributed along the personalization vector.
+
+    Parameters:
+    adjacency (scipy.sparse matrix): The weighted adjacency matrix.
+    alpha (float): The damping factor.
+    personalization (np.ndarray): The teleportation distribution. Defaults to uniform.
+    x0 (np.ndarray): The starting vector, e.g. the scores of the previous day. Defaults to uniform.
+    tol (float): The convergence tolerance on the L1 change, per node.
+    max_iter (int): The maximum number of iterations.
+
+    Returns:
+    tuple: The PageRank vector and the number of iterations run.
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+
+    transition, dangling = _transition_weights(sp.csr_matrix(adjacency, dtype=np.float64))
+    transition_t = transition.T.tocsr()
+
+    v = np.full(n, 1.0 / n) if personalization is None else personalization / personalization.sum()
+    x = np.full(n, 1.0 / n) if x0 is None else x0 / x0.sum()
+
+    for iteration in range(1, max_iter + 1):
+        previous = x
+        x = alpha * (transition_t @ x) + (alpha * x[dangling].sum() + 1 - alpha) * v
+        if np.abs(x - previous).sum() < n * tol:
+            break
+
+    return x, iteration
+
+
+def hits(adjacency, x0=None, tol=1.0e-8, max_iter=100):
+    """
+    Compute the weighted HITS hub and authority scores of a graph by power iteration.
+
+    Parameters:
+    adjacency (scipy.sparse matrix): The weighted adjacency matrix.
+    x0 (np.ndarray): The starting hub vector. Defaults to uniform.
+    tol (float): The convergence tolerance on the L1 change, per node.
+    max_iter (int): The maximum number of iterations.
+
+    Returns:
+    tuple: The hub and authority vectors, each summing to one, and the number of iterations run.
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0), np.zeros(0), 0
+
+    adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+    adjacency_t = adjacency.T.tocsr()
+    hubs = np.full(n, 1.0 / n) if x0 is None else x0 / x0.sum()
+
+    for iteration in range(1, max_iter + 1):
+        previous = hubs
+        authorities = adjacency_t @ hubs
+        authorities /= authorities.sum() or 1.0
+        hubs = adjacency @ authorities
+        hubs /= hubs.sum() or 1.0
+        if np.abs(hubs - previous).sum() < n * tol:
+            break
+
+    return hubs, authorities, iteration
+
+
+def approximate_betweenness(adjacency, nb_samples=64, seed=None, normalized=True, batch_size=64):
+    """
+    Approximate the betweenness centrality of a directed graph with Brandes'
+    algorithm run from a random sample of source nodes. Shortest paths are
+    counted in hops, and the sources of a batch are explored together as the
+    columns of a dense matrix, one sparse product per BFS level.
+
+    Parameters:
+    adjacency (scipy.sparse matrix): The adjacency matrix, whose weights are ignored.
+    nb_samples (int): The number of sampled sources. Every node is used when it exceeds the number of nodes.
+    seed (int): The seed of the source sampling.
+    normalized (bool): Whether to normalize by (n - 1)(n - 2), as networkx does.
+    batch_size (int): The number of sources explored together.
+
+    Returns:
+    np.ndarray: The betweenness of each node.
+    """
+    n = adjacency.shape[0]
+    betweenness = np.zeros(n)
+    if n < 3:
+        return betweenness
+
+    pattern = sp.csr_matrix(adjacency, dtype=np.float64)
+    pattern.data[:] = 1.0
+    pattern_t = pattern.T.tocsr()
+
+    if nb_samples >= n:
+        sources = np.arange(n)
+    else:
+        sources = np.random.default_rng(seed).choice(n, nb_samples, replace=False)
+
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start:start + batch_size]
+        columns = np.arange(len(batch))
+
+        sigma = np.zeros((n, len(batch)))
+        sigma[batch, columns] = 1.0
+        distance = np.full((n, len(batch)), -1)
+        distance[batch, columns] = 0
+
+        # forward pass: count the shortest paths level by level
+        frontier = sigma.copy()
+        level = 0
+        while frontier.any():
+            level += 1
+            paths = pattern_t @ frontier
+            reached = (paths > 0) & (distance < 0)
+            distance[reached] = level
+            sigma[reached] = paths[reached]
+            frontier = np.where(reached, sigma, 0.0)
+
+        # backward pass: accumulate the dependencies from the deepest level
+        delta = np.zeros_like(sigma)
+        for depth in range(level - 1, 0, -1):
+            successors = np.where(distance == depth + 1, (1.0 + delta) / np.where(sigma > 0, sigma, 1.0), 0.0)
+            delta += np.where(distance == depth, sigma * (pattern @ successors), 0.0)
+
+        betweenness += delta.sum(axis=1)
+
+    betweenness *= n / len(sources)
+    if normalized:
+        betweenness /= (n - 1) * (n - 2)
+    return betweenness
+
+
+class CentralityEngine:
+    """
+    The CentralityEngine class computes centrality scores of every actor on
+    every daily network of an EdgeTable, each day being restricted to its
+    active actors. The iterative measures are warm-started from the scores of
+    the previous day, which usually differ little.
+    """
+    def __init__(self, edges, weight="value"):
+        """
+        Initialize a CentralityEngine object.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        weight (str): The edge weight, either "value", "nb_transactions" or None.
+        """
+        self.edges = edges
+        self.weight = weight
+        self.iterations = None
+
+    def _get_days(self, days):
+        if days is None:
+            return np.arange(self.edges.nb_days)
+        return np.array([self.edges.get_day_index(day) for day in days])
+
+    def _day_graph(self, day):
+        nodes = self.edges.get_active_actors(day)
+        return nodes, self.edges.get_adjacency(day, weight=self.weight, nodes=nodes)
+
+    @staticmethod
+    def _warm_start(previous, nodes):
+        x0 = previous[nodes]
+        x0[np.isnan(x0)] = np.nanmean(x0) if not np.isnan(x0).all() else 1.0
+        return x0
+
+    def _to_frame(self, scores, days):
+        return pd.DataFrame(scores, index=pd.Index(self.edges.actors.names, name="actor"), columns=self.edges.dates[days])
+
+    def pagerank(self, days=None, alpha=0.85, warm_start=True, tol=1.0e-6, max_iter=100):
+        """
+        Compute the daily PageRank of every actor.
+
+        Parameters:
+        days (list): The days (indices or dates) to compute. Defaults to every day.
+        alpha (float): The damping factor.
+        warm_start (bool): Whether to start each day from the scores of the previous one.
+        tol (float): The convergence tolerance.
+        max_iter (int): The maximum number of iterations per day.
+
+        Returns:
+        pd.DataFrame: An actor × day matrix of scores, NaN where the actor is inactive.
+        """
+        days = self._get_days(days)
+        scores = np.full((self.edges.nb_actors, len(days)), np.nan)
+        previous = np.full(self.edges.nb_actors, np.nan)
+        iterations = []
+
+        for column, day in enumerate(days):
+            nodes, adjacency = self._day_graph(day)
+            x0 = self._warm_start(previous, nodes) if warm_start else None
+            x, nb_iterations = pagerank(adjacency, alpha, x0=x0, tol=tol, max_iter=max_iter)
+            scores[nodes, column] = x
+            previous[nodes] = x
+            iterations.append(nb_iterations)
+
+        self.iterations = pd.Series(iterations, index=self.edges.dates[days], name="iterations")
+        return self._to_frame(scores, days)
+
+    def hits(self, days=None, warm_start=True, tol=1.0e-8, max_iter=100):
+        """
+        Compute the daily HITS hub and authority scores of every actor.
+
+        Parameters:
+        days (list): The days (indices or dates) to compute. Defaults to every day.
+        warm_start (bool): Whether to start each day from the hub scores of the previous one.
+        tol (float): The convergence tolerance.
+        max_iter (int): The maximum number of iterations per day.
+
+        Returns:
+        tuple: The actor × day matrices of the hub and authority scores.
+        """
+        days = self._get_days(days)
+        hub_scores = np.full((self.edges.nb_actors, len(days)), np.nan)
+        authority_scores = np.full((self.edges.nb_actors, len(days)), np.nan)
+        previous = np.full(self.edges.nb_actors, np.nan)
+        iterations = []
+
+        for column, day in enumerate(days):
+            nodes, adjacency = self._day_graph(day)
+            x0 = self._warm_start(previous, nodes) if warm_start else None
+            hubs, authorities, nb_iterations = hits(adjacency, x0=x0, tol=tol, max_iter=max_iter)
+            hub_scores[nodes, column] = hubs
+            authority_scores[nodes, column] = authorities
+            previous[nodes] = hubs
+            iterations.append(nb_iterations)
+
+        self.iterations = pd.Series(iterations, index=self.edges.dates[days], name="iterations")
+        return self._to_frame(hub_scores, days), self._to_frame(authority_scores, days)
+
+    def betweenness(self, days=None, nb_samples=64, seed=None):
+        """
+        Compute the daily approximate betweenness of every actor.
+
+        Parameters:
+        days (list): The days (indices or dates) to compute. Defaults to every day.
+        nb_samples (int): The number of sampled sources per day.
+        seed (int): The seed of the source sampling, offset by the day index.
+
+        Returns:
+        pd.DataFrame: An actor × day matrix of scores, NaN where the actor is inactive.
+        """
+        days = self._get_days(days)
+        scores = np.full((self.edges.nb_actors, len(days)), np.nan)
+
+        for column, day in enumerate(days):
+            nodes, adjacency = self._day_graph(day)
+            day_seed = None if seed is None else seed + int(day)
+            scores[nodes, column] = approximate_betweenness(adjacency, nb_samples, day_seed)
+
+        return self._to_frame(scores, days)
+
+    @staticmethod
+    def get_top_actors(scores, k=10):
+        """
+        Get the k actors with the highest score of each day.
+
+        Parameters:
+        scores (pd.DataFrame): An actor × day matrix of scores.
+        k (int): The number of actors.
+
+        Returns:
+        pd.DataFrame: A day × rank matrix of actor names.
+        """
+        values = np.nan_to_num(scores.values, nan=-np.inf)
+        top = np.argsort(-values, axis=0, kind="stable")[:k]
+        return pd.DataFrame(scores.index.values[top].T, index=scores.columns, columns=range(1, k + 1))
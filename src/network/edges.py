@@ -0,0 +1,294 @@
+import scipy.sparse as sp
+import pandas as pd
+import numpy as np
+import glob
+import os
+
+
+class ActorIndex:
+    """
+    The ActorIndex class maps actor names to dense integer ids, shared by every
+    array-backed structure built over the daily networks.
+    """
+    def __init__(self, names):
+        """
+        Initialize an ActorIndex object.
+
+        Parameters:
+        names (array-like): The actor names, in id order.
+        """
+        self.names = np.asarray(names, dtype=object)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def get_id(self, name):
+        """
+        Get the id of an actor.
+
+        Parameters:
+        name (str): The name of the actor.
+
+        Returns:
+        int: The id of the actor.
+        """
+        try:
+            return self._ids[name]
+        except KeyError:
+            raise KeyError("Unknown actor {}".format(name)) from None
+
+    def get_ids(self, names):
+        """
+        Get the ids of several actors.
+
+        Parameters:
+        names (list): The names of the actors.
+
+        Returns:
+        np.ndarray: The ids of the actors.
+        """
+        return np.array([self.get_id(name) for name in names], dtype=np.int64)
+
+    def get_names(self, ids):
+        """
+        Get the names of several actors.
+
+        Parameters:
+        ids (array-like): The ids of the actors.
+
+        Returns:
+        np.ndarray: The names of the actors.
+        """
+        return self.names[np.asarray(ids, dtype=np.int64)]
+
+
+class EdgeTable:
+    """
+    The EdgeTable class holds every daily network as flat columnar arrays
+    (source id, target id, value, number of transactions, day), sorted by day,
+    so that the edges of any day or day range are a contiguous slice and sparse
+    adjacency matrices can be built without going through networkx.
+    """
+    def __init__(self, actors, dates, src, dst, value, nb_transactions, day):
+        """
+        Initialize an EdgeTable object.
+
+        Parameters:
+        actors (ActorIndex): The actor vocabulary.
+        dates (pd.DatetimeIndex): The dates of the days, in order.
+        src (np.ndarray): The source actor id of each edge.
+        dst (np.ndarray): The target actor id of each edge.
+        value (np.ndarray): The value of each edge, in satoshi.
+        nb_transactions (np.ndarray): The number of transactions of each edge.
+        day (np.ndarray): The day index of each edge.
+        """
+        order = np.lexsort((dst, src, day))
+
+        self.actors = actors
+        self.dates = pd.DatetimeIndex(dates)
+        self.src = np.ascontiguousarray(src[order], dtype=np.int32)
+        self.dst = np.ascontiguousarray(dst[order], dtype=np.int32)
+        self.value = np.ascontiguousarray(value[order], dtype=np.float64)
+        self.nb_transactions = np.ascontiguousarray(nb_transactions[order], dtype=np.int64)
+        self.day = np.ascontiguousarray(day[order], dtype=np.int32)
+
+        self.day_offsets = np.searchsorted(self.day, np.arange(len(self.dates) + 1))
+
+    def __len__(self):
+        return len(self.src)
+
+    @property
+    def nb_actors(self):
+        return len(self.actors)
+
+    @property
+    def nb_days(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build an EdgeTable from a DataFrame of edges.
+
+        Parameters:
+        df (pd.DataFrame): The edges, with the Source, Target, value, nb_transactions and date columns.
+
+        Returns:
+        EdgeTable: The edge table.
+        """
+        codes, names = pd.factorize(pd.concat([df["Source"], df["Target"]], ignore_index=True).astype(str), sort=True)
+        day, dates = pd.factorize(pd.to_datetime(df["date"]), sort=True)
+
+        return cls(
+            ActorIndex(names),
+            dates,
+            codes[:len(df)],
+            codes[len(df):],
+            df["value"].values,
+            df["nb_transactions"].values,
+            day,
+        )
+
+    @classmethod
+    def from_dir(cls, data_dir, cache_path=None):
+        """
+        Load every daily network CSV file of a directory into an EdgeTable.
+
+        Parameters:
+        data_dir (str): The directory of the YYYY-M-D.csv files.
+        cache_path (str): An optional .npz file the table is saved to, and loaded from when it exists.
+
+        Returns:
+        EdgeTable: The edge table.
+        """
+        if cache_path is not None and os.path.exists(cache_path):
+            return cls.load(cache_path)
+
+        frames = []
+        for filename in glob.glob(os.path.join(data_dir, "*.csv")):
+            df = pd.read_csv(filename, dtype={"Source": str, "Target": str})
+            df["date"] = pd.to_datetime(os.path.basename(filename).split(".")[0], format="%Y-%m-%d")
+            frames.append(df)
+
+        edges = cls.from_frame(pd.concat(frames, ignore_index=True))
+        if cache_path is not None:
+            edges.save(cache_path)
+        return edges
+
+    def save(self, path):
+        """
+        Save the edge table as an uncompressed .npz file.
+
+        Parameters:
+        path (str): The path of the file.
+        """
+        np.savez(
+            path,
+            names=self.actors.names.astype(str),
+            dates=self.dates.values.astype("datetime64[D]"),
+            src=self.src,
+            dst=self.dst,
+            value=self.value,
+            nb_transactions=self.nb_transactions,
+            day=self.day,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an edge table saved with save.
+
+        Parameters:
+        path (str): The path of the file.
+
+        Returns:
+        EdgeTable: The edge table.
+        """
+        with np.load(path) as data:
+            return cls(
+                ActorIndex(data["names"].astype(object)),
+                pd.DatetimeIndex(data["dates"]),
+                data["src"],
+                data["dst"],
+                data["value"],
+                data["nb_transactions"],
+                data["day"],
+            )
+
+    def get_day_index(self, day):
+        """
+        Get the index of a day.
+
+        Parameters:
+        day (int, str or datetime): The day index or date.
+
+        Returns:
+        int: The day index.
+        """
+        if isinstance(day, (int, np.integer)):
+            return int(day)
+        return self.dates.get_loc(pd.Timestamp(day))
+
+    def get_day_slice(self, start, end=None):
+        """
+        Get the positions of the edges of a day range.
+
+        Parameters:
+        start (int, str or datetime): The first day.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+
+        Returns:
+        slice: The positions of the edges in the columns of the table.
+        """
+        start = self.get_day_index(start)
+        end = self.get_day_index(end) if end is not None else start
+        return slice(self.day_offsets[start], self.day_offsets[end + 1])
+
+    def get_active_actors(self, start, end=None):
+        """
+        Get the ids of the actors sending or receiving on a day range.
+
+        Parameters:
+        start (int, str or datetime): The first day.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+
+        Returns:
+        np.ndarray: The sorted actor ids.
+        """
+        edges = self.get_day_slice(start, end)
+        return np.union1d(self.src[edges], self.dst[edges])
+
+    def get_adjacency(self, start=None, end=None, weight="value", nodes=None):
+        """
+        Build the sparse adjacency matrix of a day range, where the entry (i, j)
+        sums the weights of the edges from i to j.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the whole table.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+        weight (str): Either "value", "nb_transactions" or None for the number of daily edges.
+        nodes (np.ndarray): Actor ids the matrix is restricted to, indexed by their position.
+            Defaults to every actor.
+
+        Returns:
+        scipy.sparse.csr_matrix: The adjacency matrix.
+        """
+        edges = self.get_day_slice(start, end) if start is not None else slice(None)
+        src, dst = self.src[edges], self.dst[edges]
+        data = np.ones(len(src)) if weight is None else getattr(self, weight)[edges].astype(np.float64)
+
+        if nodes is None:
+            size = self.nb_actors
+        else:
+            size = len(nodes)
+            position = np.full(self.nb_actors, -1)
+            position[nodes] = np.arange(size)
+            src, dst = position[src], position[dst]
+            inside = (src >= 0) & (dst >= 0)
+            src, dst, data = src[inside], dst[inside], data[inside]
+
+        return sp.csr_matrix((data, (src, dst)), shape=(size, size))
+
+    def to_frame(self, start=None, end=None):
+        """
+        Get the edges of a day range as a DataFrame with the columns of the CSV files.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the whole table.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+
+        Returns:
+        pd.DataFrame: The edges.
+        """
+        edges = self.get_day_slice(start, end) if start is not None else slice(None)
+        return pd.DataFrame({
+            "Source": self.actors.get_names(self.src[edges]),
+            "Target": self.actors.get_names(self.dst[edges]),
+            "value": self.value[edges],
+            "nb_transactions": self.nb_transactions[edges],
+            "date": self.dates[self.day[edges]],
+        })
@@ -1,9 +1,12 @@
+from network.rendering import GraphRenderer
+from network.paths import PathQueryEngine
 import matplotlib.pyplot as plt
 import networkx as nx
 
 class Graph:
     def __init__(self):
         self._graph = nx.DiGraph()
+        self._path_engine = None
 
     def add_actor(self, actor):
         """
@@ -13,6 +16,7 @@ class Graph:
         actor (Actor): The actor to add to the graph.
         """
         self._graph.add_node(actor.name)
+        self._path_engine = None
 
     def add_transaction(self, transaction):
         """
@@ -28,6 +32,7 @@ class Graph:
             nb_transactions=transaction.nb_transactions,
             date=transaction.date,
         )
+        self._path_engine = None
     
     def get_actor_neighbors(self, actor_name):
         """
@@ -65,6 +70,18 @@ class Graph:
         """
         return self._graph.out_degree(actor_name)
 
+    def get_path_engine(self):
+        """
+        Get the path query engine of the graph, built on first use and
+        rebuilt after the graph changes.
+        
+        Returns:
+        PathQueryEngine: The path query engine.
+        """
+        if self._path_engine is None:
+            self._path_engine = PathQueryEngine.from_graph(self._graph)
+        return self._path_engine
+
     def get_shortest_path(self, source_actor, target_actor):
         """
         Find the shortest path between two actors.
@@ -76,10 +93,40 @@ class Graph:
         Returns:
         list: List of actor names representing the shortest path.
         """
-        try:
-            return nx.shortest_path(self._graph, source_actor, target_actor)
-        except nx.NetworkXNoPath:
-            return None
+        return self.get_shortest_paths([(source_actor, target_actor)])[0]
+
+    def get_shortest_paths(self, pairs):
+        """
+        Find the shortest paths of many actor pairs at once.
+        
+        Parameters:
+        pairs (list): List of (source name, target name) pairs.
+        
+        Returns:
+        list: The list of actor names of each path, or None when there is no path.
+        """
+        for pair in pairs:
+            for actor_name in pair:
+                if actor_name not in self._graph:
+                    raise nx.NodeNotFound("Actor {} is not in the graph".format(actor_name))
+
+        return self.get_path_engine().get_shortest_paths(pairs)
+
+    def get_distance_matrix(self, actor_names=None, top_n=None):
+        """
+        Get the hop distances between actors.
+        
+        Parameters:
+        actor_names (list): Names of the actors.
+        top_n (int): When no names are given, the number of most connected actors to use.
+        
+        Returns:
+        pd.DataFrame: An actor × actor matrix of hop distances, inf when unreachable.
+        """
+        engine = self.get_path_engine()
+        if actor_names is None:
+            return engine.get_top_distance_matrix(top_n or 10)
+        return engine.get_distance_matrix(actor_names)
         
     def get_subgraph(self, actor_names):
         """
@@ -167,7 +214,30 @@ class Graph:
         """
         return self._graph
 
-    def plot_graph(self):
-        pos = nx.spring_layout(self._graph)
-        nx.draw(self._graph, pos, with_labels=True, node_color='skyblue', font_size=8, font_color='black')
+    def plot_graph(self, max_nodes=500, partition=None, top_k=None, expanded=(), layout_cache=None, key=None):
+        """
+        Plot the graph. Graphs larger than max_nodes, or given a partition or
+        top_k, are drawn at a lower level of detail with a GraphRenderer.
+        
+        Parameters:
+        max_nodes (int): The largest graph drawn in full with networkx.
+        partition (dict or list): The communities the actors are collapsed into.
+        top_k (int): The number of actors by volume kept as such. Defaults to 100 without a partition.
+        expanded (iterable): The communities drawn with their members.
+        layout_cache (LayoutCache): The layout cache shared across snapshots.
+        key (hashable): The key of the snapshot in the layout cache, e.g. its date.
+        """
+        if self._graph.number_of_nodes() <= max_nodes and partition is None and top_k is None:
+            pos = nx.spring_layout(self._graph)
+            nx.draw(self._graph, pos, with_labels=True, node_color='skyblue', font_size=8, font_color='black')
+            plt.show()
+            return
+
+        if partition is None and top_k is None:
+            top_k = 100
+
+        renderer = GraphRenderer(self, partition, layout_cache)
+        for community in expanded:
+            renderer.expand(community)
+        renderer.draw(key=key, top_k=top_k)
         plt.show()
\ No newline at end of file
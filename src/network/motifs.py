@@ -0,0 +1,209 @@
+import pandas as pd
+import numpy as np
+
+
+def _expand_ranges(starts, counts):
+    """
+    Concatenate the ranges [start, start + count) without a Python loop.
+
+    Returns:
+    tuple: The index of the range of each position and the positions.
+    """
+    total = counts.sum()
+    owners = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, starts[owners] + offsets
+
+
+class MotifFinder:
+    """
+    The MotifFinder class finds self-spends and directed cycles (round trips
+    A → B → A, triangles A → B → C → A and longer ones) in the daily networks
+    of an EdgeTable. A cycle is time-respecting: its edges happen on
+    non-decreasing days, all within `window` days of the first one, so a
+    window of 0 only finds cycles closed within a single day.
+
+    Cycles are grown from every edge of a start day by joining paths with the
+    outgoing edges of their last actor, through sorted adjacency arrays and
+    range expansions, and closed with a binary search of the returning edge
+    on sorted (source, target, day) keys.
+    """
+    def __init__(self, edges, chunk_size=20000):
+        """
+        Initialize a MotifFinder object.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        chunk_size (int): The number of start edges whose paths are grown together.
+        """
+        self.edges = edges
+        self.chunk_size = chunk_size
+
+    def _get_days(self, days):
+        if days is None:
+            return range(self.edges.nb_days)
+        return [self.edges.get_day_index(day) for day in days]
+
+    def get_self_loops(self, days=None):
+        """
+        Get the self-spends, i.e. the edges from an actor to itself.
+
+        Parameters:
+        days (list): The days (indices or dates). Defaults to every day.
+
+        Returns:
+        pd.DataFrame: The date, actor, value and nb_transactions of each self-spend.
+        """
+        mask = np.zeros(len(self.edges), dtype=bool)
+        for day in self._get_days(days):
+            edges = self.edges.get_day_slice(day)
+            mask[edges] = self.edges.src[edges] == self.edges.dst[edges]
+
+        return pd.DataFrame({
+            "date": self.edges.dates[self.edges.day[mask]],
+            "actor": self.edges.actors.get_names(self.edges.src[mask]),
+            "value": self.edges.value[mask],
+            "nb_transactions": self.edges.nb_transactions[mask],
+        })
+
+    def _find_day_cycles(self, day, max_length, window, min_value):
+        """
+        Find the cycles whose first edge is on the given day.
+        """
+        n = self.edges.nb_actors
+        last_day = min(day + window, self.edges.nb_days - 1)
+        edges = self.edges.get_day_slice(day, last_day)
+        src = self.edges.src[edges].astype(np.int64)
+        dst = self.edges.dst[edges].astype(np.int64)
+        edge_day = self.edges.day[edges].astype(np.int64) - day
+        value = self.edges.value[edges]
+
+        keep = (src != dst) & (value >= min_value)
+        src, dst, edge_day, value = src[keep], dst[keep], edge_day[keep], value[keep]
+
+        # adjacency sorted by source then day, for the path extensions
+        by_source = np.lexsort((edge_day, src))
+        source_sorted = src[by_source]
+
+        # (source, target, day) keys, for the closing edges
+        span = window + 1
+        keys = (src * n + dst) * span + edge_day
+        by_key = np.argsort(keys, kind="stable")
+        sorted_keys = keys[by_key]
+
+        starts = np.flatnonzero(edge_day == 0)
+        cycles = []
+        # grow the paths of a bounded number of start edges at a time, to bound the memory
+        for chunk in range(0, len(starts), self.chunk_size):
+            start = starts[chunk:chunk + self.chunk_size]
+            nodes = np.stack([src[start], dst[start]], axis=1)
+            path_day = edge_day[start]
+            path_value = value[start]
+
+            for length in range(2, max_length + 1):
+                if len(nodes) == 0:
+                    break
+
+                # close the paths with an edge back to their origin, on a day >= the last one
+                origin, current = nodes[:, 0], nodes[:, -1]
+                pair = (current * n + origin) * span
+                low = np.searchsorted(sorted_keys, pair + path_day, side="left")
+                high = np.searchsorted(sorted_keys, pair + window, side="right")
+                closed = high > low
+
+                # cycles closed on the start day are found from each of their actors,
+                # keep the rotation starting from the smallest id, unless a later closing edge exists
+                same_day = np.zeros(len(nodes), dtype=bool)
+                same_day[closed] = (sorted_keys[low[closed]] - pair[closed]) == 0
+                later = np.searchsorted(sorted_keys, pair + 1, side="left")
+                canonical = origin == nodes.min(axis=1)
+                use_later = closed & same_day & ~canonical & (high > later)
+                low[use_later] = later[use_later]
+                closed &= ~same_day | canonical | use_later
+
+                if closed.any():
+                    closing = by_key[low[closed]]
+                    cycles.append(pd.DataFrame({
+                        "day": day,
+                        "end_day": day + edge_day[closing],
+                        "length": length,
+                        "actors": list(map(tuple, nodes[closed])),
+                        "volume": np.minimum(path_value[closed], value[closing]),
+                    }))
+
+                if length == max_length:
+                    break
+
+                # extend the paths with the outgoing edges of their last actor
+                first = np.searchsorted(source_sorted, current, side="left")
+                last = np.searchsorted(source_sorted, current, side="right")
+                owners, positions = _expand_ranges(first, last - first)
+                candidates = by_source[positions]
+
+                valid = edge_day[candidates] >= path_day[owners]
+                next_node = dst[candidates]
+                valid &= ~(nodes[owners] == next_node[:, None]).any(axis=1)
+                owners, candidates = owners[valid], candidates[valid]
+
+                nodes = np.concatenate([nodes[owners], dst[candidates][:, None]], axis=1)
+                path_day = edge_day[candidates]
+                path_value = np.minimum(path_value[owners], value[candidates])
+
+        return cycles
+
+    def find_cycles(self, max_length=3, window=0, days=None, min_value=0):
+        """
+        Find the time-respecting directed cycles of up to max_length actors.
+
+        Each path is reported once, closed with its earliest returning edge: when
+        several edges within the window close the same path, the later ones are not
+        reported. A cycle whose edges are all on its first day is reported once, from
+        the rotation starting at its smallest actor id.
+
+        Parameters:
+        max_length (int): The largest number of edges of a cycle, 2 for round trips only.
+        window (int): The number of days a cycle may span after its first edge.
+        days (list): The days (indices or dates) of the first edges. Defaults to every day.
+        min_value (float): The smallest edge value followed.
+
+        Returns:
+        pd.DataFrame: The start and end date, length, actors (in order) and volume of
+            each cycle, the volume being the smallest edge value along the cycle.
+        """
+        if max_length < 2:
+            raise ValueError("max_length must be at least 2")
+
+        frames = []
+        for day in self._get_days(days):
+            frames.extend(self._find_day_cycles(day, max_length, window, min_value))
+
+        columns = ["date", "end_date", "length", "actors", "volume"]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+
+        cycles = pd.concat(frames, ignore_index=True)
+        cycles["date"] = self.edges.dates[cycles["day"].values]
+        cycles["end_date"] = self.edges.dates[cycles["end_day"].values]
+        cycles["actors"] = [tuple(self.edges.actors.get_names(list(actors))) for actors in cycles["actors"]]
+        return cycles[columns]
+
+    def get_actor_motifs(self, max_length=3, window=0, days=None, min_value=0):
+        """
+        Count the cycles each actor takes part in, per day and cycle length.
+
+        Parameters:
+        max_length (int): The largest number of edges of a cycle.
+        window (int): The number of days a cycle may span after its first edge.
+        days (list): The days (indices or dates) of the first edges. Defaults to every day.
+        min_value (float): The smallest edge value followed.
+
+        Returns:
+        pd.DataFrame: The number of cycles and their volume, indexed by the
+            date of their first edge, the actor and the cycle length.
+        """
+        cycles = self.find_cycles(max_length, window, days, min_value)
+        participations = cycles.explode("actors").rename(columns={"actors": "actor"})
+        return participations.groupby(["date", "actor", "length"]).agg(
+            nb_cycles=("volume", "size"),
+            volume=("volume", "sum"),
+        )
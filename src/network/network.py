@@ -1,9 +1,14 @@
 from networkx.algorithms.community import greedy_modularity_communities
 import community as community_louvain
 from network.community import Community
+from network.utils import build_actors
 import matplotlib.pyplot as plt
 from network.graph import Graph
+from network.quotient import labels_from_communities, quotient_flows, quotient_graph
+from network.rollups import RESOLUTIONS
 import networkx as nx    
+import pandas as pd
+import numpy as np
 import tabulate
 from tabulate import tabulate
 
@@ -12,6 +17,28 @@ class Network(Graph):
         super().__init__()
         self.actors = actors
         self.communities = []
+
+    @classmethod
+    def from_rollup(cls, rollups, resolution, period):
+        """
+        Build the network of a week, month or quarter from precomputed rollups,
+        without reading the daily files. The transactions are dated with the
+        start of the period.
+        
+        Parameters:
+        rollups (EdgeRollups): The edge rollups.
+        resolution (str): Either "week", "month" or "quarter".
+        period (str, datetime or pd.Period): The period, or any date inside it.
+        
+        Returns:
+        Network: The constructed network.
+        """
+        edges = rollups.get(resolution, period)
+        start = pd.Period(period, freq=RESOLUTIONS[resolution]).start_time
+
+        network = cls(build_actors(edges, start))
+        network.construct_network()
+        return network
     
     def construct_network(self):
         for actor in self.actors:
@@ -21,12 +48,12 @@ class Network(Graph):
             for transaction in actor.transactions:
                 self.add_transaction(transaction)
                 
-    def process_communities_girvan_newman(self):
-        self.communities = list(greedy_modularity_communities(self._graph))
+    def process_communities_girvan_newman(self, resolution=1):
+        self.communities = list(greedy_modularity_communities(self._graph, resolution=resolution))
                 
-    def process_communities_louvain(self):
+    def process_communities_louvain(self, resolution=1.0, random_state=None):
         undirected_graph = self._graph.to_undirected()
-        partition = community_louvain.best_partition(undirected_graph)
+        partition = community_louvain.best_partition(undirected_graph, resolution=resolution, random_state=random_state)
         self.communities = [[node for node, com_id in partition.items() if com_id == community_id] for community_id in set(partition.values())]
 
     def get_communities(self):
@@ -72,6 +99,43 @@ class Network(Graph):
         
         return community_graph_instance
         
+    def get_community_flows(self):
+        """
+        Get the value and number of transactions flowing between the communities,
+        computed as sparse quotient products instead of looping over the transactions.
+        The transactions of the actors are summed, not the edges of the graph, which
+        only keep the last transaction of each pair when the network spans several days.
+        
+        Returns:
+        tuple: The community × community value and transaction count matrices,
+        indexed as get_communities.
+        """
+        transactions = [transaction for actor in self.actors for transaction in actor.transactions]
+        names = list(dict.fromkeys(
+            [actor.name for actor in self.actors]
+            + [name for transaction in transactions for name in (transaction.source.name, transaction.target.name)]
+        ))
+        positions = {name: i for i, name in enumerate(names)}
+
+        src = np.array([positions[transaction.source.name] for transaction in transactions], dtype=np.int64)
+        dst = np.array([positions[transaction.target.name] for transaction in transactions], dtype=np.int64)
+        value = np.array([transaction.value for transaction in transactions], dtype=np.float64)
+        nb_transactions = np.array([transaction.nb_transactions for transaction in transactions], dtype=np.float64)
+
+        labels = labels_from_communities(names, self.communities)
+        return quotient_flows(src, dst, value, nb_transactions, labels, len(self.communities))
+
+    def get_quotient_graph(self):
+        """
+        Get the quotient graph of the network, whose nodes are the communities
+        and whose edges carry the value and number of transactions flowing between them.
+        
+        Returns:
+        Graph: The quotient graph, with nodes named "Community <id>" after get_communities.
+        """
+        value, nb_transactions = self.get_community_flows()
+        return quotient_graph(value, nb_transactions)
+
     def print_communities(self):
         """
         Print the communities.
@@ -0,0 +1,471 @@
+from network.rollups import RESOLUTIONS, EdgeRollups
+from network.edges import ActorIndex
+import pandas as pd
+import numpy as np
+import glob
+import json
+import os
+
+COLUMNS = {
+    "src": np.int32,
+    "dst": np.int32,
+    "value": np.float64,
+    "nb_transactions": np.int64,
+}
+
+
+def _aggregate_pairs(keys, value, nb_transactions, active_days):
+    """
+    Sum the values of the equal keys.
+    Returns the sorted distinct keys and their sums.
+    """
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.zeros(0, dtype=np.int64)
+    return (
+        keys[starts],
+        np.add.reduceat(value[order], starts) if len(keys) else value[:0],
+        np.add.reduceat(nb_transactions[order], starts) if len(keys) else nb_transactions[:0],
+        np.add.reduceat(active_days[order], starts) if len(keys) else active_days[:0],
+    )
+
+
+class MemmapEdgeStore:
+    """
+    The MemmapEdgeStore class keeps the daily edges in on-disk column files,
+    sorted by (day, source, target) like an EdgeTable, and memory-maps them
+    instead of loading them. Days are appended one at a time, so a store can
+    be built from far more daily files than fit in memory.
+
+    Every algorithm runs in chunked passes over the edges: each pass reads
+    whole days, about chunk_size edges at a time, and only keeps per-actor or
+    per-pair accumulators in memory.
+    """
+    def __init__(self, path, chunk_size=1 << 20):
+        """
+        Open a store, or create an empty one.
+
+        Parameters:
+        path (str): The directory of the store.
+        chunk_size (int): The number of edges read per chunk.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+            with open(self._names_path()) as file:
+                lines = file.read().splitlines()
+            self._names = lines[:meta["nb_actors"]]
+            if len(lines) > len(self._names):
+                # the names an interrupted append added are rewritten by the next one
+                self._write_atomic(self._names_path(), "".join(name + "\n" for name in self._names))
+        else:
+            meta = {"dates": [], "day_offsets": [0]}
+            self._names = []
+            for column in COLUMNS:
+                open(self._column_path(column), "wb").close()
+            open(self._names_path(), "w").close()
+
+        self._ids = {name: i for i, name in enumerate(self._names)}
+        self.dates = pd.DatetimeIndex(pd.to_datetime(meta["dates"]))
+        self.day_offsets = np.array(meta["day_offsets"], dtype=np.int64)
+
+        # drop what an interrupted append wrote after the last complete day
+        for column, dtype in COLUMNS.items():
+            size = int(self.day_offsets[-1]) * np.dtype(dtype).itemsize
+            if os.path.getsize(self._column_path(column)) > size:
+                os.truncate(self._column_path(column), size)
+        self._open()
+
+    def _column_path(self, column):
+        return os.path.join(self.path, column + ".bin")
+
+    def _names_path(self):
+        return os.path.join(self.path, "names.txt")
+
+    def _open(self):
+        """
+        Memory-map the column files.
+        """
+        self._columns = {}
+        for column, dtype in COLUMNS.items():
+            length = int(self.day_offsets[-1])
+            self._columns[column] = (
+                np.memmap(self._column_path(column), dtype=dtype, mode="r", shape=(length,))
+                if length else np.zeros(0, dtype=dtype)
+            )
+
+    @staticmethod
+    def _write_atomic(path, text):
+        """
+        Write a file through a temporary file, so that a crash leaves either the old or the new content.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+
+    def _save_meta(self):
+        self._write_atomic(os.path.join(self.path, "meta.json"), json.dumps({
+            "nb_actors": len(self._names),
+            "dates": [date.strftime("%Y-%m-%d") for date in self.dates],
+            "day_offsets": self.day_offsets.tolist(),
+        }))
+
+    def __len__(self):
+        return int(self.day_offsets[-1])
+
+    def __getattr__(self, name):
+        if name in COLUMNS and "_columns" in self.__dict__:
+            return self._columns[name]
+        raise AttributeError(name)
+
+    @property
+    def nb_actors(self):
+        return len(self._names)
+
+    @property
+    def nb_days(self):
+        return len(self.dates)
+
+    @property
+    def actors(self):
+        return ActorIndex(np.array(self._names, dtype=object))
+
+    def append_day(self, date, df):
+        """
+        Append the edges of a day after the last day of the store.
+
+        Parameters:
+        date (str or datetime): The date of the day.
+        df (pd.DataFrame): The edges, with the Source, Target, value and nb_transactions columns.
+        """
+        date = pd.Timestamp(date)
+        if self.nb_days and date <= self.dates[-1]:
+            raise ValueError("{} is not after the last day of the store, {}".format(date.date(), self.dates[-1].date()))
+
+        sources, targets = df["Source"].astype(str), df["Target"].astype(str)
+        new_names = [name for name in pd.unique(pd.concat([sources, targets], ignore_index=True)) if name not in self._ids]
+        for name in new_names:
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+        with open(self._names_path(), "a") as file:
+            file.writelines(name + "\n" for name in new_names)
+
+        src = sources.map(self._ids).values
+        dst = targets.map(self._ids).values
+        order = np.lexsort((dst, src))
+        arrays = {
+            "src": src[order],
+            "dst": dst[order],
+            "value": df["value"].values[order],
+            "nb_transactions": df["nb_transactions"].values[order],
+        }
+        for column, dtype in COLUMNS.items():
+            with open(self._column_path(column), "ab") as file:
+                file.write(np.ascontiguousarray(arrays[column], dtype=dtype).tobytes())
+
+        self.dates = self.dates.append(pd.DatetimeIndex([date]))
+        self.day_offsets = np.append(self.day_offsets, self.day_offsets[-1] + len(df))
+        self._save_meta()
+        self._open()
+
+    @classmethod
+    def from_dir(cls, data_dir, path, chunk_size=1 << 20):
+        """
+        Build or update a store from the daily network CSV files of a directory,
+        one file at a time. The days already in the store are skipped.
+
+        Parameters:
+        data_dir (str): The directory of the YYYY-M-D.csv files.
+        path (str): The directory of the store.
+        chunk_size (int): The number of edges read per chunk.
+
+        Returns:
+        MemmapEdgeStore: The store.
+        """
+        store = cls(path, chunk_size)
+        files = {}
+        for filename in glob.glob(os.path.join(data_dir, "*.csv")):
+            files[pd.to_datetime(os.path.basename(filename).split(".")[0], format="%Y-%m-%d")] = filename
+
+        for date in sorted(files):
+            if store.nb_days and date <= store.dates[-1]:
+                continue
+            store.append_day(date, pd.read_csv(files[date], dtype={"Source": str, "Target": str}))
+        return store
+
+    @classmethod
+    def from_edges(cls, edges, path, chunk_size=1 << 20):
+        """
+        Write the days of an EdgeTable to a new store.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        path (str): The directory of the store.
+        chunk_size (int): The number of edges read per chunk.
+
+        Returns:
+        MemmapEdgeStore: The store.
+        """
+        store = cls(path, chunk_size)
+        for day in range(edges.nb_days):
+            store.append_day(edges.dates[day], edges.to_frame(day))
+        return store
+
+    def get_day_index(self, day):
+        """
+        Get the index of a day.
+
+        Parameters:
+        day (int, str or datetime): The day index or date.
+
+        Returns:
+        int: The day index.
+        """
+        if isinstance(day, (int, np.integer)):
+            return int(day)
+        return self.dates.get_loc(pd.Timestamp(day))
+
+    def iter_chunks(self, start=None, end=None, columns=tuple(COLUMNS)):
+        """
+        Iterate over the edges of a day range by chunks of whole days, of about
+        chunk_size edges, a day larger than chunk_size making a chunk of its own.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+        columns (tuple): The columns read, among src, dst, value, nb_transactions and day.
+
+        Yields:
+        dict: The arrays of the columns of the chunk, read into memory.
+        """
+        first = 0 if start is None else self.get_day_index(start)
+        last = self.nb_days - 1 if end is None else self.get_day_index(end)
+
+        day = first
+        while day <= last:
+            offset = self.day_offsets[day]
+            next_day = int(np.searchsorted(self.day_offsets, offset + self.chunk_size, side="right")) - 1
+            next_day = min(max(next_day, day + 1), last + 1)
+
+            edges = slice(offset, self.day_offsets[next_day])
+            chunk = {}
+            for column in columns:
+                if column == "day":
+                    chunk[column] = np.repeat(np.arange(day, next_day, dtype=np.int32), np.diff(self.day_offsets[day:next_day + 1]))
+                else:
+                    chunk[column] = np.array(self._columns[column][edges])
+            yield chunk
+            day = next_day
+
+    def get_actor_totals(self, start=None, end=None):
+        """
+        Get the number of daily edges, value and number of transactions sent
+        and received by every actor on a day range.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+
+        Returns:
+        pd.DataFrame: The totals, indexed by actor name.
+        """
+        n = self.nb_actors
+        totals = {column: np.zeros(n) for column in (
+            "out_degree", "in_degree", "sent", "received", "nb_transactions_sent", "nb_transactions_received"
+        )}
+        for chunk in self.iter_chunks(start, end):
+            for side, actors in (("out", chunk["src"]), ("in", chunk["dst"])):
+                suffix = "sent" if side == "out" else "received"
+                totals[side + "_degree"] += np.bincount(actors, minlength=n)
+                totals[suffix] += np.bincount(actors, weights=chunk["value"], minlength=n)
+                totals["nb_transactions_" + suffix] += np.bincount(actors, weights=chunk["nb_transactions"], minlength=n)
+
+        df = pd.DataFrame(totals, index=pd.Index(self._names, name="actor"))
+        for column in ("out_degree", "in_degree", "nb_transactions_sent", "nb_transactions_received"):
+            df[column] = df[column].astype(np.int64)
+        return df
+
+    def get_daily_totals(self, start=None, end=None):
+        """
+        Get the number of edges, value and number of transactions of every day.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+
+        Returns:
+        pd.DataFrame: The totals, indexed by date.
+        """
+        frames = []
+        for chunk in self.iter_chunks(start, end, ("value", "nb_transactions", "day")):
+            days, starts = np.unique(chunk["day"], return_index=True)
+            frames.append(pd.DataFrame({
+                "nb_edges": np.diff(np.append(starts, len(chunk["day"]))),
+                "value": np.add.reduceat(chunk["value"], starts),
+                "nb_transactions": np.add.reduceat(chunk["nb_transactions"], starts),
+            }, index=pd.DatetimeIndex(self.dates[days], name="date")))
+        return pd.concat(frames) if frames else pd.DataFrame(columns=["nb_edges", "value", "nb_transactions"])
+
+    def get_rollup(self, start=None, end=None, max_partial=None):
+        """
+        Aggregate the edges of a day range by (source, target) pair, like EdgeRollups.
+        Each chunk is aggregated on its own, and the partial aggregates are merged
+        whenever they grow beyond max_partial pairs, so only the aggregate of the
+        range is held in memory.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+        max_partial (int): The number of pending partial pairs that triggers a merge. Defaults to 4 chunks.
+
+        Returns:
+        pd.DataFrame: The edges, with the Source, Target, value, nb_transactions and active_days columns.
+        """
+        n = np.int64(self.nb_actors)
+        max_partial = max_partial or 4 * self.chunk_size
+        merged = None
+        partials, pending = [], 0
+
+        def merge(parts):
+            return _aggregate_pairs(*(np.concatenate(columns) for columns in zip(*parts)))
+
+        for chunk in self.iter_chunks(start, end, ("src", "dst", "value", "nb_transactions", "day")):
+            keys = chunk["src"].astype(np.int64) * n + chunk["dst"]
+
+            # a chunk holds whole days: count the distinct days of each pair within the chunk
+            day_keys = np.stack([keys, chunk["day"].astype(np.int64)])
+            order = np.lexsort(day_keys[::-1])
+            new_day = np.ones(len(keys))
+            new_day[1:] = np.any(day_keys[:, order][:, 1:] != day_keys[:, order][:, :-1], axis=0)
+            active_days = np.empty(len(keys))
+            active_days[order] = new_day
+
+            partials.append(_aggregate_pairs(keys, chunk["value"], chunk["nb_transactions"].astype(np.float64), active_days))
+            pending += len(partials[-1][0])
+            if pending > max_partial:
+                merged = merge(partials if merged is None else [merged] + partials)
+                partials, pending = [], 0
+
+        if partials:
+            merged = merge(partials if merged is None else [merged] + partials)
+        if merged is None:
+            return pd.DataFrame(columns=["Source", "Target", "value", "nb_transactions", "active_days"])
+
+        keys, value, nb_transactions, active_days = merged
+        names = np.array(self._names, dtype=object)
+        return pd.DataFrame({
+            "Source": names[keys // n],
+            "Target": names[keys % n],
+            "value": value,
+            "nb_transactions": nb_transactions.astype(np.int64),
+            "active_days": active_days.astype(np.int64),
+        })
+
+    def to_rollups(self, resolutions=tuple(RESOLUTIONS)):
+        """
+        Build the EdgeRollups of the store, one period at a time.
+
+        Parameters:
+        resolutions (tuple): The resolutions to build.
+
+        Returns:
+        EdgeRollups: The rollups.
+        """
+        rollups = EdgeRollups(resolutions)
+        rollups.days = {date.strftime("%Y-%m-%d") for date in self.dates}
+        for resolution in rollups.resolutions:
+            periods = self.dates.to_period(RESOLUTIONS[resolution])
+            for period in periods.unique():
+                days = np.flatnonzero(periods == period)
+                rollup = self.get_rollup(int(days[0]), int(days[-1]))
+                rollups._rollups[resolution][period] = rollup.set_index(["Source", "Target"])
+        return rollups
+
+    def get_out_strength(self, start=None, end=None, weight="value"):
+        """
+        Get the summed weight of the outgoing edges of every actor.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+        weight (str): Either "value", "nb_transactions" or None for the number of daily edges.
+
+        Returns:
+        np.ndarray: The out-strength of each actor id.
+        """
+        strength = np.zeros(self.nb_actors)
+        columns = ("src",) if weight is None else ("src", weight)
+        for chunk in self.iter_chunks(start, end, columns):
+            strength += np.bincount(chunk["src"], weights=None if weight is None else chunk[weight], minlength=self.nb_actors)
+        return strength
+
+    def matvec(self, x, start=None, end=None, weight="value", transpose=False, scale=None):
+        """
+        Multiply the adjacency matrix of a day range by a vector, in one pass over the edges.
+
+        Parameters:
+        x (np.ndarray): The vector, indexed by actor id.
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+        weight (str): Either "value", "nb_transactions" or None for the number of daily edges.
+        transpose (bool): Whether to multiply by the transposed matrix, i.e. to push x along the edges.
+        scale (np.ndarray): Factors applied to the weights of the edges of each source actor,
+            e.g. the inverse out-strengths for a transition matrix.
+
+        Returns:
+        np.ndarray: A·x, or Aᵀ·x when transposed.
+        """
+        result = np.zeros(self.nb_actors)
+        columns = ("src", "dst") if weight is None else ("src", "dst", weight)
+        for chunk in self.iter_chunks(start, end, columns):
+            weights = np.ones(len(chunk["src"])) if weight is None else chunk[weight].astype(np.float64)
+            if scale is not None:
+                weights = weights * scale[chunk["src"]]
+            if transpose:
+                result += np.bincount(chunk["dst"], weights=weights * x[chunk["src"]], minlength=self.nb_actors)
+            else:
+                result += np.bincount(chunk["src"], weights=weights * x[chunk["dst"]], minlength=self.nb_actors)
+        return result
+
+    def pagerank(self, start=None, end=None, weight="value", alpha=0.85, x0=None, tol=1.0e-6, max_iter=100):
+        """
+        Compute the weighted PageRank of a day range over every actor of the store,
+        with the conventions of centrality.pagerank, one pass over the edges per iteration.
+
+        Parameters:
+        start (int, str or datetime): The first day. Defaults to the first day of the store.
+        end (int, str or datetime): The last day, inclusive. Defaults to the last day of the store.
+        weight (str): Either "value", "nb_transactions" or None for the number of daily edges.
+        alpha (float): The damping factor.
+        x0 (np.ndarray): The starting vector. Defaults to uniform.
+        tol (float): The convergence tolerance on the L1 change, per node.
+        max_iter (int): The maximum number of iterations.
+
+        Returns:
+        tuple: The PageRank vector, indexed by actor id, and the number of iterations run.
+        """
+        n = self.nb_actors
+        if n == 0:
+            return np.zeros(0), 0
+
+        strength = self.get_out_strength(start, end, weight)
+        dangling = strength == 0
+        inverse = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, strength))
+
+        v = np.full(n, 1.0 / n)
+        x = np.full(n, 1.0 / n) if x0 is None else x0 / x0.sum()
+        for iteration in range(1, max_iter + 1):
+            previous = x
+            x = alpha * self.matvec(x, start, end, weight, transpose=True, scale=inverse) + (alpha * x[dangling].sum() + 1 - alpha) * v
+            if np.abs(x - previous).sum() < n * tol:
+                break
+
+        return x, iteration
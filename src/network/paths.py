@@ -0,0 +1,213 @@
+from scipy.sparse import csgraph
+from collections import OrderedDict
+from network.edges import ActorIndex
+import scipy.sparse as sp
+import networkx as nx
+import pandas as pd
+import numpy as np
+
+
+class PathQueryEngine:
+    """
+    The PathQueryEngine class answers shortest path queries on a CSR adjacency
+    matrix. The shortest path trees of all the sources of a query are computed
+    together by a single multi-source BFS (or Dijkstra when weighted), and the
+    trees of recently queried sources are kept in an LRU cache, so repeated
+    queries from hub actors cost a walk along the predecessors only.
+    """
+    def __init__(self, adjacency, actors, weighted=False, cache_size=256):
+        """
+        Initialize a PathQueryEngine object.
+
+        Parameters:
+        adjacency (scipy.sparse matrix): The adjacency matrix, whose weights are the edge lengths when weighted.
+        actors (ActorIndex): The names of the rows of the matrix.
+        weighted (bool): Whether to run Dijkstra on the weights instead of counting hops.
+        cache_size (int): The number of shortest path trees kept in the cache.
+        """
+        # csgraph expects 32-bit indices, which networkx does not produce
+        self.adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+        self.adjacency.indices = self.adjacency.indices.astype(np.int32)
+        self.adjacency.indptr = self.adjacency.indptr.astype(np.int32)
+        self.actors = actors
+        self.weighted = weighted
+        self.cache_size = cache_size
+
+        self._trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_graph(cls, graph, weight=None, cache_size=256):
+        """
+        Build a PathQueryEngine from a networkx graph.
+
+        Parameters:
+        graph (nx.DiGraph): The graph.
+        weight (str): The edge attribute used as length. Paths are counted in hops when None.
+        cache_size (int): The number of shortest path trees kept in the cache.
+
+        Returns:
+        PathQueryEngine: The engine.
+        """
+        nodes = list(graph.nodes)
+        adjacency = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight=weight, format="csr")
+        return cls(adjacency, ActorIndex(nodes), weighted=weight is not None, cache_size=cache_size)
+
+    @classmethod
+    def from_edges(cls, edges, start=None, end=None, cache_size=256):
+        """
+        Build a PathQueryEngine over the daily networks of a day range, paths being counted in hops.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        start (int, str or datetime): The first day. Defaults to the whole table.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+        cache_size (int): The number of shortest path trees kept in the cache.
+
+        Returns:
+        PathQueryEngine: The engine.
+        """
+        return cls(edges.get_adjacency(start, end, weight=None), edges.actors, cache_size=cache_size)
+
+    def _get_trees(self, sources):
+        """
+        Get the distances and predecessors from each source, computing the missing trees in one call.
+        """
+        missing = [source for source in dict.fromkeys(sources) if source not in self._trees]
+        self.misses += len(missing)
+        self.hits += len(sources) - len(missing)
+
+        if missing:
+            distances, predecessors = csgraph.shortest_path(
+                self.adjacency,
+                method="D",
+                directed=True,
+                unweighted=not self.weighted,
+                indices=missing,
+                return_predecessors=True,
+            )
+            for source, distance, predecessor in zip(missing, distances, predecessors):
+                self._trees[source] = (distance, predecessor.astype(np.int32))
+
+        trees = []
+        for source in sources:
+            self._trees.move_to_end(source)
+            trees.append(self._trees[source])
+
+        # evict only after the trees of the query are gathered
+        while len(self._trees) > self.cache_size:
+            self._trees.popitem(last=False)
+        return trees
+
+    def _walk(self, source, target, predecessor):
+        path = [target]
+        while path[-1] != source:
+            previous = predecessor[path[-1]]
+            if previous < 0:
+                return None
+            path.append(previous)
+        return list(self.actors.get_names(path[::-1]))
+
+    def get_shortest_paths(self, pairs):
+        """
+        Find the shortest paths of many (source, target) pairs.
+
+        Parameters:
+        pairs (list): The (source name, target name) pairs.
+
+        Returns:
+        list: The list of actor names of each path, or None when there is no path.
+        """
+        sources = [self.actors.get_id(source) for source, _ in pairs]
+        targets = [self.actors.get_id(target) for _, target in pairs]
+        trees = self._get_trees(sources)
+
+        return [
+            self._walk(source, target, predecessor)
+            for source, target, (_, predecessor) in zip(sources, targets, trees)
+        ]
+
+    def get_shortest_path(self, source, target):
+        """
+        Find the shortest path between two actors.
+
+        Parameters:
+        source (str): Name of the source actor.
+        target (str): Name of the target actor.
+
+        Returns:
+        list: List of actor names representing the shortest path, or None when there is none.
+        """
+        return self.get_shortest_paths([(source, target)])[0]
+
+    def get_distances(self, sources, targets):
+        """
+        Get the shortest path distances from several sources to several targets.
+
+        Parameters:
+        sources (list): The names of the sources.
+        targets (list): The names of the targets.
+
+        Returns:
+        pd.DataFrame: A source × target matrix of distances, inf when unreachable.
+        """
+        trees = self._get_trees(list(self.actors.get_ids(sources)))
+        target_ids = self.actors.get_ids(targets)
+        distances = np.array([distance[target_ids] for distance, _ in trees]).reshape(len(sources), len(targets))
+        return pd.DataFrame(distances, index=pd.Index(sources, name="source"), columns=pd.Index(targets, name="target"))
+
+    def get_distance_matrix(self, actors):
+        """
+        Get the pairwise shortest path distances between actors.
+
+        Parameters:
+        actors (list): The names of the actors.
+
+        Returns:
+        pd.DataFrame: An actor × actor matrix of distances, inf when unreachable.
+        """
+        return self.get_distances(actors, actors)
+
+    def get_top_actors(self, n, by="degree"):
+        """
+        Get the n actors with the most connections or the largest flow.
+
+        Parameters:
+        n (int): The number of actors.
+        by (str): Either "degree" (in and out edges) or "weight" (in and out weights).
+
+        Returns:
+        list: The names of the actors, in decreasing order.
+        """
+        matrix = self.adjacency if by == "weight" else (self.adjacency != 0).astype(np.float64)
+        score = np.asarray(matrix.sum(axis=0)).ravel() + np.asarray(matrix.sum(axis=1)).ravel()
+        return list(self.actors.get_names(np.argsort(-score, kind="stable")[:n]))
+
+    def get_top_distance_matrix(self, n, by="degree"):
+        """
+        Get the hop (or weighted) distance matrix between the n most connected actors.
+
+        Parameters:
+        n (int): The number of actors.
+        by (str): Either "degree" or "weight", see get_top_actors.
+
+        Returns:
+        pd.DataFrame: An actor × actor matrix of distances, inf when unreachable.
+        """
+        return self.get_distance_matrix(self.get_top_actors(n, by))
+
+    def clear_cache(self):
+        """
+        Drop the cached shortest path trees.
+        """
+        self._trees.clear()
+
+    def cache_info(self):
+        """
+        Get the statistics of the tree cache.
+
+        Returns:
+        dict: The number of hits, misses and cached trees.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._trees), "max_size": self.cache_size}
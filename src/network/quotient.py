@@ -0,0 +1,210 @@
+from network.graph import Graph
+import scipy.sparse as sp
+import pandas as pd
+import numpy as np
+
+
+def membership_matrix(labels, nb_communities=None):
+    """
+    Build the sparse membership matrix of a partition.
+
+    Parameters:
+    labels (np.ndarray): The community of each actor, -1 for the actors outside every community.
+    nb_communities (int): The number of communities. Defaults to the largest label plus one.
+
+    Returns:
+    scipy.sparse.csr_matrix: The actor × community matrix M, with M[i, c] = 1 when actor i is in community c.
+    """
+    labels = np.asarray(labels)
+    if nb_communities is None:
+        nb_communities = int(labels.max()) + 1 if len(labels) else 0
+
+    members = np.flatnonzero(labels >= 0)
+    return sp.csr_matrix(
+        (np.ones(len(members)), (members, labels[members])),
+        shape=(len(labels), nb_communities),
+    )
+
+
+def labels_from_partition(actors, partition):
+    """
+    Map a partition given by actor names onto the ids of an ActorIndex.
+
+    Parameters:
+    actors (ActorIndex): The actor vocabulary.
+    partition (dict): The community of each actor name, e.g. from CommunityStore.get_partition.
+
+    Returns:
+    np.ndarray: The community of each actor id, -1 for the actors missing from the partition.
+    """
+    labels = np.full(len(actors), -1, dtype=np.int64)
+    for name, label in partition.items():
+        if name in actors:
+            labels[actors.get_id(name)] = label
+    return labels
+
+
+def labels_from_communities(names, communities):
+    """
+    Build the label array of a list of communities.
+
+    Parameters:
+    names (list): The actor names, in the order of the labels.
+    communities (list): The members of each community, as Network.get_communities returns them.
+
+    Returns:
+    np.ndarray: The community of each actor, -1 for the actors outside every community.
+    """
+    positions = {name: i for i, name in enumerate(names)}
+    labels = np.full(len(names), -1, dtype=np.int64)
+    for label, community in enumerate(communities):
+        for member in community:
+            if member in positions:
+                labels[positions[member]] = label
+    return labels
+
+
+def quotient_flows(src, dst, value, nb_transactions, labels, nb_communities=None):
+    """
+    Compute the flows between communities as the sparse products Mᵀ·A·M of
+    the membership matrix M and the value and transaction count adjacency matrices A.
+    Flows from or to actors outside every community are dropped, and the
+    diagonal holds the flows inside each community.
+
+    Parameters:
+    src (np.ndarray): The source actor id of each edge.
+    dst (np.ndarray): The target actor id of each edge.
+    value (np.ndarray): The value of each edge.
+    nb_transactions (np.ndarray): The number of transactions of each edge.
+    labels (np.ndarray): The community of each actor id, -1 outside every community.
+    nb_communities (int): The number of communities. Defaults to the largest label plus one.
+
+    Returns:
+    tuple: The community × community value and transaction count matrices.
+    """
+    membership = membership_matrix(labels, nb_communities)
+    n = membership.shape[0]
+    membership_t = membership.T.tocsr()
+
+    flows = []
+    for weights in (value, nb_transactions):
+        adjacency = sp.csr_matrix((np.asarray(weights, dtype=np.float64), (src, dst)), shape=(n, n))
+        flows.append((membership_t @ adjacency @ membership).tocsr())
+    return tuple(flows)
+
+
+def flows_to_frame(value, nb_transactions, names=None):
+    """
+    List the non-zero entries of quotient flow matrices.
+
+    Parameters:
+    value (scipy.sparse matrix): The community × community value matrix.
+    nb_transactions (scipy.sparse matrix): The community × community transaction count matrix.
+    names (list): The names of the communities. Defaults to their labels.
+
+    Returns:
+    pd.DataFrame: The Source, Target, value and nb_transactions of each flow.
+    """
+    value = value.tocoo()
+    counts = sp.csr_matrix(nb_transactions)
+    names = np.arange(value.shape[0]) if names is None else np.asarray(names, dtype=object)
+    return pd.DataFrame({
+        "Source": names[value.row],
+        "Target": names[value.col],
+        "value": value.data,
+        "nb_transactions": np.asarray(counts[value.row, value.col]).ravel(),
+    })
+
+
+def quotient_graph(value, nb_transactions, names=None, date=None):
+    """
+    Build the quotient graph of a partition, whose nodes are the communities.
+
+    Parameters:
+    value (scipy.sparse matrix): The community × community value matrix.
+    nb_transactions (scipy.sparse matrix): The community × community transaction count matrix.
+    names (list): The names of the communities. Defaults to "Community <label>".
+    date (datetime): The date of the edges.
+
+    Returns:
+    Graph: The quotient graph, with the value and nb_transactions of each flow as edge attributes.
+    """
+    if names is None:
+        names = ["Community {}".format(label) for label in range(value.shape[0])]
+
+    graph = Graph()
+    graph._graph.add_nodes_from(names)
+    for row in flows_to_frame(value, nb_transactions, names).itertuples(index=False):
+        graph._graph.add_edge(row.Source, row.Target, value=row.value, nb_transactions=row.nb_transactions, date=date)
+    return graph
+
+
+class QuotientFlows:
+    """
+    The QuotientFlows class computes the community flow matrices of the
+    daily snapshots of an EdgeTable, either with a fixed partition or with
+    the partition detected for each day (e.g. by BatchCommunityDetection).
+    """
+    def __init__(self, edges):
+        """
+        Initialize a QuotientFlows object.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        """
+        self.edges = edges
+
+    def get_flows(self, labels, start, end=None):
+        """
+        Compute the community flows of a day range.
+
+        Parameters:
+        labels (np.ndarray): The community of each actor id, -1 outside every community.
+        start (int, str or datetime): The first day.
+        end (int, str or datetime): The last day, inclusive. Defaults to the first day.
+
+        Returns:
+        tuple: The community × community value and transaction count matrices.
+        """
+        edges = self.edges.get_day_slice(start, end)
+        return quotient_flows(
+            self.edges.src[edges],
+            self.edges.dst[edges],
+            self.edges.value[edges],
+            self.edges.nb_transactions[edges],
+            labels,
+        )
+
+    def get_daily_flows(self, partitions, days=None):
+        """
+        Compute the community flows of each day.
+
+        Parameters:
+        partitions (np.ndarray, dict or callable): A fixed label array, a dict of the label
+            array of each day, or a function of the date returning a name → community dict
+            (e.g. functools.partial(store.get_partition, algorithm="louvain")).
+        days (list): The days (indices or dates). Defaults to every day.
+
+        Returns:
+        pd.DataFrame: The date, Source and Target communities, value and nb_transactions of each flow.
+        """
+        days = range(self.edges.nb_days) if days is None else [self.edges.get_day_index(day) for day in days]
+
+        frames = []
+        for day in days:
+            date = self.edges.dates[day]
+            if callable(partitions):
+                partition = partitions(date)
+                if partition is None:
+                    continue
+                labels = labels_from_partition(self.edges.actors, partition)
+            elif isinstance(partitions, dict):
+                labels = partitions[date]
+            else:
+                labels = partitions
+
+            value, nb_transactions = self.get_flows(labels, day)
+            frames.append(flows_to_frame(value, nb_transactions).assign(date=date))
+
+        columns = ["date", "Source", "Target", "value", "nb_transactions"]
+        return pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
@@ -0,0 +1,355 @@
+from matplotlib.collections import LineCollection
+from collections import OrderedDict
+import matplotlib.pyplot as plt
+import scipy.sparse as sp
+import networkx as nx
+import pandas as pd
+import numpy as np
+import hashlib
+import os
+
+OTHER = "Other"
+
+
+def community_name(label):
+    return "Community {}".format(label)
+
+
+def normalize_partition(partition):
+    """
+    Get the community of each actor from either partition format of the package.
+
+    Parameters:
+    partition (dict or list): The community of each actor name (CommunityStore.get_partition),
+        or the members of each community (Network.get_communities).
+
+    Returns:
+    dict: The community label of each actor name.
+    """
+    if partition is None:
+        return {}
+    if isinstance(partition, dict):
+        return partition
+    return {member: label for label, community in enumerate(partition) for member in community}
+
+
+class LayoutCache:
+    """
+    The LayoutCache class keeps the node positions computed for the recent
+    snapshots, so that a snapshot drawn again reuses its layout and a new
+    snapshot starts from the positions its nodes had in the latest ones,
+    which needs few iterations and keeps the drawings of consecutive days
+    comparable. The cache can be persisted to a pickle file.
+    """
+    def __init__(self, path=None, max_snapshots=128):
+        """
+        Initialize a LayoutCache object.
+
+        Parameters:
+        path (str): The pickle file the cache is loaded from and saved to.
+        max_snapshots (int): The number of layouts kept, the least recently used being evicted.
+        """
+        self.path = path
+        self.max_snapshots = max_snapshots
+        self._layouts = OrderedDict()
+        if path is not None and os.path.exists(path):
+            self._layouts = pd.read_pickle(path)
+
+    def __contains__(self, key):
+        return key in self._layouts
+
+    def get(self, key):
+        """
+        Get the layout of a snapshot.
+
+        Parameters:
+        key (hashable): The snapshot key, e.g. its date and summary level.
+
+        Returns:
+        dict: The position of each node, or None when the snapshot is not cached.
+        """
+        if key not in self._layouts:
+            return None
+        self._layouts.move_to_end(key)
+        return self._layouts[key]
+
+    def put(self, key, positions):
+        """
+        Cache the layout of a snapshot.
+
+        Parameters:
+        key (hashable): The snapshot key.
+        positions (dict): The position of each node.
+        """
+        self._layouts[key] = positions
+        self._layouts.move_to_end(key)
+        while len(self._layouts) > self.max_snapshots:
+            self._layouts.popitem(last=False)
+
+    def get_initial_positions(self, nodes):
+        """
+        Get the latest cached position of the given nodes.
+
+        Parameters:
+        nodes (iterable): The nodes.
+
+        Returns:
+        dict: The position of the nodes found in the cached layouts.
+        """
+        missing = set(nodes)
+        positions = {}
+        for layout in reversed(self._layouts.values()):
+            found = missing.intersection(layout)
+            positions.update((node, layout[node]) for node in found)
+            missing -= found
+            if not missing:
+                break
+        return positions
+
+    def save(self, path=None):
+        """
+        Save the cache to a pickle file.
+
+        Parameters:
+        path (str): The path of the file. Defaults to the path of the cache.
+        """
+        pd.to_pickle(self._layouts, path or self.path)
+
+
+class GraphRenderer:
+    """
+    The GraphRenderer class draws large transaction graphs at a level of
+    detail that stays readable and fast: the actors are collapsed into their
+    communities, or all but the top-k actors by volume are, and chosen
+    communities can be expanded into their members on demand.
+
+    The coarse layout is computed on the collapsed graph only, and cached
+    per snapshot; an expanded community is laid out on its own and placed
+    around the position of its community, so expanding does not move the
+    rest of the drawing. Nodes and edges are drawn as single matplotlib
+    collections instead of one artist per element.
+    """
+    def __init__(self, graph, partition=None, layout_cache=None, weight="value", seed=42):
+        """
+        Initialize a GraphRenderer object.
+
+        Parameters:
+        graph (nx.DiGraph or Graph): The transaction graph.
+        partition (dict or list): The communities, see normalize_partition. Without them,
+            the actors outside the top-k are collapsed into a single node.
+        layout_cache (LayoutCache): The layout cache. Defaults to a new in-memory cache.
+        weight (str): The edge attribute used as volume.
+        seed (int): The seed of the layouts.
+        """
+        self.graph = graph.get_graph() if hasattr(graph, "get_graph") else graph
+        self.partition = normalize_partition(partition)
+        self.layout_cache = layout_cache if layout_cache is not None else LayoutCache()
+        self.weight = weight
+        self.seed = seed
+        self.expanded = set()
+
+        self._nodes = list(self.graph.nodes)
+        self._partition_key = self._get_partition_key()
+        adjacency = nx.to_scipy_sparse_array(self.graph, nodelist=self._nodes, weight=weight, format="csr")
+        self._adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+        self._volume = np.asarray(self._adjacency.sum(axis=0)).ravel() + np.asarray(self._adjacency.sum(axis=1)).ravel()
+
+    def _get_partition_key(self):
+        """
+        Fingerprint the communities of the nodes, so that the cached layouts of a
+        snapshot drawn with another partition, whose collapsed nodes differ, are not reused.
+        """
+        labels = [(str(node), str(self.partition[node])) for node in self._nodes if node in self.partition]
+        return hashlib.sha1(repr(sorted(labels)).encode()).hexdigest()
+
+    def expand(self, community):
+        """
+        Draw the members of a community instead of its collapsed node.
+
+        Parameters:
+        community (int): The community label.
+        """
+        self.expanded.add(community)
+
+    def collapse(self, community=None):
+        """
+        Collapse an expanded community again.
+
+        Parameters:
+        community (int): The community label. Defaults to every expanded community.
+        """
+        if community is None:
+            self.expanded.clear()
+        else:
+            self.expanded.discard(community)
+
+    def _get_groups(self, top_k, expanded):
+        """
+        Get the node drawn for each actor, either the actor itself or its collapsed group.
+        """
+        kept = set()
+        if top_k is not None:
+            kept = {self._nodes[i] for i in np.argsort(-self._volume, kind="stable")[:top_k]}
+
+        groups = []
+        for node in self._nodes:
+            label = self.partition.get(node)
+            if node in kept or (label is not None and label in expanded):
+                groups.append(node)
+            elif label is not None:
+                groups.append(community_name(label))
+            elif top_k is not None or self.partition:
+                groups.append(OTHER)
+            else:
+                groups.append(node)
+        return groups
+
+    def summarize(self, top_k=None, expanded=()):
+        """
+        Collapse the graph, summing the volume of the edges between groups.
+
+        Parameters:
+        top_k (int): The number of actors by volume kept as such. Defaults to none when
+            there is a partition, every other actor being collapsed into its community.
+        expanded (iterable): The communities whose members are kept as such.
+
+        Returns:
+        tuple: The collapsed nx.DiGraph, whose nodes have a volume and a size (number of
+            actors) attribute and edges a weight attribute, and the group of each actor.
+        """
+        groups = self._get_groups(top_k, set(expanded))
+        codes, names = pd.factorize(pd.Series(groups, dtype=object))
+
+        membership = sp.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)), shape=(len(codes), len(names)))
+        flows = (membership.T @ self._adjacency @ membership).tocoo()
+
+        summary = nx.DiGraph()
+        sizes = np.bincount(codes, minlength=len(names))
+        volumes = np.bincount(codes, weights=self._volume, minlength=len(names))
+        for name, size, volume in zip(names, sizes, volumes):
+            summary.add_node(name, size=int(size), volume=float(volume))
+
+        keep = flows.row != flows.col
+        summary.add_weighted_edges_from(zip(names[flows.row[keep]], names[flows.col[keep]], flows.data[keep]))
+        return summary, dict(zip(self._nodes, groups))
+
+    def _spring_layout(self, graph, initial=None):
+        iterations = 15 if initial and len(initial) == graph.number_of_nodes() else 50
+        return nx.spring_layout(graph, pos=initial or None, weight=None, iterations=iterations, seed=self.seed)
+
+    def get_layout(self, key=None, top_k=None):
+        """
+        Get the layout of the collapsed graph, from the cache when possible.
+
+        Parameters:
+        key (hashable): The snapshot key, e.g. its date. Defaults to no caching.
+        top_k (int): The number of actors by volume kept as such.
+
+        Returns:
+        dict: The position of each node of the collapsed graph.
+        """
+        cache_key = None if key is None else (key, top_k, self._partition_key)
+        if cache_key is not None and cache_key in self.layout_cache:
+            return self.layout_cache.get(cache_key)
+
+        summary, _ = self.summarize(top_k)
+        positions = self._spring_layout(summary, self.layout_cache.get_initial_positions(summary.nodes))
+        if cache_key is not None:
+            self.layout_cache.put(cache_key, positions)
+        return positions
+
+    def _get_expanded_layout(self, key, community, center, radius):
+        """
+        Lay out the members of a community around the position of its collapsed node.
+        """
+        cache_key = None if key is None else (key, "expanded", community, self._partition_key)
+        positions = None if cache_key is None else self.layout_cache.get(cache_key)
+        if positions is None:
+            members = [node for node in self._nodes if self.partition.get(node) == community]
+            subgraph = self.graph.subgraph(members)
+            positions = self._spring_layout(subgraph, self.layout_cache.get_initial_positions(members))
+            if cache_key is not None:
+                self.layout_cache.put(cache_key, positions)
+
+        # spring_layout rescales the positions into [-1, 1]
+        return {node: np.asarray(center) + radius * np.asarray(position) for node, position in positions.items()}
+
+    def get_positions(self, key=None, top_k=None):
+        """
+        Get the position of every node drawn, the members of the expanded
+        communities being placed around their community.
+
+        Parameters:
+        key (hashable): The snapshot key. Defaults to no caching.
+        top_k (int): The number of actors by volume kept as such.
+
+        Returns:
+        dict: The position of each node.
+        """
+        positions = dict(self.get_layout(key, top_k))
+        if not self.expanded:
+            return positions
+
+        summary, _ = self.summarize(top_k)
+        total = sum(size for _, size in summary.nodes(data="size"))
+        for community in self.expanded:
+            name = community_name(community)
+            if name not in positions:
+                continue
+            radius = 0.5 * np.sqrt(summary.nodes[name]["size"] / total)
+            positions.update(self._get_expanded_layout(key, community, positions.pop(name), radius))
+        return positions
+
+    def draw(self, ax=None, key=None, top_k=None, max_edges=2000, max_labels=20, cmap="tab20"):
+        """
+        Draw the graph at the current level of detail.
+
+        Parameters:
+        ax (matplotlib.axes.Axes): The axes to draw on. Defaults to a new figure.
+        key (hashable): The snapshot key of the layout cache, e.g. its date.
+        top_k (int): The number of actors by volume kept as such.
+        max_edges (int): The number of heaviest edges drawn.
+        max_labels (int): The number of largest nodes labelled.
+        cmap (str): The colormap of the communities.
+
+        Returns:
+        matplotlib.axes.Axes: The axes.
+        """
+        if ax is None:
+            _, ax = plt.subplots(figsize=(10, 10))
+
+        summary, _ = self.summarize(top_k, self.expanded)
+        positions = self.get_positions(key, top_k)
+
+        nodes = list(summary.nodes)
+        xy = np.array([positions[node] for node in nodes]).reshape(-1, 2)
+        volumes = np.array([summary.nodes[node]["volume"] for node in nodes])
+
+        edges = sorted(summary.edges(data="weight"), key=lambda edge: edge[2], reverse=True)[:max_edges]
+        if edges:
+            weights = np.log1p([weight for _, _, weight in edges])
+            segments = [(positions[source], positions[target]) for source, target, _ in edges]
+            ax.add_collection(LineCollection(
+                segments, linewidths=0.2 + 2 * weights / max(weights.max(), 1e-12), colors="grey", alpha=0.3, zorder=1
+            ))
+
+        colormap = plt.get_cmap(cmap)
+        colors = [colormap(label % colormap.N) if label >= 0 else "lightgrey" for label in map(self._get_label, nodes)]
+        sizes = 10 + 500 * np.sqrt(volumes / max(volumes.max(), 1e-12)) if len(volumes) else []
+        ax.scatter(xy[:, 0], xy[:, 1], s=sizes, c=colors, alpha=0.8, edgecolors="white", linewidths=0.5, zorder=2)
+
+        for i in np.argsort(-volumes, kind="stable")[:max_labels]:
+            ax.annotate(str(nodes[i]), xy[i], fontsize=8, ha="center", va="bottom", zorder=3)
+
+        ax.autoscale_view()
+        ax.set_axis_off()
+        return ax
+
+    def _get_label(self, node):
+        """
+        Community of a drawn node, -1 for the actors outside every community and the Other node.
+        """
+        label = self.partition.get(node)
+        if label is None and isinstance(node, str) and node.startswith("Community "):
+            label = int(node.split(" ")[1])
+        return -1 if label is None else int(label)
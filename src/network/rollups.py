@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from network.edges import EdgeTable
+import pandas as pd
+import numpy as np
+import glob
+import os
+
+RESOLUTIONS = OrderedDict([("week", "W"), ("month", "M"), ("quarter", "Q")])
+COLUMNS = ["value", "nb_transactions", "active_days"]
+
+
+class EdgeRollups:
+    """
+    The EdgeRollups class maintains the daily edges aggregated by week, month
+    and quarter: for every period and (source, target) pair, the summed value,
+    the summed number of transactions and the number of days the edge was
+    active. Rollups are built in bulk from an EdgeTable, then kept up to date
+    one day at a time, only the periods containing the new day being touched.
+    """
+    def __init__(self, resolutions=tuple(RESOLUTIONS)):
+        """
+        Initialize an EdgeRollups object.
+
+        Parameters:
+        resolutions (tuple): The resolutions maintained, among "week", "month" and "quarter".
+        """
+        for resolution in resolutions:
+            if resolution not in RESOLUTIONS:
+                raise ValueError("Unknown resolution {}".format(resolution))
+
+        self.resolutions = tuple(resolutions)
+        self.days = set()
+        self._rollups = {resolution: {} for resolution in self.resolutions}
+
+    @staticmethod
+    def _aggregate(periods, src, dst, value, nb_transactions, day):
+        """
+        Aggregate edges by (period, source, target) with sorted-key reductions.
+        Returns the keys of each group and its sums.
+        """
+        order = np.lexsort((day, dst, src, periods))
+        periods, src, dst = periods[order], src[order], dst[order]
+        value, nb_transactions, day = value[order], nb_transactions[order], day[order]
+
+        boundaries = np.flatnonzero(np.diff(periods) | np.diff(src) | np.diff(dst)) + 1
+        starts = np.concatenate([[0], boundaries])
+
+        # a pair may be listed several times on the same day, count its distinct days
+        new_day = np.ones(len(day), dtype=np.int64)
+        new_day[1:] = day[1:] != day[:-1]
+        new_day[starts] = 1
+
+        return (
+            periods[starts],
+            src[starts],
+            dst[starts],
+            np.add.reduceat(value, starts),
+            np.add.reduceat(nb_transactions, starts),
+            np.add.reduceat(new_day, starts),
+        )
+
+    @classmethod
+    def from_edges(cls, edges, resolutions=tuple(RESOLUTIONS)):
+        """
+        Build the rollups of every day of an EdgeTable.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        resolutions (tuple): The resolutions to build.
+
+        Returns:
+        EdgeRollups: The rollups.
+        """
+        rollups = cls(resolutions)
+        rollups.days = {date.strftime("%Y-%m-%d") for date in edges.dates}
+        if len(edges) == 0:
+            return rollups
+
+        for resolution in rollups.resolutions:
+            day_periods = edges.dates.to_period(RESOLUTIONS[resolution])
+            codes, periods = pd.factorize(day_periods, sort=True)
+            period, src, dst, value, nb_transactions, active_days = cls._aggregate(
+                codes[edges.day], edges.src, edges.dst, edges.value, edges.nb_transactions, edges.day
+            )
+
+            boundaries = np.flatnonzero(np.diff(period)) + 1
+            for rows in np.split(np.arange(len(period)), boundaries):
+                df = pd.DataFrame({
+                    "value": value[rows],
+                    "nb_transactions": nb_transactions[rows],
+                    "active_days": active_days[rows],
+                }, index=pd.MultiIndex.from_arrays(
+                    [edges.actors.get_names(src[rows]), edges.actors.get_names(dst[rows])],
+                    names=["Source", "Target"],
+                ))
+                rollups._rollups[resolution][periods[period[rows[0]]]] = df
+
+        return rollups
+
+    @classmethod
+    def from_dir(cls, data_dir, resolutions=tuple(RESOLUTIONS), cache_path=None):
+        """
+        Build the rollups of every daily network CSV file of a directory.
+
+        Parameters:
+        data_dir (str): The directory of the YYYY-M-D.csv files.
+        resolutions (tuple): The resolutions to build.
+        cache_path (str): The EdgeTable cache, see EdgeTable.from_dir.
+
+        Returns:
+        EdgeRollups: The rollups.
+        """
+        return cls.from_edges(EdgeTable.from_dir(data_dir, cache_path), resolutions)
+
+    def add_day(self, date, df):
+        """
+        Add the edges of a new day to the rollups of its periods.
+
+        Parameters:
+        date (str or datetime): The date of the day.
+        df (pd.DataFrame): The edges, with the Source, Target, value and nb_transactions columns.
+
+        Returns:
+        bool: False when the day was already included and nothing changed.
+        """
+        date = pd.Timestamp(date)
+        key = date.strftime("%Y-%m-%d")
+        if key in self.days:
+            return False
+
+        day = df.assign(Source=df["Source"].astype(str), Target=df["Target"].astype(str))
+        day = day.groupby(["Source", "Target"])[["value", "nb_transactions"]].sum().assign(active_days=1)
+        day["value"] = day["value"].astype(np.float64)
+
+        for resolution in self.resolutions:
+            period = date.to_period(RESOLUTIONS[resolution])
+            rollup = self._rollups[resolution].get(period)
+            if rollup is None:
+                rollup = day.copy()
+            else:
+                rollup = rollup.add(day, fill_value=0).astype({column: rollup[column].dtype for column in COLUMNS})
+            self._rollups[resolution][period] = rollup
+
+        self.days.add(key)
+        return True
+
+    def update_from_dir(self, data_dir):
+        """
+        Add the daily files of a directory that are not included yet.
+
+        Parameters:
+        data_dir (str): The directory of the YYYY-M-D.csv files.
+
+        Returns:
+        list: The dates added.
+        """
+        added = []
+        for filename in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+            date = pd.to_datetime(os.path.basename(filename).split(".")[0], format="%Y-%m-%d")
+            if date.strftime("%Y-%m-%d") not in self.days:
+                self.add_day(date, pd.read_csv(filename, dtype={"Source": str, "Target": str}))
+                added.append(date)
+        return added
+
+    def get_periods(self, resolution):
+        """
+        Get the periods of a resolution.
+
+        Parameters:
+        resolution (str): Either "week", "month" or "quarter".
+
+        Returns:
+        list: The periods, in chronological order.
+        """
+        return sorted(self._rollups[resolution])
+
+    def get(self, resolution, period):
+        """
+        Get the aggregated edges of a period.
+
+        Parameters:
+        resolution (str): Either "week", "month" or "quarter".
+        period (str, datetime or pd.Period): The period, or any date inside it.
+
+        Returns:
+        pd.DataFrame: The edges, with the Source, Target, value, nb_transactions and active_days columns.
+        """
+        period = pd.Period(period, freq=RESOLUTIONS[resolution])
+        if period not in self._rollups[resolution]:
+            raise KeyError("No edges for {} {}".format(resolution, period))
+        return self._rollups[resolution][period].reset_index()
+
+    def save(self, path):
+        """
+        Save the rollups to a pickle file.
+
+        Parameters:
+        path (str): The path of the file.
+        """
+        pd.to_pickle({"resolutions": self.resolutions, "days": self.days, "rollups": self._rollups}, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load rollups saved with save.
+
+        Parameters:
+        path (str): The path of the file.
+
+        Returns:
+        EdgeRollups: The rollups.
+        """
+        state = pd.read_pickle(path)
+        rollups = cls(state["resolutions"])
+        rollups.days = state["days"]
+        rollups._rollups = state["rollups"]
+        return rollups
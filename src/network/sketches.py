@@ -0,0 +1,501 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+import glob
+import os
+
+
+def hash_keys(keys, seed=0):
+    """
+    Hash arbitrary keys (e.g. actor names) into 64-bit integers.
+
+    Parameters:
+    keys (array-like): The keys.
+    seed (int): The seed of the hash function.
+
+    Returns:
+    np.ndarray: The uint64 hashes.
+    """
+    return pd.util.hash_array(np.asarray(keys, dtype=object), hash_key=str(seed).zfill(16)[-16:])
+
+
+def _bit_length(x):
+    """
+    Vectorized int.bit_length of an array of uint64.
+    """
+    x = x.copy()
+    length = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        x[high] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+class HyperLogLogArray:
+    """
+    The HyperLogLogArray class holds one HyperLogLog distinct counter per key
+    (e.g. per actor) as the rows of a register matrix, so that a whole batch of
+    (key, item) pairs is added with a few vectorized operations. Rows are
+    created as new keys appear, and two arrays are merged row by row with an
+    element-wise maximum.
+    """
+    def __init__(self, precision=10, seed=0):
+        """
+        Initialize a HyperLogLogArray object.
+
+        Parameters:
+        precision (int): The number of index bits, each counter using 2 ** precision one-byte registers.
+            The relative standard error is about 1.04 / sqrt(2 ** precision).
+        seed (int): The seed of the hash function, which must match to merge two arrays.
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+        self.precision = precision
+        self.seed = seed
+        self.keys = OrderedDict()
+        self.registers = np.zeros((0, 2 ** precision), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _get_rows(self, keys):
+        """
+        Get the rows of the keys, appending the missing ones and growing the register matrix geometrically.
+        """
+        rows = np.array([self.keys.setdefault(key, len(self.keys)) for key in keys], dtype=np.int64)
+        if len(self.keys) > len(self.registers):
+            grown = np.zeros((max(len(self.keys), 2 * len(self.registers)), self.registers.shape[1]), dtype=np.uint8)
+            grown[:len(self.registers)] = self.registers
+            self.registers = grown
+        return rows
+
+    def add(self, keys, items):
+        """
+        Add items to the counters of their keys.
+
+        Parameters:
+        keys (array-like): The key of each item.
+        items (array-like): The items counted.
+        """
+        if len(keys) == 0:
+            return
+
+        inverse, unique_keys = pd.factorize(np.asarray(keys, dtype=object))
+        rows = self._get_rows(unique_keys)[inverse]
+
+        hashes = hash_keys(items, self.seed)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(64 - _bit_length(rest).astype(np.int64) + 1, 64 - self.precision + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, (rows, index), rank)
+
+    def merge(self, other):
+        """
+        Merge the counters of another array into this one.
+
+        Parameters:
+        other (HyperLogLogArray): An array with the same precision and seed.
+
+        Returns:
+        HyperLogLogArray: This array.
+        """
+        if other.precision != self.precision or other.seed != self.seed:
+            raise ValueError("Only sketches with the same precision and seed can be merged")
+
+        if len(other):
+            rows = self._get_rows(list(other.keys))
+            self.registers[rows] = np.maximum(self.registers[rows], other.registers[:len(other)])
+        return self
+
+    def get_registers(self, keys):
+        """
+        Get the registers of some keys, zeros for the unknown ones.
+
+        Parameters:
+        keys (list): The keys.
+
+        Returns:
+        np.ndarray: A key × register matrix.
+        """
+        registers = np.zeros((len(keys), self.registers.shape[1]), dtype=np.uint8)
+        known = [(i, self.keys[key]) for i, key in enumerate(keys) if key in self.keys]
+        if known:
+            positions, rows = zip(*known)
+            registers[list(positions)] = self.registers[list(rows)]
+        return registers
+
+    @staticmethod
+    def estimate(registers):
+        """
+        Estimate the distinct counts of HyperLogLog registers, with the linear
+        counting correction of small cardinalities.
+
+        Parameters:
+        registers (np.ndarray): A counter × register matrix.
+
+        Returns:
+        np.ndarray: The estimated distinct count of each counter.
+        """
+        m = registers.shape[1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.power(2.0, -registers.astype(np.float64)).sum(axis=1)
+
+        zeros = (registers == 0).sum(axis=1)
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        raw[small] = m * np.log(m / zeros[small])
+        return raw
+
+    def count(self, keys=None):
+        """
+        Estimate the distinct count of each key.
+
+        Parameters:
+        keys (list): The keys. Defaults to every key.
+
+        Returns:
+        pd.Series: The estimated distinct counts.
+        """
+        keys = list(self.keys) if keys is None else list(keys)
+        return pd.Series(self.estimate(self.get_registers(keys)), index=keys)
+
+
+class CountMinSketch:
+    """
+    The CountMinSketch class estimates the total weight of any key in a stream
+    with a fixed-size table. Estimates never underestimate, and overestimate by
+    at most e / width of the total weight with probability 1 - exp(-depth).
+    Sketches with the same shape and seed are merged by adding their tables.
+    """
+    def __init__(self, width=2048, depth=4, seed=0):
+        """
+        Initialize a CountMinSketch object.
+
+        Parameters:
+        width (int): The number of counters per row.
+        depth (int): The number of rows, i.e. of hash functions.
+        seed (int): The seed of the hash functions.
+        """
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width))
+
+    def _columns(self, keys):
+        # double hashing: the i-th hash function is h1 + i * h2
+        hashes = hash_keys(keys, self.seed)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, keys, weights=None):
+        """
+        Add weighted keys to the sketch.
+
+        Parameters:
+        keys (array-like): The keys.
+        weights (array-like): The weight of each key. Defaults to one.
+        """
+        if len(keys) == 0:
+            return
+
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=np.float64)
+        columns = self._columns(keys)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights, minlength=self.width)
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        Parameters:
+        other (CountMinSketch): A sketch with the same width, depth and seed.
+
+        Returns:
+        CountMinSketch: This sketch.
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Only sketches with the same shape and seed can be merged")
+
+        self.table += other.table
+        return self
+
+    def estimate(self, keys):
+        """
+        Estimate the total weight of keys.
+
+        Parameters:
+        keys (list): The keys.
+
+        Returns:
+        pd.Series: The estimated weights.
+        """
+        columns = self._columns(keys)
+        return pd.Series(self.table[np.arange(self.depth)[:, None], columns].min(axis=0), index=list(keys))
+
+
+class SpaceSaving:
+    """
+    The SpaceSaving class keeps the k heaviest keys of a weighted stream with
+    an upper bound of the error of each count. Batches are aggregated before
+    being merged into the summary, and summaries built on different days or
+    workers are merged following the mergeable summaries scheme: a key missing
+    from a full summary is counted with that summary's smallest count.
+    """
+    def __init__(self, k=100):
+        """
+        Initialize a SpaceSaving object.
+
+        Parameters:
+        k (int): The number of monitored keys.
+        """
+        self.k = k
+        self.counts = pd.Series(dtype=np.float64)
+        self.errors = pd.Series(dtype=np.float64)
+
+    @property
+    def min_count(self):
+        """
+        The upper bound of the weight of any key that is not monitored.
+        """
+        return self.counts.min() if len(self.counts) >= self.k else 0.0
+
+    def _merge(self, counts, errors, other_min_count):
+        own_min_count = self.min_count
+        keys = self.counts.index.union(counts.index)
+
+        total = self.counts.reindex(keys).fillna(own_min_count) + counts.reindex(keys).fillna(other_min_count)
+        error = self.errors.reindex(keys).fillna(own_min_count) + errors.reindex(keys).fillna(other_min_count)
+
+        top = total.sort_values(ascending=False, kind="stable").index[:self.k]
+        self.counts = total[top]
+        self.errors = error[top]
+
+    def add(self, keys, weights=None):
+        """
+        Add weighted keys to the summary.
+
+        Parameters:
+        keys (array-like): The keys.
+        weights (array-like): The weight of each key. Defaults to one.
+        """
+        if len(keys) == 0:
+            return
+
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=np.float64)
+        codes, unique_keys = pd.factorize(np.asarray(keys, dtype=object))
+        batch = pd.Series(np.bincount(codes, weights, minlength=len(unique_keys)), index=unique_keys)
+        self._merge(batch, pd.Series(0.0, index=batch.index), 0.0)
+
+    def merge(self, other):
+        """
+        Merge another summary into this one.
+
+        Parameters:
+        other (SpaceSaving): The other summary.
+
+        Returns:
+        SpaceSaving: This summary.
+        """
+        self._merge(other.counts, other.errors, other.min_count)
+        return self
+
+    def top(self, k=None):
+        """
+        Get the heaviest keys.
+
+        Parameters:
+        k (int): The number of keys. Defaults to every monitored key.
+
+        Returns:
+        pd.DataFrame: The estimated weight, error bound and guaranteed weight of each key.
+        """
+        k = k or self.k
+        return pd.DataFrame({
+            "count": self.counts.iloc[:k],
+            "error": self.errors.iloc[:k],
+            "guaranteed": (self.counts - self.errors).iloc[:k],
+        })
+
+
+class NetworkSketch:
+    """
+    The NetworkSketch class maintains bounded-memory statistics of a stream of
+    daily edges: the distinct counterparties of every actor (HyperLogLog), the
+    volume of any actor (Count-Min) and the heaviest senders, receivers and
+    pairs by volume (Space-Saving). Sketches of single days are merged into
+    weekly, monthly or whole-stream figures.
+    """
+    PAIR_SEPARATOR = " -> "
+
+    def __init__(self, precision=10, width=2048, depth=4, k=100, seed=0):
+        """
+        Initialize a NetworkSketch object.
+
+        Parameters:
+        precision (int): The precision of the distinct counters.
+        width (int): The width of the volume sketch.
+        depth (int): The depth of the volume sketch.
+        k (int): The number of heavy hitters monitored.
+        seed (int): The seed of the hash functions.
+        """
+        self.senders = HyperLogLogArray(precision, seed)
+        self.receivers = HyperLogLogArray(precision, seed)
+        self.volume = CountMinSketch(width, depth, seed)
+        self.top_senders = SpaceSaving(k)
+        self.top_receivers = SpaceSaving(k)
+        self.top_pairs = SpaceSaving(k)
+        self.nb_edges = 0
+
+    def update(self, df):
+        """
+        Add a batch of edges to the sketches.
+
+        Parameters:
+        df (pd.DataFrame): The edges, with the Source, Target and value columns.
+        """
+        source = df["Source"].astype(str)
+        target = df["Target"].astype(str)
+        pairs = (source + self.PAIR_SEPARATOR + target).values
+        source, target = source.values, target.values
+        value = df["value"].values.astype(np.float64)
+
+        self.senders.add(source, target)
+        self.receivers.add(target, source)
+        self.volume.add(np.concatenate([source, target]), np.concatenate([value, value]))
+        self.top_senders.add(source, value)
+        self.top_receivers.add(target, value)
+        self.top_pairs.add(pairs, value)
+        self.nb_edges += len(df)
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        Parameters:
+        other (NetworkSketch): A sketch built with the same parameters.
+
+        Returns:
+        NetworkSketch: This sketch.
+        """
+        self.senders.merge(other.senders)
+        self.receivers.merge(other.receivers)
+        self.volume.merge(other.volume)
+        self.top_senders.merge(other.top_senders)
+        self.top_receivers.merge(other.top_receivers)
+        self.top_pairs.merge(other.top_pairs)
+        self.nb_edges += other.nb_edges
+        return self
+
+    def get_distinct_counterparties(self, actor_names=None):
+        """
+        Estimate the number of distinct counterparties of actors.
+
+        Parameters:
+        actor_names (list): Names of the actors. Defaults to every actor seen.
+
+        Returns:
+        pd.DataFrame: The estimated distinct receivers paid by each actor (out),
+            senders paying it (in), and counterparties in either direction (total).
+        """
+        if actor_names is None:
+            actor_names = list(OrderedDict.fromkeys(list(self.senders.keys) + list(self.receivers.keys)))
+
+        out_registers = self.senders.get_registers(actor_names)
+        in_registers = self.receivers.get_registers(actor_names)
+        return pd.DataFrame({
+            "out": HyperLogLogArray.estimate(out_registers),
+            "in": HyperLogLogArray.estimate(in_registers),
+            "total": HyperLogLogArray.estimate(np.maximum(out_registers, in_registers)),
+        }, index=pd.Index(actor_names, name="actor"))
+
+    def get_volume(self, actor_names):
+        """
+        Estimate the volume (sent and received) of actors.
+
+        Parameters:
+        actor_names (list): Names of the actors.
+
+        Returns:
+        pd.Series: The estimated volumes.
+        """
+        return self.volume.estimate(actor_names)
+
+    def get_top_senders(self, k=10):
+        """
+        Get the actors sending the most value.
+        """
+        return self.top_senders.top(k)
+
+    def get_top_receivers(self, k=10):
+        """
+        Get the actors receiving the most value.
+        """
+        return self.top_receivers.top(k)
+
+    def get_top_pairs(self, k=10):
+        """
+        Get the (source, target) pairs carrying the most value, indexed by "source -> target".
+        """
+        return self.top_pairs.top(k)
+
+
+def sketch_file(filename, **kwargs):
+    """
+    Build the sketch of a daily network CSV file.
+
+    Parameters:
+    filename (str): The path to the CSV file.
+    **kwargs: The NetworkSketch parameters.
+
+    Returns:
+    NetworkSketch: The sketch of the day.
+    """
+    sketch = NetworkSketch(**kwargs)
+    sketch.update(pd.read_csv(filename, dtype={"Source": str, "Target": str}))
+    return sketch
+
+
+def sketch_days(data_dir, freq=None, max_workers=None, **kwargs):
+    """
+    Build the sketches of every daily network CSV file of a directory in a
+    process pool, then merge them by period.
+
+    Parameters:
+    data_dir (str): The directory of the YYYY-M-D.csv files.
+    freq (str): A pandas period frequency, e.g. "W" or "M", to merge the days by.
+        The days are kept separate when None.
+    max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+    **kwargs: The NetworkSketch parameters.
+
+    Returns:
+    dict: The sketch of each date, or period, in chronological order.
+    """
+    files = {
+        pd.to_datetime(os.path.basename(filename).split(".")[0], format="%Y-%m-%d"): filename
+        for filename in glob.glob(os.path.join(data_dir, "*.csv"))
+    }
+    dates = sorted(files)
+
+    if max_workers == 1:
+        daily = [sketch_file(files[date], **kwargs) for date in dates]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(sketch_file, files[date], **kwargs) for date in dates]
+            daily = [future.result() for future in futures]
+
+    if freq is None:
+        return OrderedDict(zip(dates, daily))
+
+    sketches = OrderedDict()
+    for date, sketch in zip(dates, daily):
+        period = date.to_period(freq)
+        if period in sketches:
+            sketches[period].merge(sketch)
+        else:
+            sketches[period] = sketch
+    return sketches
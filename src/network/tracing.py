@@ -0,0 +1,267 @@
+import scipy.sparse as sp
+import pandas as pd
+import numpy as np
+
+
+class TraceResult:
+    """
+    The TraceResult class holds the outcome of a taint propagation: the taint
+    held by every reached actor at the end of each day, the taint each actor
+    received in total and by number of hops, the day each actor was first
+    reached and, optionally, the tainted flow of every edge.
+    """
+    def __init__(self, holdings, received, received_by_hop, first_reached, flows):
+        """
+        Initialize a TraceResult object.
+
+        Parameters:
+        holdings (pd.DataFrame): A day × actor matrix of the taint held at the end of each day.
+        received (pd.Series): The total taint received by each actor.
+        received_by_hop (pd.DataFrame): An actor × hop matrix of the received taint.
+        first_reached (pd.Series): The first day each actor received taint.
+        flows (pd.DataFrame): The tainted flow of each edge, or None when not recorded.
+        """
+        self.holdings = holdings
+        self.received = received
+        self.received_by_hop = received_by_hop
+        self.first_reached = first_reached
+        self.flows = flows
+
+    def get_reached_actors(self):
+        """
+        Get the actors that received taint, ordered by the day they were first reached.
+
+        Returns:
+        list: The names of the actors.
+        """
+        return list(self.first_reached.sort_values(kind="stable").index)
+
+    def get_top_exposed(self, k=10):
+        """
+        Get the k actors that received the most taint.
+
+        Parameters:
+        k (int): The number of actors.
+
+        Returns:
+        pd.DataFrame: The received taint and first reached day of the actors.
+        """
+        top = self.received.sort_values(ascending=False).head(k)
+        return pd.DataFrame({"received": top, "first_reached": self.first_reached.reindex(top.index)})
+
+
+class TaintTracer:
+    """
+    The TaintTracer class follows value through the daily networks of an
+    EdgeTable along time-respecting paths: taint held by an actor on a day can
+    only leave through edges of that day or a later one. Each day is processed
+    with sparse matrix-vector products over the edges of the day, so that the
+    taint can also chain through several actors within the same day.
+
+    Two splitting policies are supported:
+    - proportional (taint first): an actor sends its taint before any clean
+      funds, up to its outflow of the day, split over its outgoing edges in
+      proportion to their values;
+    - haircut: an actor's funds are a mix of taint and clean value, estimated
+      from its observed balance, and every outgoing edge carries that mix.
+    """
+    PROPORTIONAL = "proportional"
+    HAIRCUT = "haircut"
+
+    def __init__(self, edges, mode=PROPORTIONAL, max_hops=None, decay=1.0, max_rounds=10, tol=1.0e-9):
+        """
+        Initialize a TaintTracer object.
+
+        Parameters:
+        edges (EdgeTable): The daily networks.
+        mode (str): Either "proportional" or "haircut".
+        max_hops (int): The number of hops after which taint stops moving. Unbounded when None.
+        decay (float): The factor applied to the taint at every hop.
+        max_rounds (int): The maximum number of hops the taint can chain through within a single day.
+        tol (float): The amount of taint below which a day stops propagating.
+        """
+        if mode not in (self.PROPORTIONAL, self.HAIRCUT):
+            raise ValueError("mode must be either 'proportional' or 'haircut'")
+        if max_hops is not None and max_hops < 1:
+            raise ValueError("max_hops must be at least 1")
+
+        self.edges = edges
+        self.mode = mode
+        self.max_hops = max_hops
+        self.decay = decay
+        self.max_rounds = max_rounds
+        self.tol = tol
+
+    def _get_seeds(self, seeds, day, backward):
+        """
+        Build the initial taint vector. Seeds given as a list of names start
+        with their whole outflow (inflow when tracing backward) of the first day.
+        """
+        n = self.edges.nb_actors
+        taint = np.zeros(n)
+
+        if isinstance(seeds, dict):
+            ids = self.edges.actors.get_ids(list(seeds))
+            taint[ids] = list(seeds.values())
+        else:
+            edges = self.edges.get_day_slice(day)
+            senders = self.edges.dst[edges] if backward else self.edges.src[edges]
+            volume = np.bincount(senders, self.edges.value[edges], minlength=n)
+            ids = self.edges.actors.get_ids(seeds)
+            taint[ids] = volume[ids]
+
+        return taint
+
+    def _proportional_day(self, taint, src, dst, value, out):
+        """
+        Propagate the taint of a day in the proportional mode, in place.
+        Returns the taint carried by each edge and the taint received by each actor at each hop.
+        """
+        n = len(out)
+        weights = np.divide(value, out[src], out=np.zeros(len(value)), where=out[src] > 0)
+        transition_t = sp.csr_matrix((weights, (dst, src)), shape=(n, n))
+        capacity = out.copy()
+        movable = taint.shape[1] - 1 if self.max_hops is not None else 1
+        edge_taint = np.zeros(len(value))
+        received = np.zeros_like(taint)
+
+        for _ in range(self.max_rounds):
+            pending = taint[:, :movable].sum(axis=1)
+            send = np.minimum(pending, capacity)
+            if send.sum() <= self.tol:
+                break
+
+            share = np.divide(send, pending, out=np.zeros(n), where=pending > 0)
+            sent = taint[:, :movable] * share[:, None]
+            taint[:, :movable] -= sent
+            capacity -= send
+
+            # taint sent at hop h arrives at hop h + 1, and can leave again
+            # in the next round within the capacity its receiver has left
+            arrivals = self.decay * (transition_t @ sent)
+            if self.max_hops is not None:
+                received[:, 1:] += arrivals
+                taint[:, 1:] += arrivals
+            else:
+                received += arrivals
+                taint += arrivals
+            edge_taint += send[src] * weights
+
+        return edge_taint, received
+
+    def _haircut_day(self, taint, balance, src, dst, value, out, inflow):
+        """
+        Propagate the taint of a day in the haircut mode, in place. The tainted
+        share of each actor is the solution of share = (taint + tainted inflow) / funds,
+        where the funds are the balance plus the inflow of the day. Returns the
+        taint carried by each edge and the taint received by each actor at each hop.
+        """
+        n = len(out)
+        values_t = sp.csr_matrix((value, (dst, src)), shape=(n, n))
+        funds = np.maximum(balance + inflow, out)
+        funds[funds == 0] = 1.0
+        received = np.zeros_like(taint)
+
+        if self.max_hops is not None:
+            # taint at hop h can only be received from a sender at hop h - 1
+            share = np.zeros_like(taint)
+            for hop in range(taint.shape[1]):
+                if hop > 0:
+                    received[:, hop] = self.decay * (values_t @ share[:, hop - 1])
+                if hop < taint.shape[1] - 1:
+                    share[:, hop] = (taint[:, hop] + received[:, hop]) / funds
+            taint += received - out[:, None] * share
+            return value * share[src].sum(axis=1), received
+
+        # fixed point iterations, every one letting the taint chain one more hop within the day
+        share = taint[:, 0] / funds
+        for _ in range(self.max_rounds):
+            next_share = (taint[:, 0] + self.decay * (values_t @ share)) / funds
+            converged = np.abs(next_share - share).sum() <= self.tol
+            share = next_share
+            if converged:
+                break
+
+        # the shares only grow along the iterations, so sending with the last
+        # one never exceeds the taint an actor holds after its arrivals
+        received[:, 0] = self.decay * (values_t @ share)
+        taint[:, 0] += received[:, 0] - out * share
+        return value * share[src], received
+
+    def trace(self, seeds, start, end=None, backward=False, record_flows=False, min_flow=0.0):
+        """
+        Propagate taint from a seed set of actors.
+
+        Parameters:
+        seeds (dict or list): The tainted amount of each seed actor, or the seed names,
+            whose whole outflow of the first day is then tainted.
+        start (int, str or datetime): The day the seeds are tainted.
+        end (int, str or datetime): The last day traced, inclusive. Defaults to the last
+            day of the table (the first one when tracing backward).
+        backward (bool): Whether to trace where the funds came from, following the edges
+            in reverse and going back in time.
+        record_flows (bool): Whether to record the tainted flow of every edge.
+        min_flow (float): The smallest tainted flow recorded.
+
+        Returns:
+        TraceResult: The propagation result.
+        """
+        n = self.edges.nb_actors
+        start = self.edges.get_day_index(start)
+        if end is None:
+            end = 0 if backward else self.edges.nb_days - 1
+        end = self.edges.get_day_index(end)
+        days = np.arange(start, end - 1, -1) if backward else np.arange(start, end + 1)
+
+        levels = self.max_hops + 1 if self.max_hops is not None else 1
+        taint = np.zeros((n, levels))
+        taint[:, 0] = self._get_seeds(seeds, start, backward)
+        balance = taint[:, 0].copy()
+        seeded = taint[:, 0] > 0
+
+        holdings = np.zeros((len(days), n))
+        received_by_hop = np.zeros((n, levels))
+        first_reached = np.full(n, -1)
+        flows = []
+
+        for position, day in enumerate(days):
+            edges = self.edges.get_day_slice(day)
+            src, dst = self.edges.src[edges], self.edges.dst[edges]
+            if backward:
+                src, dst = dst, src
+            value = self.edges.value[edges]
+
+            out = np.bincount(src, value, minlength=n)
+            inflow = np.bincount(dst, value, minlength=n)
+
+            if self.mode == self.PROPORTIONAL:
+                edge_taint, received = self._proportional_day(taint, src, dst, value, out)
+            else:
+                edge_taint, received = self._haircut_day(taint, balance, src, dst, value, out, inflow)
+                balance = np.maximum(balance + inflow - out, taint.sum(axis=1))
+
+            received_by_hop += received
+            first_reached[(first_reached < 0) & (received.sum(axis=1) > self.tol) & ~seeded] = day
+            holdings[position] = taint.sum(axis=1)
+
+            if record_flows:
+                kept = edge_taint > max(min_flow, self.tol)
+                flows.append(pd.DataFrame({
+                    "date": self.edges.dates[day],
+                    "Source": self.edges.actors.get_names(src[kept]),
+                    "Target": self.edges.actors.get_names(dst[kept]),
+                    "value": value[kept],
+                    "taint": edge_taint[kept],
+                }))
+
+        touched = np.flatnonzero((holdings > self.tol).any(axis=0) | (received_by_hop.sum(axis=1) > self.tol) | seeded)
+        names = pd.Index(self.edges.actors.get_names(touched), name="actor")
+        reached = touched[first_reached[touched] >= 0]
+
+        return TraceResult(
+            holdings=pd.DataFrame(holdings[:, touched], index=self.edges.dates[days], columns=names),
+            received=pd.Series(received_by_hop[touched].sum(axis=1), index=names, name="received"),
+            received_by_hop=pd.DataFrame(received_by_hop[touched], index=names, columns=pd.RangeIndex(levels, name="hop")),
+            first_reached=pd.Series(self.edges.dates[first_reached[reached]], index=self.edges.actors.get_names(reached), name="first_reached"),
+            flows=pd.concat(flows, ignore_index=True) if record_flows else None,
+        )
@@ -1,3 +1,4 @@
+from network.actor import Actor
 import pandas as pd
 import glob
 import os
@@ -34,4 +35,28 @@ def load_csv_file(filename: str) -> pd.DataFrame:
     Returns:
     pandas.DataFrame: A DataFrame containing the data from the CSV file.
     """
-    return pd.read_csv(filename, index_col=None, header=0)
\ No newline at end of file
+    return pd.read_csv(filename, index_col=None, header=0)
+
+def build_actors(df: pd.DataFrame, date=None) -> list:
+    """
+    Build the actors of a daily network and process its transactions.
+
+    Parameters:
+    df (pandas.DataFrame): The edges, with the Source, Target, value and nb_transactions columns,
+        and a date column unless the date is given.
+    date (datetime): The date of every transaction.
+
+    Returns:
+    list: The actors, with their transactions.
+    """
+    actors = {}
+    for name in pd.unique(pd.concat([df["Source"], df["Target"]]).astype(str)):
+        actors[name] = Actor(name, None)
+
+    dates = df["date"] if date is None else [date] * len(df)
+    for source, target, value, nb_transactions, transaction_date in zip(
+        df["Source"].astype(str), df["Target"].astype(str), df["value"], df["nb_transactions"], dates
+    ):
+        actors[source].process_transaction(actors[target], value, nb_transactions, transaction_date)
+
+    return list(actors.values())
@@ -0,0 +1,189 @@
+from sklearn.preprocessing import MinMaxScaler
+from typing import Any, Dict, List, Optional
+import numpy as np
+import shutil
+import json
+import os
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+WEIGHTS_DIR = 'weights'
+
+
+def scaler_to_dict(scaler: MinMaxScaler) -> Dict[str, Any]:
+    """
+    Returns the fitted parameters of a MinMaxScaler as plain lists.
+    """
+    return {
+        'feature_range': list(scaler.feature_range),
+        'data_min': scaler.data_min_.tolist(),
+        'data_max': scaler.data_max_.tolist(),
+        'n_samples_seen': int(scaler.n_samples_seen_),
+    }
+
+
+def scaler_from_dict(params: Dict[str, Any]) -> MinMaxScaler:
+    """
+    Rebuilds a fitted MinMaxScaler from the parameters returned by scaler_to_dict,
+    without the data it was fitted on.
+    """
+    scaler = MinMaxScaler(feature_range=tuple(params['feature_range']))
+    scaler.partial_fit(np.array([params['data_min'], params['data_max']]))
+    scaler.n_samples_seen_ = params['n_samples_seen']
+    return scaler
+
+
+class Artifact:
+    """
+    A loaded model artifact: the model, its fitted scaler, the feature list
+    and the timestep it was trained with.
+    """
+    def __init__(self, model, scaler: Optional[MinMaxScaler], features: Optional[list], timestep: Optional[int], manifest: dict) -> None:
+        self.model = model
+        self.scaler = scaler
+        self.features = features
+        self.timestep = timestep
+        self.manifest = manifest
+
+    def scale(self, data: np.ndarray) -> np.ndarray:
+        """
+        Scales raw feature values with the fitted scaler.
+        """
+        return self.scaler.transform(np.asarray(data, dtype=float).reshape(-1, len(self.features)))
+
+    def inverse_scale(self, data: np.ndarray) -> np.ndarray:
+        """
+        Maps scaled predictions of the first feature back to its original unit,
+        as ETL.inverse_scale does.
+        """
+        adjusted = np.zeros((data.shape[0], len(self.features)))
+        adjusted[:, 0] = data.ravel()
+        return self.scaler.inverse_transform(adjusted)[:, 0]
+
+
+def _model_weights(model) -> tuple:
+    from predictions.models.des import DES
+
+    if isinstance(model, DES):
+        return 'des', model.get_weights(), None
+    return 'keras', model.model.get_weights(), model.model.to_json()
+
+
+def save_artifact(path: str,
+                  model,
+                  etl=None,
+                  features: Optional[list] = None,
+                  timestep: Optional[int] = None,
+                  metadata: Optional[Dict[str, Any]] = None
+                  ) -> None:
+    """
+    Saves a model and its preprocessing as a versioned artifact directory.
+
+    The weights are written as uncompressed .npy files so that load_artifact
+    can memory-map them, letting several worker processes share one
+    read-only copy through the page cache. The manifest holds the fitted
+    scaler parameters, the feature list and the timestep.
+
+    Every save writes its weights to a new weights-<version> directory and
+    then atomically replaces the manifest, which points to it, so the files
+    live readers have memory-mapped are never rewritten in place. The
+    weights of the previous version are kept for the readers that loaded
+    its manifest just before the swap, the older ones are removed.
+
+    Args:
+        path (str): The artifact directory.
+        model: A DES model, or a Model wrapping a Keras model (e.g. LongTermShortMemory).
+        etl (ETL): The ETL the model was trained on, providing the scaler, features and timestep.
+        features (list): The features, when no ETL is given.
+        timestep (int): The timestep (or window size), when no ETL is given.
+        metadata (dict): Free-form JSON-serializable information stored in the manifest.
+    """
+    model_type, weights, architecture = _model_weights(model)
+    previous = _read_manifest(path)
+    version = previous.get('version', 0) + 1 if previous is not None else 1
+    weights_dir = '%s-%d' % (WEIGHTS_DIR, version)
+
+    # left over by a save interrupted before its manifest was written
+    shutil.rmtree(os.path.join(path, weights_dir), ignore_errors=True)
+    os.makedirs(os.path.join(path, weights_dir))
+
+    weights_manifest = []
+    for index, w in enumerate(weights):
+        file_name = os.path.join(weights_dir, '%03d.npy' % index)
+        np.save(os.path.join(path, file_name), np.ascontiguousarray(w))
+        weights_manifest.append({'file': file_name, 'shape': list(w.shape), 'dtype': np.dtype(w.dtype).str})
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'model_type': model_type,
+        'architecture': architecture,
+        'weights': weights_manifest,
+        'features': list(etl.features) if etl is not None else features,
+        'timestep': etl.timestep if etl is not None else timestep,
+        'scaler': scaler_to_dict(etl._scaler) if etl is not None else None,
+        'metadata': metadata or {},
+    }
+
+    # the manifest is written last, so a directory without one is an incomplete artifact
+    tmp_path = os.path.join(path, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST))
+
+    # unlinking leaves the mappings of the older versions valid until they are closed
+    kept = {weights_dir}
+    if previous is not None:
+        kept.update(os.path.dirname(entry['file']) for entry in previous['weights'])
+    for name in os.listdir(path):
+        if (name == WEIGHTS_DIR or name.startswith(WEIGHTS_DIR + '-')) and name not in kept:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the manifest of an artifact directory, or None when there is none.
+    """
+    if not os.path.exists(os.path.join(path, MANIFEST)):
+        return None
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def load_artifact(path: str, mmap: bool = True) -> Artifact:
+    """
+    Loads an artifact saved by save_artifact.
+
+    Args:
+        path (str): The artifact directory.
+        mmap (bool): Whether to memory-map the weights read-only instead of reading them.
+
+    Returns:
+        Artifact: The model and its preprocessing.
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    if manifest['format_version'] > FORMAT_VERSION:
+        raise ValueError('Unsupported artifact format version %d' % manifest['format_version'])
+
+    weights = [
+        np.load(os.path.join(path, entry['file']), mmap_mode='r' if mmap else None)
+        for entry in manifest['weights']
+    ]
+
+    if manifest['model_type'] == 'des':
+        from predictions.models.des import DES
+        model = DES(0, 0, 0)
+        model.set_weights(weights)
+    elif manifest['model_type'] == 'keras':
+        from predictions.models.model import Model
+        from keras.models import model_from_json
+        keras_model = model_from_json(manifest['architecture'])
+        keras_model.set_weights(weights)
+        model = Model(keras_model)
+    else:
+        raise ValueError('Unknown model type %s' % manifest['model_type'])
+
+    scaler = scaler_from_dict(manifest['scaler']) if manifest['scaler'] is not None else None
+    return Artifact(model, scaler, manifest['features'], manifest['timestep'], manifest)
@@ -0,0 +1,288 @@
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import MinMaxScaler
+import pandas as pd
+import numpy as np
+import joblib
+
+CLASSES = np.array([-1, 1])
+LOG_COLUMNS = ['y_true', 'y_pred', 'proba_up']
+
+
+def direction_labels(prices: np.ndarray, horizon: int = 1, threshold: float = 0.0) -> np.ndarray:
+    """
+    Labels every time step with the direction of the price over the next
+    `horizon` steps: 1 when it increases, -1 when it decreases.
+
+    Args:
+        prices (np.ndarray): The price series.
+        horizon (int): The number of steps ahead.
+        threshold (float): The moves whose absolute return is at most the threshold are left unlabelled.
+
+    Returns:
+        np.ndarray: The labels, NaN for the last `horizon` steps and the moves within the threshold.
+    """
+    prices = np.asarray(prices, dtype=float)
+    labels = np.full(len(prices), np.nan)
+    if len(prices) > horizon:
+        returns = prices[horizon:] / prices[:-horizon] - 1
+        labels[:-horizon] = np.where(np.abs(returns) > threshold, np.sign(returns), np.nan)
+    return labels
+
+
+def window_features(values: np.ndarray, timestep: int) -> np.ndarray:
+    """
+    Builds the ETL-style input of every time step from the `timestep` rows
+    ending at it, flattened. Unlike ETL._window, the windows overlap, so
+    every step gets a sample.
+
+    Args:
+        values (np.ndarray): The (time, features) matrix.
+        timestep (int): The number of rows per window.
+
+    Returns:
+        np.ndarray: The (time - timestep + 1, timestep * features) samples, the first one ending at row timestep - 1.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < timestep:
+        return np.empty((0, timestep * values.shape[1]))
+    windows = np.lib.stride_tricks.sliding_window_view(values, timestep, axis=0)
+    # sliding_window_view puts the window last, keep the rows in time order
+    return np.swapaxes(windows, 1, 2).reshape(len(windows), -1)
+
+
+class StreamingClassifier:
+    """
+    Classifies the next price move into -1 or 1 with an incremental learner,
+    updated as new days arrive instead of being refitted from scratch.
+
+    The rows are processed one at a time, whatever the size of the updates.
+    Each sample is scaled and predicted as soon as its last row arrives, with
+    the scaler and the model as they are at that moment, then waits for its
+    label. When the label matures, `horizon` rows later, the sample is logged
+    and learnt by mini-batches (prequential, test-then-train). Nothing a
+    prediction depends on has seen a later row, so the log of predictions is
+    an out-of-sample evaluation of the classifier as it would have run live.
+    """
+    def __init__(self,
+                 features: List[str],
+                 price_column: str = 'PriceUSD',
+                 timestep: int = 6,
+                 horizon: int = 1,
+                 threshold: float = 0.0,
+                 batch_size: int = 1,
+                 model=None,
+                 seed: Optional[int] = 42
+                 ) -> None:
+        """
+        Initializes a StreamingClassifier object.
+
+        Args:
+            features (List[str]): The feature columns of the incoming rows.
+            price_column (str): The column of the price the direction is computed on.
+            timestep (int): The number of days per input window, as in ETL.
+            horizon (int): The number of days ahead the direction is predicted.
+            threshold (float): The moves whose absolute return is at most the threshold are not learnt.
+            batch_size (int): The number of labelled samples per training mini-batch.
+            model: A classifier implementing partial_fit and predict. Defaults to a logistic SGDClassifier.
+            seed (int): The seed of the default model.
+        """
+        self.features = list(features)
+        self.price_column = price_column
+        self.timestep = timestep
+        self.horizon = horizon
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.model = model if model is not None else SGDClassifier(loss='log_loss', alpha=1e-4, random_state=seed)
+        self.scaler = MinMaxScaler(feature_range=(0, 1))
+
+        self.fitted = False
+        self.nb_rows = 0
+        self._values = deque(maxlen=timestep)
+        # the predicted samples waiting for their label, and the labelled ones waiting to be learnt
+        self._pending = deque()
+        self._batch = []
+        self._log = []
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        The columns the incoming rows must have.
+        """
+        return self.features if self.price_column in self.features else self.features + [self.price_column]
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds new days: predicts the samples they complete, then logs and learns
+        the samples whose label is now known.
+
+        Args:
+            df (pd.DataFrame): The new rows, in chronological order and indexed by date,
+                with the feature and price columns, e.g. from FeatureStore.get.
+
+        Returns:
+            pd.DataFrame: The true label, prediction and probability of an increase of
+            the samples labelled by this update, indexed by the date of their last row.
+        """
+        if df.empty:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        if df[self.columns].isna().any().any():
+            raise ValueError('The rows must not contain NaN, drop the undefined days first')
+
+        values = df[self.features].values.astype(float)
+        prices = df[self.price_column].values.astype(float)
+        logs = []
+        for row, price, date in zip(values, prices, pd.DatetimeIndex(df.index)):
+            logs.extend(self._add_row(row, price, date))
+
+        log = pd.DataFrame(
+            [entry[1:] for entry in logs], columns=LOG_COLUMNS, index=pd.DatetimeIndex([entry[0] for entry in logs], name='date'), dtype=float
+        )
+        if logs:
+            self._log.append(log)
+        return log
+
+    def _add_row(self, row: np.ndarray, price: float, date: pd.Timestamp) -> list:
+        """
+        Labels the sample maturing with the row, then predicts the sample the row completes.
+        Returns the log entries of the labelled samples.
+        """
+        logs = []
+        if self._pending and self._pending[0][0] == self.nb_rows - self.horizon:
+            _, sample_date, sample, sample_price, prediction, probability = self._pending.popleft()
+            change = price / sample_price - 1
+            label = float(np.sign(change)) if abs(change) > self.threshold else float('nan')
+            logs.append((sample_date, label, prediction, probability))
+            self._batch.append((sample, label))
+            if len(self._batch) >= self.batch_size:
+                self._train()
+
+        self.scaler.partial_fit(row[None, :])
+        self._values.append(row)
+        if len(self._values) == self.timestep:
+            sample = self._get_sample()
+            prediction, probability = self._predict(sample)
+            self._pending.append((self.nb_rows, date, sample, price, prediction, probability))
+        self.nb_rows += 1
+        return logs
+
+    def _get_sample(self) -> np.ndarray:
+        """
+        Scales the last `timestep` rows with the current scaler, as MinMaxScaler.transform does, and flattens them.
+        """
+        return window_features(np.array(self._values) * self.scaler.scale_ + self.scaler.min_, self.timestep)[0]
+
+    def _train(self) -> None:
+        """
+        Learns the labelled samples of the current mini-batch.
+        """
+        samples = np.array([sample for sample, _ in self._batch])
+        labels = np.array([label for _, label in self._batch])
+        self._batch = []
+
+        labelled = ~np.isnan(labels)
+        if labelled.any():
+            self.model.partial_fit(samples[labelled], labels[labelled].astype(int), classes=CLASSES)
+            self.fitted = True
+
+    def _predict(self, sample: np.ndarray) -> Tuple[float, float]:
+        """
+        Predicts the direction and the probability of an increase of a sample, NaN before any training.
+        """
+        if not self.fitted:
+            return float('nan'), float('nan')
+        if not hasattr(self.model, 'predict_proba'):
+            return float(self.model.predict(sample[None, :])[0]), float('nan')
+        probabilities = self.model.predict_proba(sample[None, :])[0]
+        return float(self.model.classes_[np.argmax(probabilities)]), float(probabilities[list(self.model.classes_).index(1)])
+
+    def predict_next(self) -> Dict[str, float]:
+        """
+        Predicts the direction after the last row received.
+
+        Returns:
+            Dict[str, float]: The date of the last row, the predicted direction and the probability of an increase.
+        """
+        if not self.fitted or len(self._values) < self.timestep:
+            raise ValueError('The classifier needs at least one learnt sample and {} rows'.format(self.timestep))
+
+        prediction, probability = self._predict(self._get_sample())
+        return {'date': self._pending[-1][1], 'y_pred': prediction, 'proba_up': probability}
+
+    def get_log(self) -> pd.DataFrame:
+        """
+        Returns the prequential predictions of every sample labelled so far.
+        """
+        return pd.concat(self._log) if self._log else pd.DataFrame(columns=LOG_COLUMNS)
+
+    def summary(self, window: Optional[int] = None) -> Dict[str, float]:
+        """
+        Computes the prequential metrics, over the predicted samples.
+
+        Args:
+            window (int): Only consider the last `window` predicted samples. Defaults to all of them.
+
+        Returns:
+            Dict[str, float]: The number of samples, accuracy, balanced accuracy and the share of increases.
+        """
+        log = self.get_log().dropna(subset=['y_true', 'y_pred'])
+        if window is not None:
+            log = log.tail(window)
+        if log.empty:
+            return {'nb_samples': 0, 'accuracy': float('nan'), 'balanced_accuracy': float('nan'), 'up_rate': float('nan')}
+
+        correct = log['y_true'] == log['y_pred']
+        recalls = [correct[log['y_true'] == label].mean() for label in CLASSES if (log['y_true'] == label).any()]
+        return {
+            'nb_samples': len(log),
+            'accuracy': correct.mean(),
+            'balanced_accuracy': float(np.mean(recalls)),
+            'up_rate': (log['y_true'] == 1).mean(),
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Saves the classifier, with its model, scaler and buffered rows, to resume the daily updates.
+        """
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> 'StreamingClassifier':
+        """
+        Loads a classifier saved with save.
+        """
+        return joblib.load(path)
+
+
+def prequential_evaluation(df: pd.DataFrame,
+                           features: List[str],
+                           price_column: str = 'PriceUSD',
+                           chunk_size: int = 1,
+                           rolling: int = 30,
+                           **kwargs
+                           ) -> pd.DataFrame:
+    """
+    Replays a feature table as a stream of chunks of days through a
+    StreamingClassifier, and returns its prequential predictions.
+
+    Args:
+        df (pd.DataFrame): The feature table, indexed by date, e.g. from FeatureStore.get(..., dropna=True).
+        features (List[str]): The feature columns.
+        price_column (str): The price column.
+        chunk_size (int): The number of days per update, 1 for daily updates.
+        rolling (int): The window of the rolling accuracy.
+        **kwargs: The keyword arguments of StreamingClassifier.
+
+    Returns:
+        pd.DataFrame: The true label, prediction, probability of an increase and
+        rolling accuracy of every sample.
+    """
+    classifier = StreamingClassifier(features, price_column, **kwargs)
+    for start in range(0, len(df), chunk_size):
+        classifier.update(df.iloc[start:start + chunk_size])
+
+    log = classifier.get_log()
+    predicted = log.dropna(subset=['y_true', 'y_pred'])
+    log['rolling_accuracy'] = (predicted['y_true'] == predicted['y_pred']).astype(float).rolling(rolling, min_periods=1).mean()
+    return log
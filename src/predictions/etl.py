@@ -5,7 +5,7 @@ import numpy as np
 
 class ETL:
     """
-    Extract, transform and load data from a csv file.
+    Extract, transform and load data from a csv file or a DataFrame.
     Creates a train and test set, 
     and splits the data into windows of a given timestep.
     """
@@ -55,6 +55,8 @@ class ETL:
         return self._scaler.fit_transform(df)
     
     def _load(self):
+        if isinstance(self.path, pd.DataFrame):
+            return self.path
         return pd.read_csv(self.path)
     
     def _reshape_data(self, data):
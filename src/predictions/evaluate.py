@@ -3,6 +3,7 @@ from sklearn.metrics import mean_squared_error
 from sklearn.metrics import mean_absolute_error
 from sklearn.metrics import r2_score
 
+from predictions.plotting import MAX_POINTS, plot_band, plot_series
 from matplotlib import pyplot as plt
 import numpy as np
 import tabulate
@@ -36,26 +37,30 @@ class Evaluate:
   def evaluate_model_with_mape(self):
     return mean_absolute_percentage_error(self.actual.flatten(), self.predictions.flatten())
   
-  def plot(self):
-    plt.figure(figsize=(12, 6))
+  def plot(self, max_points=MAX_POINTS, method='minmax'):
+    """
+    Plots the actual and predicted prices with the band of absolute errors,
+    every series being downsampled to at most max_points points.
+    """
+    fig, ax = plt.subplots(figsize=(12, 6))
 
-    time_range = range(len(self.actual))
+    actual = np.asarray(self.actual, dtype=float).ravel()
+    predictions = np.asarray(self.predictions, dtype=float).ravel()
 
     # Plotting the actual prices
-    plt.plot(time_range, self.actual, label='Real Price', color='blue', linestyle='-')
+    plot_series(ax, actual, max_points, method, label='Real Price', color='blue', linestyle='-')
 
     # Plotting the predicted prices
-    plt.plot(time_range, self.predictions, label='Predicted Price', color='orange', linestyle='--')
+    plot_series(ax, predictions, max_points, method, label='Predicted Price', color='orange', linestyle='--')
 
     # Highlighting the difference between actual and predicted prices
-    diff = np.abs(np.array(self.actual) - np.array(self.predictions))
-    plt.bar(time_range, diff, alpha=0.3, color='red', label='Absolute Price Difference')
+    plot_band(ax, np.abs(actual - predictions), max_points, alpha=0.3, color='red', label='Absolute Price Difference')
 
-    plt.title('Bitcoin Price Prediction')
-    plt.xlabel('Time')
-    plt.ylabel('Price (USD)')
-    plt.legend()
-    plt.grid(True)
+    ax.set_title('Bitcoin Price Prediction')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Price (USD)')
+    ax.legend()
+    ax.grid(True)
     plt.show()
   
   def print(self):
@@ -0,0 +1,307 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from predictions.etl import ETL
+import pandas as pd
+import numpy as np
+import json
+import os
+
+DATE_COLUMNS = ['week', 'weekday', 'year', 'month', 'day']
+IGNORED_COLUMNS = DATE_COLUMNS + ['xxxx', 'original order']
+TRANSFORMS = ('lag', 'diff', 'ret', 'logret', 'mean', 'std', 'min', 'max')
+ACTOR_PREFIX = 'actor/'
+
+
+def _dates(df: pd.DataFrame) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(df[['year', 'month', 'day']]), name='date')
+
+
+def shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Shifts an array forward along its first axis, padding with NaN.
+    """
+    shifted = np.full(values.shape, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling mean along the first axis, computed from cumulative sums.
+    The first window - 1 rows are NaN.
+    """
+    cumsum = np.cumsum(np.insert(values.astype(float), 0, 0, axis=0), axis=0)
+    result = np.full(values.shape, np.nan)
+    result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling standard deviation (ddof=1) along the first axis,
+    undefined for windows of a single day as in pandas.
+    """
+    if window == 1:
+        return np.full(values.shape, np.nan)
+    mean = rolling_mean(values, window)
+    squared = rolling_mean(values.astype(float) ** 2, window)
+    variance = np.maximum(squared - mean ** 2, 0) * window / (window - 1)
+    return np.sqrt(variance)
+
+
+def rolling_extremum(values: np.ndarray, window: int, func) -> np.ndarray:
+    """
+    Trailing rolling minimum or maximum along the first axis, over strided windows.
+    """
+    result = np.full(values.shape, np.nan)
+    if window <= len(values):
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        result[window - 1:] = func(windows, axis=-1)
+    return result
+
+
+def apply_transform(values: np.ndarray, transform: str, window: int) -> np.ndarray:
+    """
+    Applies a named transform along the first (time) axis of an array of any rank.
+
+    Args:
+        values (np.ndarray): The series, with the days on the first axis.
+        transform (str): One of lag, diff, ret, logret, mean, std, min and max.
+        window (int): The lag or the rolling window length.
+
+    Returns:
+        np.ndarray: The transformed series, NaN where the history is too short.
+    """
+    if window < 1:
+        raise ValueError('The window of a transform must be at least 1')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if transform == 'lag':
+            return shift(values, window)
+        if transform == 'diff':
+            return values - shift(values, window)
+        if transform == 'ret':
+            return values / shift(values, window) - 1
+        if transform == 'logret':
+            return np.log(values / shift(values, window))
+    if transform == 'mean':
+        return rolling_mean(values, window)
+    if transform == 'std':
+        return rolling_std(values, window)
+    if transform == 'min':
+        return rolling_extremum(values, window, np.min)
+    if transform == 'max':
+        return rolling_extremum(values, window, np.max)
+    raise ValueError('Unknown transform %s' % transform)
+
+
+def parse_feature(name: str) -> Tuple[Optional[str], str, Optional[str], Optional[int]]:
+    """
+    Parses a feature name into (actor, column, transform, window).
+
+    Features are named `<column>` or `<column>:<transform><window>`, where the
+    column is either a global column (e.g. PriceUSD) or an actor metric named
+    `actor/<identity>/<metric>` (e.g. actor/Bitstamp.net/received). For instance
+    `PriceUSD:logret1` is the daily log return of the price and
+    `actor/35/received:mean7` the weekly mean of what actor 35 received.
+    """
+    base, _, spec = name.partition(':')
+    actor = None
+    if base.startswith(ACTOR_PREFIX):
+        actor, _, base = base[len(ACTOR_PREFIX):].rpartition('/')
+        if not actor:
+            raise ValueError('Invalid actor feature %s, expected actor/<identity>/<metric>' % name)
+
+    if not spec:
+        return actor, base, None, None
+
+    transform = spec.rstrip('0123456789')
+    if transform not in TRANSFORMS or transform == spec:
+        raise ValueError('Invalid feature %s, expected <column>:<transform><window>' % name)
+    return actor, base, transform, int(spec[len(transform):])
+
+
+class FeatureStore:
+    """
+    Columnar store of the daily time-series data, keyed by date.
+
+    The external, global and per-actor CSV files are ingested once into
+    typed arrays: a day × column matrix of the external and global data, and
+    a dense day × actor × metric cube of by_actor.csv, where days without
+    activity of an actor are zeros. With a cache directory, the arrays are
+    written as .npy files and memory-mapped on the next runs.
+
+    Derived features (lags, returns and rolling statistics) are only computed
+    when requested, over the whole history so that their values do not depend
+    on the requested date range, and memoized.
+    """
+    def __init__(self, root: str = 'data/timeseries/2015', cache_dir: Optional[str] = None, max_cached_features: int = 256) -> None:
+        """
+        Args:
+            root (str): The directory holding external.csv, global.csv and by_actor.csv.
+            cache_dir (str): The directory of the columnar cache. No cache is written when None.
+            max_cached_features (int): The number of derived features kept in memory.
+        """
+        self.root = root
+        self.cache_dir = cache_dir
+        self.max_cached_features = max_cached_features
+        self._features = OrderedDict()
+
+        if cache_dir is not None and os.path.exists(os.path.join(cache_dir, 'meta.json')):
+            self._load_cache()
+        else:
+            self._ingest()
+            if cache_dir is not None:
+                self._save_cache()
+
+        self._column_index = {column: i for i, column in enumerate(self.columns)}
+        self._actor_index = {actor: i for i, actor in enumerate(self.actors)}
+        self._metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+
+    def _ingest(self) -> None:
+        external = pd.read_csv(os.path.join(self.root, 'external.csv'))
+        global_ = pd.read_csv(os.path.join(self.root, 'global.csv'))
+        by_actor = pd.read_csv(os.path.join(self.root, 'by_actor.csv'), dtype={'identity': str})
+
+        external.index = _dates(external)
+        global_.index = _dates(global_)
+        daily = external.drop(columns=IGNORED_COLUMNS, errors='ignore').join(
+            global_.drop(columns=IGNORED_COLUMNS, errors='ignore'), how='outer'
+        )
+
+        self.dates = daily.index
+        self.columns = list(daily.columns)
+        self.values = daily.values.astype(np.float64)
+
+        actor_dates = _dates(by_actor)
+        day_codes = self.dates.get_indexer(actor_dates)
+        if (day_codes < 0).any():
+            raise ValueError('by_actor.csv has days missing from the daily data')
+
+        self.actors = np.unique(by_actor['identity'].values.astype(str))
+        self.metrics = [column for column in by_actor.columns if column not in IGNORED_COLUMNS + ['identity']]
+        actor_codes = np.searchsorted(self.actors, by_actor['identity'].values.astype(str))
+
+        self.cube = np.zeros((len(self.dates), len(self.actors), len(self.metrics)), dtype=np.float64)
+        self.cube[day_codes, actor_codes] = by_actor[self.metrics].values
+
+    def _save_cache(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.save(os.path.join(self.cache_dir, 'values.npy'), self.values)
+        np.save(os.path.join(self.cache_dir, 'cube.npy'), self.cube)
+        np.save(os.path.join(self.cache_dir, 'actors.npy'), self.actors)
+        meta = {
+            'dates': [date.strftime('%Y-%m-%d') for date in self.dates],
+            'columns': self.columns,
+            'metrics': self.metrics,
+        }
+        with open(os.path.join(self.cache_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def _load_cache(self) -> None:
+        with open(os.path.join(self.cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.dates = pd.DatetimeIndex(pd.to_datetime(meta['dates']), name='date')
+        self.columns = meta['columns']
+        self.metrics = meta['metrics']
+        self.values = np.load(os.path.join(self.cache_dir, 'values.npy'), mmap_mode='r')
+        self.cube = np.load(os.path.join(self.cache_dir, 'cube.npy'), mmap_mode='r')
+        self.actors = np.load(os.path.join(self.cache_dir, 'actors.npy'))
+
+    def _base(self, actor: Optional[str], column: str) -> np.ndarray:
+        if actor is None:
+            if column not in self._column_index:
+                raise KeyError('Unknown column %s' % column)
+            return self.values[:, self._column_index[column]]
+
+        if actor not in self._actor_index:
+            raise KeyError('Unknown actor %s' % actor)
+        if column not in self._metric_index:
+            raise KeyError('Unknown actor metric %s' % column)
+        return self.cube[:, self._actor_index[actor], self._metric_index[column]]
+
+    def feature(self, name: str) -> np.ndarray:
+        """
+        Returns the full history of a feature, computing it on first access.
+        """
+        if name in self._features:
+            self._features.move_to_end(name)
+            return self._features[name]
+
+        actor, column, transform, window = parse_feature(name)
+        values = self._base(actor, column)
+        if transform is None:
+            return values
+
+        values = apply_transform(np.asarray(values), transform, window)
+        self._features[name] = values
+        if len(self._features) > self.max_cached_features:
+            self._features.popitem(last=False)
+        return values
+
+    def _slice(self, start, end) -> slice:
+        start = self.dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        end = self.dates.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(self.dates)
+        return slice(start, end)
+
+    def get(self, features: List[str], start=None, end=None, dropna: bool = False) -> pd.DataFrame:
+        """
+        Returns a feature matrix over a date range.
+
+        Args:
+            features (List[str]): The feature names (see parse_feature).
+            start: The first date, inclusive. Defaults to the first available day.
+            end: The last date, inclusive. Defaults to the last available day.
+            dropna (bool): Whether to drop the days where a feature is undefined,
+                e.g. at the start of a rolling window.
+
+        Returns:
+            pd.DataFrame: The features of each day, indexed by date.
+        """
+        rows = self._slice(start, end)
+        data = np.column_stack([self.feature(name)[rows] for name in features]) if features else None
+        df = pd.DataFrame(data, index=self.dates[rows], columns=features)
+        return df.dropna() if dropna else df
+
+    def actor_features(self, metric: str, transform: Optional[str] = None, window: Optional[int] = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Returns a metric (optionally transformed) of every actor, computed in one pass over the actor axis.
+
+        Args:
+            metric (str): The by_actor.csv column, e.g. received.
+            transform (str): An optional transform, see apply_transform.
+            window (int): The lag or window length of the transform.
+            start: The first date, inclusive.
+            end: The last date, inclusive.
+
+        Returns:
+            pd.DataFrame: A day × actor matrix.
+        """
+        if metric not in self._metric_index:
+            raise KeyError('Unknown actor metric %s' % metric)
+
+        values = np.asarray(self.cube[:, :, self._metric_index[metric]])
+        if transform is not None:
+            values = apply_transform(values, transform, window)
+
+        rows = self._slice(start, end)
+        return pd.DataFrame(values[rows], index=self.dates[rows], columns=self.actors)
+
+    def to_etl(self, features: List[str], start=None, end=None, test_size: float = 0.2, timestep: int = 6) -> ETL:
+        """
+        Builds an ETL over a feature matrix, the first feature being the target.
+        Days where a feature is undefined are dropped.
+        """
+        return ETL(self.get(features, start, end, dropna=True), features, test_size=test_size, timestep=timestep)
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Returns the dimensions of the store.
+        """
+        return {
+            'days': len(self.dates),
+            'columns': len(self.columns),
+            'actors': len(self.actors),
+            'actor_metrics': len(self.metrics),
+        }
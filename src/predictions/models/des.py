@@ -3,12 +3,12 @@ import pandas as pd
 from predictions.models.model import Model
 
 class DES(Model):
-    def __init__(self, input_size, layer_size, output_size):
+    def __init__(self, input_size, layer_size, output_size, dtype=np.float64):
         self.weights = [
-            np.random.randn(input_size, layer_size),
-            np.random.randn(layer_size, output_size),
-            np.random.randn(layer_size, 1),
-            np.random.randn(1, layer_size),
+            np.random.randn(input_size, layer_size).astype(dtype, copy=False),
+            np.random.randn(layer_size, output_size).astype(dtype, copy=False),
+            np.random.randn(layer_size, 1).astype(dtype, copy=False),
+            np.random.randn(1, layer_size).astype(dtype, copy=False),
         ]
                 
     def fit(self, **kwargs):
@@ -18,9 +18,16 @@ class DES(Model):
         raise NotImplementedError("This model cannot be evaluated using the evaluate method. Use the DESAgent class to evaluate it.")
        
     def predict(self, inputs):
-        feed = np.dot(inputs, self.weights[0]) + self.weights[-1]
-        decision = np.dot(feed, self.weights[1])
-        buy = np.dot(feed, self.weights[2])
+        return self.forward(self.weights, inputs)
+
+    @staticmethod
+    def forward(weights, inputs):
+        """
+        Runs the network with the given weights, without touching the model state.
+        """
+        feed = np.dot(inputs, weights[0]) + weights[-1]
+        decision = np.dot(feed, weights[1])
+        buy = np.dot(feed, weights[2])
         return decision, buy
 
     def get_weights(self):
@@ -0,0 +1,191 @@
+from typing import Optional, Tuple
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+MAX_POINTS = 2000
+
+
+def _bin_edges(length: int, n_bins: int) -> np.ndarray:
+    """
+    Boundaries of n_bins contiguous bins of nearly equal size over [0, length).
+    """
+    return np.linspace(0, length, n_bins + 1).astype(np.int64)
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Downsamples a series by keeping the minimum and the maximum of each bin,
+    which preserves every spike at the cost of a jagged line.
+
+    Args:
+        y (np.ndarray): The series.
+        n_out (int): The approximate number of points kept.
+
+    Returns:
+        np.ndarray: The sorted indices of the points kept, the first and last ones included.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    if len(y) <= n_out:
+        return np.arange(len(y))
+
+    starts = _bin_edges(len(y), max(n_out // 2, 1))[:-1]
+    lengths = np.diff(np.append(starts, len(y)))
+    owners = np.repeat(np.arange(len(starts)), lengths)
+
+    # sort by (bin, value): the first and last entries of each bin are its minimum and maximum
+    order = np.lexsort((np.nan_to_num(y, nan=np.inf), owners))
+    ends = np.cumsum(lengths)
+    minimums = order[ends - lengths]
+    maximums = order[ends - 1]
+    return np.unique(np.concatenate([[0], minimums, maximums, [len(y) - 1]]))
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Downsamples a series with the Largest-Triangle-Three-Buckets algorithm:
+    the points are split into n_out - 2 buckets, and the point kept in each
+    bucket is the one forming the largest triangle with the point kept in
+    the previous bucket and the mean of the next bucket, which keeps the
+    visual shape of the series with a smooth line. The extrema are usually
+    kept but not guaranteed to be, use minmax_indices when they must be.
+
+    Args:
+        y (np.ndarray): The series.
+        n_out (int): The number of points kept, at least 3.
+        x (np.ndarray): The x coordinates of the points. Defaults to their indices.
+
+    Returns:
+        np.ndarray: The sorted indices of the points kept, the first and last ones included.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    length = len(y)
+    if length <= n_out or n_out < 3:
+        return np.arange(length)
+
+    x = np.arange(length, dtype=float) if x is None else np.asarray(x, dtype=float).ravel()
+    edges = np.append(_bin_edges(length - 2, n_out - 2) + 1, length)
+
+    # the means of every bucket, the last one being the last point
+    sums_x = np.add.reduceat(x, edges[:-1])
+    sums_y = np.add.reduceat(y, edges[:-1])
+    counts = np.diff(edges)
+    means_x, means_y = sums_x / counts, sums_y / counts
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = means_x[bucket + 1], means_y[bucket + 1]
+        # twice the triangle areas, without the constant factor
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+        indices[bucket + 1] = previous
+    return indices
+
+
+def downsample(y: np.ndarray, n_out: int = MAX_POINTS, method: str = 'minmax') -> np.ndarray:
+    """
+    Selects the points of a series worth drawing.
+
+    Args:
+        y (np.ndarray): The series.
+        n_out (int): The number of points kept.
+        method (str): Either 'minmax', which keeps every extremum, or 'lttb'.
+
+    Returns:
+        np.ndarray: The sorted indices of the points kept.
+    """
+    if method not in METHODS:
+        raise ValueError('method must be one of {}'.format(', '.join(METHODS)))
+    if method == 'lttb':
+        return lttb_indices(y, n_out)
+    return minmax_indices(y, n_out)
+
+
+def envelope(y: np.ndarray, n_bins: int = MAX_POINTS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the minimum and maximum of a series over contiguous bins,
+    e.g. to draw a band that covers every point.
+
+    Args:
+        y (np.ndarray): The series.
+        n_bins (int): The number of bins.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The first index of each bin, its minimum and its maximum.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    if len(y) <= n_bins:
+        return np.arange(len(y)), y, y
+
+    starts = _bin_edges(len(y), n_bins)[:-1]
+    return starts, np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)
+
+
+def thin_markers(positions: np.ndarray, length: int, max_markers: int = MAX_POINTS) -> np.ndarray:
+    """
+    Keeps at most one marker per bin of the time axis, so that dense trades
+    do not draw overlapping markers. The markers keep their original time
+    step, so they stay aligned with a downsampled series drawn against the
+    original indices.
+
+    Args:
+        positions (np.ndarray): The time steps of the markers.
+        length (int): The length of the time axis.
+        max_markers (int): The number of bins.
+
+    Returns:
+        np.ndarray: The time steps of the markers kept.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) <= max_markers:
+        return positions
+    bins = positions * max_markers // max(length, 1)
+    _, first = np.unique(bins, return_index=True)
+    return positions[first]
+
+
+def plot_series(ax, y: np.ndarray, max_points: int = MAX_POINTS, method: str = 'minmax', **kwargs):
+    """
+    Draws a downsampled series against its original indices.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes.
+        y (np.ndarray): The series.
+        max_points (int): The number of points drawn.
+        method (str): Either 'minmax', which keeps every extremum, or 'lttb'.
+        **kwargs: The keyword arguments of Axes.plot.
+
+    Returns:
+        list: The lines drawn.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    indices = downsample(y, max_points, method)
+    return ax.plot(indices, y[indices], **kwargs)
+
+
+def plot_band(ax, y: np.ndarray, max_points: int = MAX_POINTS, baseline: float = 0.0, **kwargs):
+    """
+    Draws the area between a baseline and the binned maximum of a series as a
+    single filled polygon, instead of one bar per time step.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes.
+        y (np.ndarray): The series, e.g. the absolute prediction errors.
+        max_points (int): The number of bins.
+        baseline (float): The bottom of the band.
+        **kwargs: The keyword arguments of Axes.fill_between.
+
+    Returns:
+        matplotlib.collections.PolyCollection: The band.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    starts, _, maximums = envelope(y, max_points)
+    # step='post' draws each bin up to the next start, so the last one needs its end
+    if len(y):
+        starts, maximums = np.append(starts, len(y)), np.append(maximums, maximums[-1])
+    return ax.fill_between(starts, baseline, maximums, step='post', **kwargs)
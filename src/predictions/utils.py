@@ -3,15 +3,21 @@ import numpy as np
 import random
 import os
 
-def deterministic_mode():
-    SEED = 42
-
-    np.random.seed(SEED)
-    random.seed(SEED)
-    tf.random.set_seed(SEED)
+def deterministic_mode(seed: int = 42) -> np.random.SeedSequence:
+    """
+    Seeds every global random state and returns the root seed sequence,
+    to be passed to the components drawing from their own generators
+    (e.g. the seed of DESAgent) so that they stay reproducible when run
+    across several threads or processes.
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+    tf.random.set_seed(seed)
 
     tf.keras.backend.clear_session()
-    tf.keras.utils.set_random_seed(SEED)
+    tf.keras.utils.set_random_seed(seed)
     
     os.environ['PYTHONHASHSEED'] = '0'
-    os.environ['TF_DETERMINISTIC_OPS'] = '1'
\ No newline at end of file
+    os.environ['TF_DETERMINISTIC_OPS'] = '1'
+
+    return np.random.SeedSequence(seed)
\ No newline at end of file
@@ -0,0 +1,309 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from predictions.etl import ETL
+import pandas as pd
+import numpy as np
+import hashlib
+import joblib
+import time
+import os
+
+class Fold(NamedTuple):
+    """
+    A chronological train/test split, given as half-open [start, end) positions.
+    """
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+class WalkForward:
+    """
+    Generates walk-forward train/test folds over a time series.
+
+    In the expanding mode every fold trains on all the data preceding its
+    test block, in the rolling mode the training block keeps a fixed length
+    and slides forward with the test block.
+    """
+    EXPANDING = 'expanding'
+    ROLLING = 'rolling'
+
+    def __init__(self,
+                 n_splits: int = 5,
+                 test_size: Optional[int] = None,
+                 train_size: Optional[int] = None,
+                 mode: str = EXPANDING,
+                 gap: int = 0
+                 ) -> None:
+        """
+        Args:
+            n_splits (int): The number of folds.
+            test_size (int): The length of each test block. Defaults to n_samples // (n_splits + 1).
+            train_size (int): The length of the training block in rolling mode.
+                Defaults to the length available to the first fold.
+            mode (str): Either 'expanding' or 'rolling'.
+            gap (int): The number of samples dropped between train and test blocks.
+        """
+        if mode not in (self.EXPANDING, self.ROLLING):
+            raise ValueError("mode must be either 'expanding' or 'rolling'")
+        if n_splits < 1:
+            raise ValueError('n_splits must be at least 1')
+
+        self.n_splits = n_splits
+        self.test_size = test_size
+        self.train_size = train_size
+        self.mode = mode
+        self.gap = gap
+
+    def split(self, n_samples: int) -> List[Fold]:
+        """
+        Generates the folds for a series of the given length.
+
+        Args:
+            n_samples (int): The length of the series.
+
+        Returns:
+            List[Fold]: The folds, ordered chronologically.
+        """
+        test_size = self.test_size or n_samples // (self.n_splits + 1)
+        first_test_start = n_samples - self.n_splits * test_size
+        train_size = self.train_size or first_test_start - self.gap
+
+        if test_size <= 0 or train_size <= 0:
+            raise ValueError('Not enough samples for %d folds' % self.n_splits)
+
+        folds = []
+        for i in range(self.n_splits):
+            test_start = first_test_start + i * test_size
+            train_end = test_start - self.gap
+            train_start = 0 if self.mode == self.EXPANDING else max(0, train_end - train_size)
+
+            if train_end - train_start <= 0:
+                raise ValueError('Fold %d has an empty training block' % i)
+
+            folds.append(Fold(i, train_start, train_end, test_start, test_start + test_size))
+        return folds
+
+
+class FoldETL(ETL):
+    """
+    ETL over a single walk-forward fold of an in-memory DataFrame.
+
+    Unlike ETL, the scaler is fitted on the training block only so that the
+    test block stays out of sample.
+    """
+    def __init__(self, df: pd.DataFrame, fold: Fold, features: list, timestep: int = 6):
+        self.df = df
+        self.fold = fold
+        super().__init__(None, features, test_size=0, timestep=timestep)
+
+    def _load(self):
+        return self.df.iloc[self.fold.train_start : self.fold.test_end]
+
+    def _transform(self, data: np.array):
+        train, test = self._train_test_split(data)
+        self._scaler.fit(train)
+        return self._scaler.transform(train), self._scaler.transform(test)
+
+    def _train_test_split(self, data: np.array):
+        train_length = self.fold.train_end - self.fold.train_start
+        test_offset = self.fold.test_start - self.fold.train_start
+        return data[:train_length], data[test_offset:]
+
+
+class WindowCache:
+    """
+    Caches the windowed arrays and fitted scaler of each fold on disk,
+    so repeated runs over the same folds skip the ETL step.
+    """
+    def __init__(self, cache_dir: Optional[str]) -> None:
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(df: pd.DataFrame, fold: Fold, features: list, timestep: int) -> str:
+        values = np.ascontiguousarray(df[features].values)
+        digest = hashlib.sha1(values.tobytes())
+        digest.update(repr((tuple(fold), tuple(features), timestep)).encode())
+        return digest.hexdigest()
+
+    def get(self, df: pd.DataFrame, fold: Fold, features: list, timestep: int) -> ETL:
+        """
+        Returns the ETL of the given fold, from the cache when available.
+        """
+        if self.cache_dir is None:
+            return FoldETL(df, fold, features, timestep)
+
+        path = os.path.join(self.cache_dir, 'fold_%s.joblib' % self.key(df, fold, features, timestep))
+        if os.path.exists(path):
+            return joblib.load(path)
+
+        etl = FoldETL(df, fold, features, timestep)
+        etl.df = None
+        joblib.dump(etl, path)
+        return etl
+
+
+def build_lstm(input_shape: tuple):
+    """
+    Default model factory of the LSTM walk-forward runs.
+    """
+    from predictions.models.lstm import LongTermShortMemory
+    return LongTermShortMemory(input_shape=input_shape)
+
+
+def _run_lstm_fold(df: pd.DataFrame,
+                   fold: Fold,
+                   features: list,
+                   timestep: int,
+                   build_model: Callable,
+                   compile_kwargs: dict,
+                   fit_kwargs: dict,
+                   cache_dir: Optional[str]
+                   ) -> Dict[str, float]:
+    from predictions.evaluate import Evaluate
+
+    start = time.time()
+    etl = WindowCache(cache_dir).get(df, fold, features, timestep)
+
+    model = build_model(etl.train_x.shape[1:])
+    model.compile(**compile_kwargs)
+    model.fit(etl.train_x, etl.train_y, **fit_kwargs)
+
+    predictions = model.predict(etl.test_x)
+    evaluate = Evaluate(etl.inverse_scale(etl.test_y), etl.inverse_scale(predictions))
+
+    return {
+        **fold._asdict(),
+        'mse': evaluate.mse,
+        'mae': evaluate.mae,
+        'r2': evaluate.r2,
+        'mape': evaluate.mape,
+        'var_ratio': evaluate.var_ratio,
+        'seconds': time.time() - start,
+    }
+
+
+def _run_des_fold(prices: List[float],
+                  fold: Fold,
+                  window_size: int,
+                  layer_size: int,
+                  iterations: int,
+                  agent_kwargs: dict,
+                  seed: int
+                  ) -> Dict[str, float]:
+    from predictions.models.des import DES
+    from agents.des_agent import DESAgent
+
+    start = time.time()
+    np.random.seed(seed + fold.index)
+
+    model = DES(window_size, layer_size, 3)
+    agent = DESAgent(model, data_points=prices[fold.train_start : fold.train_end], window_size=window_size, **agent_kwargs)
+    agent.set_test_data(prices[fold.test_start : fold.test_end])
+    agent.fit(iterations, 0)
+
+    weights = agent.es.get_weights()
+    return {
+        **fold._asdict(),
+        'train_return': agent.get_reward(weights),
+        'test_return': agent.get_test_reward(weights),
+        'seconds': time.time() - start,
+    }
+
+
+class WalkForwardBacktest:
+    """
+    Trains and evaluates one model per walk-forward fold in a process pool
+    and aggregates the per-fold results.
+    """
+    def __init__(self, walk_forward: WalkForward, max_workers: Optional[int] = None, cache_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            walk_forward (WalkForward): The fold generator.
+            max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+            cache_dir (str): The directory where the windowed data of each fold is cached.
+        """
+        self.walk_forward = walk_forward
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+
+    def run_lstm(self,
+                 df: pd.DataFrame,
+                 features: list,
+                 timestep: int = 6,
+                 build_model: Callable = build_lstm,
+                 compile_kwargs: Optional[dict] = None,
+                 fit_kwargs: Optional[dict] = None
+                 ) -> pd.DataFrame:
+        """
+        Runs the walk-forward evaluation of an LSTM model.
+
+        Args:
+            df (pd.DataFrame): The data, ordered chronologically.
+            features (list): The feature columns, the first one being the target.
+            timestep (int): The window length.
+            build_model (Callable): A picklable factory taking the input shape and returning a Model.
+            compile_kwargs (dict): The arguments of Model.compile.
+            fit_kwargs (dict): The arguments of Model.fit.
+
+        Returns:
+            pd.DataFrame: The Evaluate metrics of each fold.
+        """
+        folds = self.walk_forward.split(len(df))
+        jobs = [
+            (_run_lstm_fold, df, fold, features, timestep, build_model, compile_kwargs or {}, fit_kwargs or {}, self.cache_dir)
+            for fold in folds
+        ]
+        return self._run(jobs)
+
+    def run_des(self,
+                prices: List[float],
+                window_size: int = 30,
+                layer_size: int = 500,
+                iterations: int = 500,
+                agent_kwargs: Optional[dict] = None,
+                seed: int = 42
+                ) -> pd.DataFrame:
+        """
+        Runs the walk-forward evaluation of a DES agent.
+
+        Args:
+            prices (List[float]): The price series, ordered chronologically.
+            window_size (int): The window size of the agent.
+            layer_size (int): The hidden layer size of the DES model.
+            iterations (int): The number of training iterations per fold.
+            agent_kwargs (dict): The remaining DESAgent arguments (money, max_buy, max_sell, skip).
+            seed (int): The base seed, offset by the fold index.
+
+        Returns:
+            pd.DataFrame: The train and test returns of each fold.
+        """
+        agent_kwargs = {'money': 100, 'max_buy': 5, 'max_sell': 5, **(agent_kwargs or {})}
+        prices = list(prices)
+        folds = self.walk_forward.split(len(prices))
+        jobs = [
+            (_run_des_fold, prices, fold, window_size, layer_size, iterations, agent_kwargs, seed)
+            for fold in folds
+        ]
+        return self._run(jobs)
+
+    def _run(self, jobs: list) -> pd.DataFrame:
+        if self.max_workers == 1:
+            results = [job[0](*job[1:]) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(*job) for job in jobs]
+                results = [future.result() for future in futures]
+        return pd.DataFrame(results).set_index('index')
+
+    @staticmethod
+    def summary(results: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregates the metrics of every fold into their mean, std, min and max.
+        """
+        columns = [column for column in results.columns if column not in Fold._fields]
+        return results[columns].agg(['mean', 'std', 'min', 'max']).T
@@ -0,0 +1,95 @@
+"""
+Load test of the streaming service, fed by a local random-walk tick generator.
+
+Without artifacts, a randomly initialized DES model is served. With --url,
+the ticks are sent to a running serving.server instead of an in-process service.
+
+Run from the src directory:
+    python -m serving.loadtest --ticks 20000 --concurrency 16 --symbols 4
+"""
+from concurrent.futures import ThreadPoolExecutor
+from predictions.artifacts import Artifact, load_artifact
+from serving.service import StreamingService
+from predictions.models.des import DES
+from typing import Iterator, Tuple
+import urllib.request
+import numpy as np
+import argparse
+import tabulate
+import json
+import time
+
+
+def tick_generator(nb_ticks: int, nb_symbols: int = 1, seed: int = 42) -> Iterator[Tuple[str, float]]:
+    """
+    Yields (symbol, price) ticks of independent geometric random walks, round-robin over the symbols.
+    """
+    rng = np.random.default_rng(seed)
+    prices = np.full(nb_symbols, 30000.0)
+    for i in range(nb_ticks):
+        symbol = i % nb_symbols
+        prices[symbol] *= np.exp(rng.normal(0, 0.001))
+        yield 'SYM%d' % symbol, float(prices[symbol])
+
+
+def http_predict(url: str, symbol: str, price: float) -> dict:
+    request = urllib.request.Request(
+        url + '/tick',
+        data=json.dumps({'symbol': symbol, 'price': price}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--window-size', type=int, default=30)
+    parser.add_argument('--lstm-artifact')
+    parser.add_argument('--des-artifact')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay', type=float, default=0.002)
+    parser.add_argument('--url', help='base URL of a running serving.server')
+    args = parser.parse_args()
+
+    ticks = tick_generator(args.ticks, args.symbols)
+    start = time.perf_counter()
+
+    if args.url:
+        latencies = []
+
+        def send(tick):
+            sent = time.perf_counter()
+            http_predict(args.url, *tick)
+            latencies.append(time.perf_counter() - sent)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(send, ticks))
+
+        with urllib.request.urlopen(args.url + '/metrics') as response:
+            metrics = json.loads(response.read())
+        client = np.array(latencies) * 1000
+        metrics.update({'client_p50_ms': np.percentile(client, 50), 'client_p99_ms': np.percentile(client, 99)})
+    else:
+        des = load_artifact(args.des_artifact) if args.des_artifact else None
+        if des is None and args.lstm_artifact is None:
+            des = Artifact(DES(args.window_size, 500, 3), None, ['Price'], args.window_size, {})
+        lstm = load_artifact(args.lstm_artifact) if args.lstm_artifact else None
+
+        with StreamingService(lstm, des, args.max_batch, args.max_delay) as service:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                futures = list(executor.map(lambda tick: service.submit(tick[1], tick[0]), ticks))
+            for future in futures:
+                future.result()
+            metrics = service.metrics()
+
+    elapsed = time.perf_counter() - start
+    metrics['throughput_ticks_per_s'] = args.ticks / elapsed
+    print(tabulate.tabulate(list(metrics.items()), headers=['Metric', 'Value'], tablefmt='github'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+from typing import Optional
+import numpy as np
+
+class RingBuffer:
+    """
+    Fixed-size buffer of the last `capacity` values with O(1) appends.
+
+    Every value is written twice, `capacity` slots apart, so that the last
+    `capacity` values are always available as one contiguous view without
+    copying or rolling the array.
+    """
+    def __init__(self, capacity: int, dtype: np.dtype = np.float64) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+
+        self.capacity = capacity
+        self._buffer = np.zeros(2 * capacity, dtype=dtype)
+        self._count = 0
+
+    def append(self, value: float) -> None:
+        """
+        Appends a value, dropping the oldest one once the buffer is full.
+        """
+        index = self._count % self.capacity
+        self._buffer[index] = value
+        self._buffer[index + self.capacity] = value
+        self._count += 1
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def is_full(self) -> bool:
+        return self._count >= self.capacity
+
+    def last(self) -> Optional[float]:
+        """
+        Returns the most recent value, None when the buffer is empty.
+        """
+        if self._count == 0:
+            return None
+        return self._buffer[(self._count - 1) % self.capacity]
+
+    def view(self) -> np.ndarray:
+        """
+        Returns the buffered values, oldest first, as a read-only view that
+        is only valid until the next append.
+        """
+        start = self._count % self.capacity if self.is_full() else 0
+        view = self._buffer[start : start + len(self)]
+        view.flags.writeable = False
+        return view
+
+
+class PriceWindow:
+    """
+    The rolling window of a price stream: the last `size` prices and the
+    last `size` price differences, both updated in O(1) per tick.
+    """
+    def __init__(self, size: int, dtype: np.dtype = np.float64) -> None:
+        self.size = size
+        self.prices = RingBuffer(size, dtype)
+        self.differences = RingBuffer(size, dtype)
+        self.first_price = None
+
+    def append(self, price: float) -> None:
+        last = self.prices.last()
+        if last is None:
+            self.first_price = price
+        else:
+            self.differences.append(price - last)
+        self.prices.append(price)
+
+    def is_ready(self) -> bool:
+        return self.differences.is_full()
+
+    def get_prices(self) -> np.ndarray:
+        """
+        Returns the last `size` prices, left-padded with the first price.
+        """
+        prices = self.prices.view()
+        if len(prices) == self.size:
+            return prices.copy()
+        return np.concatenate([np.full(self.size - len(prices), self.first_price), prices])
+
+    def get_differences(self) -> np.ndarray:
+        """
+        Returns the last `size` price differences, left-padded with zeros,
+        matching DataHandler.get_state on a series padded with its first price.
+        """
+        differences = self.differences.view()
+        if len(differences) == self.size:
+            return differences.copy()
+        return np.concatenate([np.zeros(self.size - len(differences)), differences])
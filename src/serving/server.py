@@ -0,0 +1,110 @@
+"""
+A small HTTP front end of the StreamingService.
+
+    POST /tick     {"price": 42000.5, "symbol": "BTC"}  ->  the inference of the tick
+    GET  /metrics                                       ->  the service metrics
+
+Run from the src directory:
+    python -m serving.server --des-artifact artifacts/des --port 8000
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import TimeoutError
+from predictions.artifacts import load_artifact
+from serving.service import StreamingService
+import argparse
+import json
+
+
+def make_handler(service: StreamingService, timeout: float = 5.0) -> type:
+    """
+    Returns the request handler class bound to the given service.
+    """
+    class StreamingHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            if self.path == '/metrics':
+                self._send(200, service.metrics())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self) -> None:
+            if self.path != '/tick':
+                self._send(404, {'error': 'not found'})
+                return
+
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                price = float(body['price'])
+                symbol = body.get('symbol', 'BTC')
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self._send(400, {'error': 'expected a JSON body with a numeric price'})
+                return
+            if not isinstance(symbol, str):
+                self._send(400, {'error': 'expected a string symbol'})
+                return
+
+            try:
+                future = service.submit(price, symbol)
+            except RuntimeError as e:
+                self._send(503, {'error': str(e)})
+                return
+            try:
+                result = future.result(timeout)
+            except TimeoutError:
+                self._send(504, {'error': 'the inference did not complete within %gs' % timeout})
+                return
+            except Exception as e:
+                self._send(500, {'error': '%s: %s' % (type(e).__name__, e)})
+                return
+            self._send(200, result)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return StreamingHandler
+
+
+def serve(service: StreamingService, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Starts the service and returns the HTTP server, to be run with serve_forever.
+    """
+    service.start()
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lstm-artifact', help='directory of the LSTM artifact')
+    parser.add_argument('--des-artifact', help='directory of the DES artifact')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay', type=float, default=0.002)
+    args = parser.parse_args()
+
+    service = StreamingService(
+        lstm=load_artifact(args.lstm_artifact) if args.lstm_artifact else None,
+        des=load_artifact(args.des_artifact) if args.des_artifact else None,
+        max_batch=args.max_batch,
+        max_delay=args.max_delay,
+    )
+    server = serve(service, args.host, args.port)
+    print('serving on http://%s:%d' % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == '__main__':
+    main()
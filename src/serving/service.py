@@ -0,0 +1,192 @@
+from concurrent.futures import Future
+from serving.ring_buffer import PriceWindow
+from typing import Any, Dict, List, Optional
+from collections import deque
+import numpy as np
+import threading
+import queue
+import time
+
+ACTIONS = {0: 'hold', 1: 'buy', 2: 'sell'}
+
+
+class StreamingService:
+    """
+    In-process streaming inference over price ticks.
+
+    Every tick updates the rolling windows of its symbol in O(1), then is
+    queued for a background thread which gathers concurrent requests into
+    micro-batches of at most `max_batch` ticks, waiting at most `max_delay`
+    seconds, and runs the LSTM and the DES agent once per batch.
+    """
+    def __init__(self,
+                 lstm=None,
+                 des=None,
+                 max_batch: int = 64,
+                 max_delay: float = 0.002,
+                 latency_window: int = 10000
+                 ) -> None:
+        """
+        Args:
+            lstm (Artifact): The LSTM artifact (see predictions.artifacts), trained on the price only.
+            des (Artifact): The DES artifact, whose timestep is the agent window size.
+            max_batch (int): The maximum number of ticks per batch.
+            max_delay (float): The maximum time waited for a batch to fill, in seconds.
+            latency_window (int): The number of recent latencies kept for the percentiles.
+        """
+        if lstm is None and des is None:
+            raise ValueError('At least one of lstm and des must be given')
+        if lstm is not None and len(lstm.features) != 1:
+            raise ValueError('The streaming LSTM must be trained on the price only')
+
+        self.lstm = lstm
+        self.des = des
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._windows = {}
+        self._windows_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+
+        self._latencies = deque(maxlen=latency_window)
+        self._nb_requests = 0
+        self._nb_batches = 0
+
+    def start(self) -> 'StreamingService':
+        """
+        Starts the batching thread.
+        """
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='streaming-service', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the batching thread once the pending requests are served.
+        """
+        if self._thread is not None:
+            # under the lock, so that no tick is queued after the sentinel
+            with self._windows_lock:
+                self._running = False
+                self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'StreamingService':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _get_windows(self, symbol: str) -> Dict[str, PriceWindow]:
+        if symbol not in self._windows:
+            windows = {}
+            if self.lstm is not None:
+                windows['lstm'] = PriceWindow(self.lstm.timestep)
+            if self.des is not None:
+                windows['des'] = PriceWindow(self.des.timestep)
+            self._windows[symbol] = windows
+        return self._windows[symbol]
+
+    def submit(self, price: float, symbol: str = 'BTC') -> Future:
+        """
+        Adds a tick to its symbol stream and queues its inference. Raises a
+        RuntimeError when the service is not started, since nothing would serve the tick.
+
+        Args:
+            price (float): The new price.
+            symbol (str): The stream the tick belongs to.
+
+        Returns:
+            Future: Resolves to a dict with the LSTM `forecast`, and the DES `action` and `buy` size.
+        """
+        future = Future()
+        with self._windows_lock:
+            if not self._running:
+                raise RuntimeError('The service is not running, call start first')
+            windows = self._get_windows(symbol)
+            inputs = {}
+            for name, window in windows.items():
+                window.append(price)
+                inputs[name] = window.get_prices() if name == 'lstm' else window.get_differences()
+            ready = all(window.is_ready() for window in windows.values())
+            self._queue.put((time.perf_counter(), symbol, price, ready, inputs, future))
+        return future
+
+    def predict(self, price: float, symbol: str = 'BTC', timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Adds a tick and waits for its inference.
+        """
+        return self.submit(price, symbol).result(timeout)
+
+    def _run(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=max(timeout, 0)) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+
+            self._serve(batch)
+
+    def _serve(self, batch: List[tuple]) -> None:
+        try:
+            results = [{'symbol': symbol, 'price': price, 'ready': ready} for _, symbol, price, ready, _, _ in batch]
+
+            if self.lstm is not None:
+                prices = np.array([inputs['lstm'] for *_, inputs, _ in batch])
+                scaled = self.lstm.scale(prices.reshape(-1, 1)).reshape(len(batch), self.lstm.timestep, 1)
+                forecasts = self.lstm.inverse_scale(np.asarray(self.lstm.model.predict(scaled)))
+                for result, forecast in zip(results, forecasts):
+                    result['forecast'] = float(forecast)
+
+            if self.des is not None:
+                states = np.array([inputs['des'] for *_, inputs, _ in batch], dtype=self.des.model.weights[0].dtype)
+                decision, buy = self.des.model.predict(states)
+                for result, action, size in zip(results, np.argmax(decision, axis=1), buy[:, 0]):
+                    result['action'] = ACTIONS[int(action)]
+                    result['buy'] = float(size)
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        end = time.perf_counter()
+        for (start, *_, future), result in zip(batch, results):
+            self._latencies.append(end - start)
+            future.set_result(result)
+        self._nb_requests += len(batch)
+        self._nb_batches += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Returns the request counts, the mean batch size and the latency
+        percentiles (in milliseconds) of the recent requests. The latencies
+        are None before the first request, so the metrics stay valid JSON.
+        """
+        latencies = np.array(self._latencies) * 1000
+        metrics = {
+            'requests': self._nb_requests,
+            'batches': self._nb_batches,
+            'mean_batch_size': self._nb_requests / self._nb_batches if self._nb_batches else 0.0,
+            'queued': self._queue.qsize(),
+        }
+        for percentile in (50, 90, 99):
+            metrics['latency_p%d_ms' % percentile] = float(np.percentile(latencies, percentile)) if len(latencies) else None
+        metrics['latency_max_ms'] = float(latencies.max()) if len(latencies) else None
+        return metrics
@@ -0,0 +1,26 @@
+from predictions.artifacts import load_artifact, save_artifact
+import numpy as np
+import pytest
+import os
+
+pytest.importorskip('tensorflow')
+from predictions.models.des import DES  # noqa: E402
+
+
+def test_save_does_not_touch_loaded_weights(tmp_path):
+    path = str(tmp_path / 'des')
+    first = DES(4, 8, 3)
+    save_artifact(path, first, features=['Price'], timestep=4)
+    loaded = load_artifact(path)
+
+    second = DES(4, 8, 3)
+    save_artifact(path, second, features=['Price'], timestep=4)
+    for old, expected in zip(loaded.model.get_weights(), first.get_weights()):
+        np.testing.assert_array_equal(old, expected)
+    for new, expected in zip(load_artifact(path).model.get_weights(), second.get_weights()):
+        np.testing.assert_array_equal(new, expected)
+
+    # only the current and the previous versions are kept
+    save_artifact(path, DES(4, 8, 3), features=['Price'], timestep=4)
+    assert sorted(name for name in os.listdir(path) if name.startswith('weights')) == ['weights-2', 'weights-3']
+    assert load_artifact(path).manifest['version'] == 3
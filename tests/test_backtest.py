@@ -0,0 +1,43 @@
+from agents.backtest import BUY_ACTION, SELL_ACTION, BacktestResult, simulate
+import matplotlib
+import pandas as pd
+import numpy as np
+
+matplotlib.use('Agg')
+
+
+def test_from_trades_without_trades():
+    prices = np.linspace(100, 120, 20)
+    index = pd.date_range('2015-01-01', periods=20, freq='D')
+    result = BacktestResult.from_trades(prices, [], 1000, index)
+
+    assert len(result.trades) == 0
+    assert (result.equity == 1000).all()
+    assert result.equity.index.equals(index)
+    assert result.summary['nb_buys'] == 0
+    assert result.summary['final_equity'] == 1000
+    result.print_trades()
+    result.plot(show=False)
+
+
+def test_simulate_hold_only():
+    prices = np.linspace(100, 120, 20)
+    steps = np.arange(19)
+    actions = np.zeros(19, dtype=np.int64)
+    cash, trades = simulate(prices, steps, actions, np.ones(19), 1000, 5, 5, record=True)
+
+    assert cash == 1000
+    result = BacktestResult.from_trades(prices, trades, 1000)
+    assert result.summary['total_gain'] == 0
+
+
+def test_from_trades_equity():
+    prices = np.array([10.0, 11.0, 12.0, 13.0])
+    steps = np.array([0, 2])
+    actions = np.array([BUY_ACTION, SELL_ACTION])
+    _, trades = simulate(prices, steps, actions, np.ones(2), 100, 1, 1, record=True)
+    result = BacktestResult.from_trades(prices, trades, 100)
+
+    assert result.summary['nb_buys'] == 1
+    assert result.summary['nb_sells'] == 1
+    np.testing.assert_allclose(result.equity.values, [100, 101, 102, 102])
@@ -0,0 +1,103 @@
+from networkx.algorithms.community import greedy_modularity_communities
+from network.batch import BatchCommunityDetection, CommunityStore
+import community as community_louvain
+import networkx as nx
+import pandas as pd
+import numpy as np
+import sqlite3
+import pytest
+
+
+def _result(day, labels):
+    return {
+        "day": day,
+        "algorithm": "louvain",
+        "params": {"random_state": 42},
+        "nb_actors": len(labels),
+        "nb_communities": len(set(labels)),
+        "modularity": 0.5,
+        "seconds": 0.1,
+        "members": [str(i) for i in range(len(labels))],
+        "labels": labels,
+    }
+
+
+def test_store_closes_its_connections(tmp_path, monkeypatch):
+    connections = []
+    sqlite_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        connections.append(sqlite_connect(*args, **kwargs))
+        return connections[-1]
+
+    monkeypatch.setattr("network.batch.sqlite3.connect", connect)
+    store = CommunityStore(str(tmp_path / "communities.sqlite"))
+    store.put(_result("2015-01-01", [0, 0, 1]))
+    store.put(_result("2015-01-02", [0, 1, 1, 2]))
+
+    assert store.get_days("louvain", {"random_state": 42}) == {"2015-01-01", "2015-01-02"}
+    assert store.get_communities("2015-01-02", "louvain", {"random_state": 42}) == [["0"], ["1", "2"], ["3"]]
+    assert list(store.to_frame("louvain")["nb_communities"]) == [2, 3]
+
+    for connection in connections:
+        try:
+            connection.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            continue
+        raise AssertionError("connection left open")
+
+
+def _planted_day(rng, nb_groups=4, group_size=8):
+    # dense groups joined by a few edges, so that both algorithms find the groups
+    pairs = []
+    for group in range(nb_groups):
+        members = np.arange(group_size) + group * group_size
+        for source in members:
+            for target in rng.choice(members[members != source], 4, replace=False):
+                pairs.append((source, target))
+        pairs.append((members[0], (members[0] + group_size) % (nb_groups * group_size)))
+    pairs = np.array(pairs)
+    return pd.DataFrame({
+        "Source": pairs[:, 0].astype(str),
+        "Target": pairs[:, 1].astype(str),
+        "value": rng.integers(1, 1000, len(pairs)),
+        "nb_transactions": 1,
+    })
+
+
+def _reference(df, algorithm, params):
+    graph = nx.from_pandas_edgelist(df, "Source", "Target", create_using=nx.DiGraph)
+    if algorithm == "louvain":
+        partition = community_louvain.best_partition(graph.to_undirected(), **params)
+        communities = [{node for node in partition if partition[node] == label} for label in set(partition.values())]
+    else:
+        communities = [set(community) for community in greedy_modularity_communities(graph, **params)]
+    return communities, nx.community.modularity(graph.to_undirected(), communities, weight=None)
+
+
+@pytest.mark.parametrize("algorithm, params, max_workers", [
+    ("louvain", {"random_state": 42}, 1),
+    ("louvain", {"random_state": 42}, 2),
+    ("girvan_newman", {}, 1),
+])
+def test_batch_matches_the_reference_algorithms(tmp_path, algorithm, params, max_workers):
+    rng = np.random.default_rng(0)
+    days = {}
+    for date in pd.date_range("2015-01-01", periods=3, freq="D"):
+        days[date.strftime("%Y-%m-%d")] = df = _planted_day(rng)
+        df.to_csv(tmp_path / "{}-{}-{}.csv".format(date.year, date.month, date.day), index=False)
+
+    batch = BatchCommunityDetection(str(tmp_path), str(tmp_path / "communities.sqlite"), algorithm, params, max_workers)
+    summary = batch.run(verbose=False)
+
+    assert list(summary["day"]) == list(pd.to_datetime(list(days)))
+    for day, df in days.items():
+        communities, modularity = _reference(df, algorithm, params)
+        stored = batch.store.get_communities(day, algorithm, params)
+        assert {frozenset(community) for community in stored} == {frozenset(community) for community in communities}
+        assert len(communities) == 4
+        row = summary[summary["day"] == day].iloc[0]
+        assert row["nb_communities"] == len(communities)
+        assert row["modularity"] == pytest.approx(modularity)
+
+    assert batch.get_missing_days() == []
@@ -0,0 +1,56 @@
+from agents.strategies.callbacks import EarlyStopping, History, ModelCheckpoint, load_checkpoint
+from agents.strategies.deep_evolution_strategy import Deep_Evolution_Strategy
+import numpy as np
+import pytest
+
+
+def _reward(weights):
+    return -float(np.sum(np.square(weights[0] - 1)))
+
+
+def _validation(weights):
+    # peaks early, so that EarlyStopping triggers after a few epochs
+    return -float(np.sum(np.square(weights[0] - 0.05)))
+
+
+def _strategy():
+    return Deep_Evolution_Strategy([np.zeros(3)], _reward, 10, 0.1, 0.03, seed=0)
+
+
+@pytest.mark.parametrize('checkpoint_first', [True, False])
+def test_checkpoint_keeps_the_training_weights(tmp_path, checkpoint_first):
+    es = _strategy()
+    early_stopping = EarlyStopping(patience=2, restore_best_weights=True)
+    checkpoint = ModelCheckpoint(str(tmp_path / 'checkpoint.npz'), every=100)
+    callbacks = [checkpoint, early_stopping] if checkpoint_first else [early_stopping, checkpoint]
+
+    history = History()
+    es.train(50, print_every=0, callbacks=callbacks + [history], validation_function=_validation)
+    saved = load_checkpoint(checkpoint.path)
+
+    assert early_stopping.stopped_epoch is not None and early_stopping.stopped_epoch < 50
+    np.testing.assert_array_equal(es.weights[0], early_stopping.best_weights[0])
+    assert saved['epoch'] == early_stopping.stopped_epoch
+    assert not np.array_equal(saved['weights'][0], early_stopping.best_weights[0])
+    np.testing.assert_array_equal(saved['best_weights'][0], early_stopping.best_weights[0])
+    assert saved['best_reward'] == max(history.to_frame()['val_reward'])
+
+
+def test_resume_is_bit_exact(tmp_path):
+    path = str(tmp_path / 'checkpoint.npz')
+    uninterrupted = _strategy()
+    early_stopping = EarlyStopping(patience=4)
+    uninterrupted.train(50, print_every=0, callbacks=[early_stopping], validation_function=_validation)
+    stopped = early_stopping.stopped_epoch
+    assert stopped is not None and stopped > 3
+
+    interrupted = _strategy()
+    interrupted.train(stopped - 2, print_every=0, callbacks=[EarlyStopping(patience=4), ModelCheckpoint(path, every=1)], validation_function=_validation)
+
+    resumed = _strategy()
+    resumed.set_state(load_checkpoint(path))
+    resumed_early_stopping = EarlyStopping(patience=4)
+    resumed.train(50, print_every=0, callbacks=[resumed_early_stopping], validation_function=_validation, initial_epoch=resumed.epoch)
+
+    assert resumed_early_stopping.stopped_epoch == stopped
+    np.testing.assert_array_equal(resumed.weights[0], uninterrupted.weights[0])
@@ -0,0 +1,80 @@
+from network.centrality import CentralityEngine, approximate_betweenness, hits, pagerank
+from network.edges import EdgeTable
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_edges(seed, nb_actors=30, nb_days=3, nb_edges=80):
+    rng = np.random.default_rng(seed)
+    days = []
+    for day in pd.date_range("2015-01-01", periods=nb_days, freq="D"):
+        pairs = np.unique(rng.integers(0, nb_actors, size=(nb_edges, 2)), axis=0)
+        days.append(pd.DataFrame({
+            "Source": pairs[:, 0].astype(str),
+            "Target": pairs[:, 1].astype(str),
+            "value": rng.integers(1, 1000, len(pairs)),
+            "nb_transactions": rng.integers(1, 5, len(pairs)),
+            "date": day,
+        }))
+    return EdgeTable.from_frame(pd.concat(days, ignore_index=True))
+
+
+def _day_graph(edges, day, weight="value"):
+    graph = nx.DiGraph()
+    df = edges.to_frame(day)
+    graph.add_nodes_from(pd.concat([df["Source"], df["Target"]]).unique())
+    for source, target, value in zip(df["Source"], df["Target"], df[weight]):
+        graph.add_edge(source, target, weight=float(value))
+    return graph
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pagerank_matches_networkx(seed):
+    edges = _random_edges(seed)
+    scores = CentralityEngine(edges).pagerank(warm_start=False, tol=1.0e-12, max_iter=1000)
+
+    for day in range(edges.nb_days):
+        expected = nx.pagerank(_day_graph(edges, day), alpha=0.85, weight="weight", tol=1.0e-12, max_iter=1000)
+        column = scores.iloc[:, day].dropna()
+        assert set(column.index) == set(expected)
+        np.testing.assert_allclose(column.values, [expected[actor] for actor in column.index], atol=1.0e-9)
+
+
+def test_pagerank_warm_start_converges_to_the_same_scores():
+    edges = _random_edges(3)
+    engine = CentralityEngine(edges, weight="nb_transactions")
+    cold = engine.pagerank(warm_start=False, tol=1.0e-12, max_iter=1000)
+    warm = engine.pagerank(warm_start=True, tol=1.0e-12, max_iter=1000)
+    pd.testing.assert_frame_equal(cold, warm, atol=1.0e-9)
+
+
+def test_hits_matches_networkx():
+    edges = _random_edges(4)
+    nodes = edges.get_active_actors(0)
+    hubs, authorities, _ = hits(edges.get_adjacency(0, nodes=nodes), tol=1.0e-14, max_iter=10000)
+
+    expected_hubs, expected_authorities = nx.hits(_day_graph(edges, 0), max_iter=10000, tol=1.0e-14)
+    names = edges.actors.get_names(nodes)
+    np.testing.assert_allclose(hubs, [expected_hubs[name] for name in names], atol=1.0e-8)
+    np.testing.assert_allclose(authorities, [expected_authorities[name] for name in names], atol=1.0e-8)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_exact_betweenness_matches_networkx(seed):
+    edges = _random_edges(seed)
+    nodes = edges.get_active_actors(1)
+    adjacency = edges.get_adjacency(1, nodes=nodes)
+
+    betweenness = approximate_betweenness(adjacency, nb_samples=len(nodes), batch_size=7)
+    expected = nx.betweenness_centrality(_day_graph(edges, 1), normalized=True)
+    names = edges.actors.get_names(nodes)
+    np.testing.assert_allclose(betweenness, [expected[name] for name in names], atol=1.0e-12)
+
+
+def test_pagerank_handles_dangling_nodes():
+    adjacency = np.array([[0, 1, 1], [0, 0, 1], [0, 0, 0]], dtype=float)
+    x, _ = pagerank(adjacency, tol=1.0e-12, max_iter=1000)
+    expected = nx.pagerank(nx.from_numpy_array(adjacency, create_using=nx.DiGraph), tol=1.0e-12, max_iter=1000)
+    np.testing.assert_allclose(x, [expected[node] for node in range(3)], atol=1.0e-9)
@@ -0,0 +1,48 @@
+from predictions.classification import StreamingClassifier, prequential_evaluation
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_walk(length=1500, nb_features=2, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {'PriceUSD': 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))},
+        index=pd.date_range('2015-01-01', periods=length, freq='D'),
+    )
+    for i in range(nb_features):
+        df['noise_%d' % i] = rng.normal(size=length)
+    return df
+
+
+@pytest.mark.parametrize('horizon', [10, 30])
+def test_no_skill_on_a_random_walk(horizon):
+    df = _random_walk()
+    log = prequential_evaluation(df, ['noise_0', 'noise_1'], chunk_size=100, horizon=horizon)
+    predicted = log.dropna(subset=['y_true', 'y_pred'])
+
+    assert len(predicted) > 1000
+    assert abs((predicted['y_true'] == predicted['y_pred']).mean() - 0.5) < 0.08
+
+
+def test_chunk_size_does_not_change_the_log():
+    df = _random_walk(600)
+    logs = [
+        prequential_evaluation(df, ['noise_0', 'PriceUSD'], chunk_size=chunk_size, horizon=5, batch_size=4)
+        for chunk_size in (1, 7, 600)
+    ]
+    for log in logs[1:]:
+        pd.testing.assert_frame_equal(logs[0], log)
+
+
+def test_predictions_do_not_use_later_rows():
+    df = _random_walk(300)
+    full = StreamingClassifier(['noise_0'], horizon=3)
+    full.update(df)
+    truncated = StreamingClassifier(['noise_0'], horizon=3)
+    truncated.update(df.iloc[:200])
+
+    # the samples predicted from the first 200 rows did not change with the later ones
+    predicted = truncated.get_log()['y_pred']
+    pd.testing.assert_series_equal(full.get_log()['y_pred'].iloc[:len(predicted)], predicted)
+    assert truncated.predict_next()['date'] == df.index[199]
@@ -0,0 +1,20 @@
+from agents.strategies.deep_evolution_strategy import Deep_Evolution_Strategy
+import numpy as np
+import pytest
+
+
+def _reward(weights):
+    return -float(sum(np.sum(np.square(w - 1)) for w in weights))
+
+
+def _train(workers, executor):
+    weights = [np.zeros((4, 3)), np.zeros(3)]
+    es = Deep_Evolution_Strategy(weights, _reward, 10, 0.1, 0.03, seed=7, workers=workers, executor=executor)
+    es.train(5, print_every=0)
+    return es.get_weights()
+
+
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_workers_give_identical_weights(executor):
+    for single, parallel in zip(_train(1, executor), _train(2, executor)):
+        np.testing.assert_array_equal(single, parallel)
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from agents.backtest import decision_steps
+from agents.des_agent import DataHandler
+import numpy as np
+import pickle
+import sys
+
+
+def test_decision_states_cache_is_thread_safe():
+    # switch threads as often as possible to interleave the cache updates
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1.0e-6)
+    try:
+        handler = DataHandler(list(range(10)), window_size=5, skip=2)
+        datasets = [list(np.cumsum(np.random.default_rng(i).normal(size=200))) for i in range(16)]
+
+        def check(i):
+            data = datasets[i % len(datasets)]
+            steps, states = handler._get_decision_states(data)
+            expected_steps, state_steps = decision_steps(len(data), handler.skip)
+            np.testing.assert_array_equal(steps, expected_steps)
+            np.testing.assert_array_equal(states, handler.get_states(data)[state_steps])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(check, range(2000)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert len(handler._states) <= DataHandler.MAX_CACHED_STATES
+
+
+def test_pickled_handler_rebuilds_its_cache():
+    handler = DataHandler(list(range(50)), window_size=5, skip=1)
+    steps, states = handler._get_decision_states(handler.train)
+
+    copy = pickle.loads(pickle.dumps(handler))
+    assert copy._states == {}
+    copy_steps, copy_states = copy._get_decision_states(copy.train)
+    np.testing.assert_array_equal(copy_steps, steps)
+    np.testing.assert_array_equal(copy_states, states)
@@ -0,0 +1,64 @@
+from predictions.feature_store import FeatureStore, apply_transform
+import pandas as pd
+import numpy as np
+import pytest
+
+PANDAS = {
+    'lag': lambda df, window: df.shift(window),
+    'diff': lambda df, window: df.diff(window),
+    'ret': lambda df, window: df.pct_change(window, fill_method=None),
+    'logret': lambda df, window: np.log(df / df.shift(window)),
+    'mean': lambda df, window: df.rolling(window).mean(),
+    'std': lambda df, window: df.rolling(window).std(),
+    'min': lambda df, window: df.rolling(window).min(),
+    'max': lambda df, window: df.rolling(window).max(),
+}
+
+
+@pytest.mark.parametrize('transform', sorted(PANDAS))
+@pytest.mark.parametrize('window', [1, 3, 7])
+def test_transforms_match_pandas(transform, window):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(100 + np.cumsum(rng.normal(size=(60, 3)), axis=0))
+    expected = PANDAS[transform](df, window).values
+    np.testing.assert_allclose(apply_transform(df.values, transform, window), expected, rtol=1e-9, atol=1e-9)
+
+
+def _write_timeseries(root, nb_days=40):
+    rng = np.random.default_rng(1)
+    dates = pd.date_range('2015-01-02', periods=nb_days, freq='D')
+    date_columns = pd.DataFrame({
+        'week': (dates - dates[0]).days // 7, 'weekday': dates.weekday,
+        'year': dates.year, 'month': dates.month, 'day': dates.day,
+    })
+    external = date_columns.assign(PriceUSD=300 + np.cumsum(rng.normal(size=nb_days)))
+    global_ = date_columns.assign(total_fee=rng.integers(1, 100, nb_days), xxxx=0)
+
+    rows = []
+    for i in range(nb_days):
+        for identity in rng.choice(['0', '35', '57', '101'], size=2, replace=False):
+            rows.append(dict(date_columns.iloc[i], identity=identity, received=rng.integers(1, 1000), sent=rng.integers(1, 1000)))
+    by_actor = pd.DataFrame(rows)
+
+    external.to_csv(root / 'external.csv', index=False)
+    global_.to_csv(root / 'global.csv', index=False)
+    by_actor.to_csv(root / 'by_actor.csv', index=False)
+    return dates, external, by_actor
+
+
+def test_store_matches_pandas(tmp_path):
+    dates, external, by_actor = _write_timeseries(tmp_path)
+    store = FeatureStore(str(tmp_path), cache_dir=str(tmp_path / 'cache'))
+    cached = FeatureStore(str(tmp_path), cache_dir=str(tmp_path / 'cache'))
+
+    price = pd.Series(external['PriceUSD'].values, index=dates)
+    df = store.get(['PriceUSD', 'PriceUSD:mean7', 'total_fee', 'actor/35/received:max5'], start='2015-01-10', end='2015-01-30')
+    received = by_actor.assign(date=pd.to_datetime(by_actor[['year', 'month', 'day']])).pivot(index='date', columns='identity', values='received')
+    received = received.reindex(dates).fillna(0.0)
+
+    assert df.index[0] == pd.Timestamp('2015-01-10') and df.index[-1] == pd.Timestamp('2015-01-30')
+    np.testing.assert_allclose(df['PriceUSD'], price.loc[df.index])
+    np.testing.assert_allclose(df['PriceUSD:mean7'], price.rolling(7).mean().loc[df.index])
+    np.testing.assert_allclose(df['actor/35/received:max5'], received['35'].rolling(5).max().loc[df.index])
+    np.testing.assert_allclose(store.actor_features('received').values, received[store.actors].values)
+    pd.testing.assert_frame_equal(cached.get(list(df.columns), '2015-01-10', '2015-01-30'), df)
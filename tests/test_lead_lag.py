@@ -0,0 +1,42 @@
+from analysis.lead_lag import lagged_correlation, rolling_lagged_correlation
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=200)
+    y = np.stack([np.roll(x, -3) + rng.normal(size=200), rng.normal(size=200), np.cumsum(rng.normal(size=200))], axis=1)
+    return x, y
+
+
+def test_matches_corrcoef_on_shifted_slices(series):
+    x, y = series
+    max_lag = 10
+    correlations = lagged_correlation(x, y, max_lag)
+    length = len(x)
+
+    for row, lag in enumerate(range(-max_lag, max_lag + 1)):
+        positive, negative = max(lag, 0), max(-lag, 0)
+        for column in range(y.shape[1]):
+            expected = np.corrcoef(y[negative:length - positive, column], x[positive:length - negative])[0, 1]
+            assert correlations[row, column] == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize('k', [-7, 0, 4])
+def test_leading_series_peaks_at_a_positive_lag(k):
+    x = np.random.default_rng(1).normal(size=300)
+    correlations = lagged_correlation(x, np.roll(x, -k)[:, None], 10)[:, 0]
+    assert np.arange(-10, 11)[np.argmax(correlations)] == k
+    assert correlations.max() == pytest.approx(1.0)
+
+
+def test_rolling_matches_per_window_calls(series):
+    x, y = series
+    ends, correlations = rolling_lagged_correlation(x, y, window=60, max_lag=5, step=7)
+
+    assert len(ends) == len(correlations) == len(range(60, len(x) + 1, 7))
+    for end, window_correlations in zip(ends, correlations):
+        expected = lagged_correlation(x[end - 59:end + 1], y[end - 59:end + 1], 5)
+        np.testing.assert_allclose(window_correlations, expected, atol=1e-12)
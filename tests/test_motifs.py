@@ -0,0 +1,71 @@
+from network.motifs import MotifFinder
+from network.edges import EdgeTable
+from collections import Counter
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_edges(seed, nb_actors=6, nb_days=4, nb_edges=14):
+    rng = np.random.default_rng(seed)
+    days = []
+    for day in pd.date_range("2015-01-01", periods=nb_days, freq="D"):
+        pairs = np.unique(rng.integers(0, nb_actors, size=(nb_edges, 2)), axis=0)
+        days.append(pd.DataFrame({
+            "Source": pairs[:, 0].astype(str),
+            "Target": pairs[:, 1].astype(str),
+            "value": rng.integers(1, 10, len(pairs)),
+            "nb_transactions": 1,
+            "date": day,
+        }))
+    return EdgeTable.from_frame(pd.concat(days, ignore_index=True))
+
+
+def _brute_force(edges, max_length, window, min_value):
+    """
+    Enumerate every time-respecting path from every edge and close it with its
+    earliest returning edge, the same-day rotations being reported once.
+    """
+    rows = [
+        (int(s), int(d), int(t), float(v))
+        for s, d, t, v in zip(edges.src, edges.dst, edges.day, edges.value)
+        if s != d and v >= min_value
+    ]
+    found = Counter()
+
+    def extend(start_day, path, days, volume):
+        origin, current = path[0], path[-1]
+        closing = sorted(
+            (day, value) for source, target, day, value in rows
+            if source == current and target == origin and days[-1] <= day <= start_day + window
+        )
+        if len(path) >= 2 and closing:
+            if origin != min(path):
+                # the rotation starting from the smallest actor reports the cycles closed on the start day
+                closing = [(day, value) for day, value in closing if day > start_day]
+            if closing:
+                day, value = closing[0]
+                names = tuple(edges.actors.get_names(path))
+                found[(start_day, day, len(path), names, min(volume, value))] += 1
+        if len(path) == max_length:
+            return
+        for source, target, day, value in rows:
+            if source == current and target not in path and days[-1] <= day <= start_day + window:
+                extend(start_day, path + [target], days + [day], min(volume, value))
+
+    for source, target, day, value in rows:
+        extend(day, [source, target], [day], value)
+    return found
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("window", [0, 1, 2])
+def test_find_cycles_matches_brute_force(seed, window):
+    edges = _random_edges(seed)
+    for max_length in (2, 3, 4):
+        cycles = MotifFinder(edges, chunk_size=5).find_cycles(max_length, window, min_value=2)
+        found = Counter(
+            (edges.get_day_index(row.date), edges.get_day_index(row.end_date), row.length, row.actors, float(row.volume))
+            for row in cycles.itertuples()
+        )
+        assert found == _brute_force(edges, max_length, window, 2)
@@ -0,0 +1,40 @@
+from network.utils import build_actors
+from network.network import Network
+import pandas as pd
+import numpy as np
+
+
+def _edges():
+    rng = np.random.default_rng(0)
+    days = []
+    for day in pd.date_range("2015-01-01", periods=3, freq="D"):
+        pairs = rng.choice(20, size=(40, 2))
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        days.append(pd.DataFrame({
+            "Source": pairs[:, 0].astype(str),
+            "Target": pairs[:, 1].astype(str),
+            "value": rng.integers(1, 1000, len(pairs)),
+            "nb_transactions": rng.integers(1, 5, len(pairs)),
+            "date": day,
+        }))
+    return pd.concat(days, ignore_index=True)
+
+
+def test_community_flows_sum_every_transaction():
+    edges = _edges()
+    network = Network(build_actors(edges))
+    network.construct_network()
+    network.process_communities_louvain(random_state=42)
+    value, nb_transactions = network.get_community_flows()
+
+    # brute force over the transactions, the repeated pairs of the days included
+    labels = {member: label for label, community in enumerate(network.get_communities()) for member in community}
+    expected_value = np.zeros((len(network.get_communities()),) * 2)
+    expected_count = np.zeros_like(expected_value)
+    for row in edges.itertuples():
+        expected_value[labels[row.Source], labels[row.Target]] += row.value
+        expected_count[labels[row.Source], labels[row.Target]] += row.nb_transactions
+
+    np.testing.assert_allclose(value.toarray(), expected_value)
+    np.testing.assert_allclose(nb_transactions.toarray(), expected_count)
+    assert expected_value.sum() == edges["value"].sum()
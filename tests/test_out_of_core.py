@@ -0,0 +1,36 @@
+from network.out_of_core import MemmapEdgeStore
+import pandas as pd
+import numpy as np
+import os
+
+
+def _day(pairs):
+    return pd.DataFrame({
+        "Source": [source for source, _ in pairs],
+        "Target": [target for _, target in pairs],
+        "value": np.arange(1, len(pairs) + 1, dtype=float),
+        "nb_transactions": np.ones(len(pairs), dtype=np.int64),
+    })
+
+
+def test_reopen_after_interrupted_append(tmp_path):
+    path = str(tmp_path / "store")
+    store = MemmapEdgeStore(path)
+    store.append_day("2015-01-01", _day([("a", "b"), ("b", "c")]))
+
+    # an append interrupted after writing its names and part of its edges
+    with open(os.path.join(path, "names.txt"), "a") as file:
+        file.write("x\ny\npart")
+    with open(os.path.join(path, "src.bin"), "ab") as file:
+        file.write(b"\0" * 6)
+
+    store = MemmapEdgeStore(path)
+    assert store.nb_actors == 3
+    assert len(store) == 2
+    store.append_day("2015-01-02", _day([("c", "d")]))
+
+    store = MemmapEdgeStore(path)
+    assert list(store.actors.get_names(np.arange(store.nb_actors))) == ["a", "b", "c", "d"]
+    assert list(store.actors.get_names(store.src[2:])) == ["c"]
+    assert list(store.actors.get_names(store.dst[2:])) == ["d"]
+    assert not os.path.exists(os.path.join(path, "meta.json.tmp"))
@@ -0,0 +1,75 @@
+from network.paths import PathQueryEngine
+from network.edges import EdgeTable
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_graph(seed, nb_nodes=25, nb_edges=60):
+    rng = np.random.default_rng(seed)
+    graph = nx.DiGraph()
+    graph.add_nodes_from(str(node) for node in range(nb_nodes))
+    for source, target in rng.integers(0, nb_nodes, size=(nb_edges, 2)):
+        if source != target:
+            graph.add_edge(str(source), str(target), weight=float(rng.integers(1, 20)))
+    return graph
+
+
+def _path_length(graph, path, weight=None):
+    return sum(graph[u][v][weight] if weight else 1 for u, v in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("weight", [None, "weight"])
+@pytest.mark.parametrize("seed", range(3))
+def test_shortest_paths_match_networkx(seed, weight):
+    graph = _random_graph(seed)
+    engine = PathQueryEngine.from_graph(graph, weight=weight, cache_size=5)
+    nodes = list(graph.nodes)
+    pairs = [(source, target) for source in nodes for target in nodes]
+    expected = dict(nx.all_pairs_dijkstra_path_length(graph, weight=weight or (lambda u, v, d: 1)))
+
+    for (source, target), path in zip(pairs, engine.get_shortest_paths(pairs)):
+        if target not in expected[source]:
+            assert path is None
+            continue
+        # ties may be broken differently, so compare lengths and check the path is a path
+        assert path[0] == source and path[-1] == target
+        assert all(graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+        assert _path_length(graph, path, weight) == pytest.approx(expected[source][target])
+
+    distances = engine.get_distance_matrix(nodes)
+    for source in nodes:
+        for target in nodes:
+            assert distances.loc[source, target] == pytest.approx(expected[source].get(target, np.inf))
+
+    assert engine.cache_info()["size"] == 5
+
+
+def test_from_edges_matches_networkx_on_a_day_range():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Source": rng.integers(0, 15, 60).astype(str),
+        "Target": rng.integers(0, 15, 60).astype(str),
+        "value": rng.integers(1, 100, 60),
+        "nb_transactions": 1,
+        "date": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 4, 60), unit="D"),
+    })
+    edges = EdgeTable.from_frame(df)
+    engine = PathQueryEngine.from_edges(edges, "2015-01-02", "2015-01-03")
+
+    window = df[df["date"].between("2015-01-02", "2015-01-03")]
+    graph = nx.DiGraph()
+    graph.add_nodes_from(edges.actors.names)
+    graph.add_edges_from(zip(window["Source"], window["Target"]))
+
+    for source in graph.nodes:
+        lengths = nx.single_source_shortest_path_length(graph, source)
+        for target in graph.nodes:
+            path = engine.get_shortest_path(source, target)
+            if target not in lengths:
+                assert path is None
+            else:
+                assert path[0] == source and path[-1] == target
+                assert all(graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+                assert len(path) - 1 == lengths[target]
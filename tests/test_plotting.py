@@ -0,0 +1,34 @@
+from predictions.plotting import downsample, envelope, lttb_indices, minmax_indices, plot_band
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+matplotlib.use('Agg')
+
+
+@pytest.mark.parametrize('length', [50, 10000])
+def test_plot_band_covers_the_last_bin(length):
+    y = np.zeros(length)
+    y[-1] = 5.0
+    _, ax = plt.subplots()
+    band = plot_band(ax, y, max_points=100)
+    vertices = band.get_paths()[0].vertices
+    plt.close(ax.figure)
+
+    assert vertices[:, 0].max() == length
+    assert vertices[vertices[:, 0] == length, 1].max() == 5.0
+
+
+def test_downsampling_keeps_the_extrema():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=10000))
+    for indices in (minmax_indices(y, 200), lttb_indices(y, 200)):
+        assert indices[0] == 0 and indices[-1] == len(y) - 1
+        assert np.all(np.diff(indices) > 0)
+    # the default method keeps every extremum, including isolated spikes LTTB can miss
+    y[1234], y[4321] = y.max() + 50, y.min() - 50
+    for indices in (minmax_indices(y, 200), downsample(y, 200)):
+        assert np.argmax(y) in indices and np.argmin(y) in indices
+    _, minimums, maximums = envelope(y, 100)
+    assert minimums.min() == y.min() and maximums.max() == y.max()
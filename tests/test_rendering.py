@@ -0,0 +1,41 @@
+from network.rendering import GraphRenderer, LayoutCache
+import matplotlib
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+
+matplotlib.use("Agg")
+
+
+def _graph(nb_nodes=60, seed=0):
+    rng = np.random.default_rng(seed)
+    graph = nx.DiGraph()
+    for _ in range(300):
+        source, target = rng.choice(nb_nodes, 2, replace=False)
+        graph.add_edge(str(source), str(target), value=float(rng.integers(1, 100)))
+    return graph
+
+
+def test_layout_cache_is_per_partition():
+    graph = _graph()
+    cache = LayoutCache()
+    for nb_communities in (5, 8):
+        partition = {node: int(node) % nb_communities for node in graph.nodes}
+        renderer = GraphRenderer(graph, partition, cache)
+        renderer.expand(1)
+        positions = renderer.get_positions(key="2015-01-01")
+        summary, _ = renderer.summarize(expanded=renderer.expanded)
+        assert set(summary.nodes) <= set(positions)
+
+        _, ax = plt.subplots()
+        renderer.draw(ax, key="2015-01-01")
+        plt.close(ax.figure)
+
+
+def test_layout_cache_is_reused():
+    graph = _graph()
+    cache = LayoutCache()
+    partition = {node: int(node) % 5 for node in graph.nodes}
+    first = GraphRenderer(graph, partition, cache).get_layout("2015-01-01")
+    second = GraphRenderer(graph, dict(partition), cache).get_layout("2015-01-01")
+    assert first is second
@@ -0,0 +1,81 @@
+from network.rollups import RESOLUTIONS, EdgeRollups
+from network.edges import EdgeTable
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_frame(seed, nb_actors=12, nb_days=75, nb_edges=15):
+    rng = np.random.default_rng(seed)
+    days = []
+    # skip some days so that periods have gaps, and repeat pairs within a day
+    for day in pd.date_range("2015-01-01", periods=nb_days, freq="D")[rng.random(nb_days) < 0.8]:
+        pairs = rng.integers(0, nb_actors, size=(nb_edges, 2))
+        days.append(pd.DataFrame({
+            "Source": pairs[:, 0].astype(str),
+            "Target": pairs[:, 1].astype(str),
+            "value": rng.integers(1, 1000, nb_edges).astype(float),
+            "nb_transactions": rng.integers(1, 5, nb_edges),
+            "date": day,
+        }))
+    return pd.concat(days, ignore_index=True)
+
+
+def _expected(edges, period):
+    """
+    Sum the EdgeTable adjacency matrices over the days of a period.
+    """
+    days = np.flatnonzero((edges.dates >= period.start_time) & (edges.dates <= period.end_time))
+    first, last = int(days[0]), int(days[-1])
+    active_days = sum((edges.get_adjacency(day, weight=None) > 0).astype(np.int64) for day in days)
+    return {
+        "value": edges.get_adjacency(first, last, weight="value").toarray(),
+        "nb_transactions": edges.get_adjacency(first, last, weight="nb_transactions").toarray(),
+        "active_days": active_days.toarray(),
+    }
+
+
+def _dense(rollup, edges):
+    ids = edges.actors.get_ids
+    matrices = {}
+    for column in ("value", "nb_transactions", "active_days"):
+        matrix = np.zeros((edges.nb_actors, edges.nb_actors))
+        matrix[ids(rollup["Source"]), ids(rollup["Target"])] = rollup[column]
+        matrices[column] = matrix
+    return matrices
+
+
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_rollups_match_edge_table_sums(resolution):
+    edges = EdgeTable.from_frame(_random_frame(0))
+    rollups = EdgeRollups.from_edges(edges)
+
+    periods = rollups.get_periods(resolution)
+    assert periods == sorted(set(edges.dates.to_period(RESOLUTIONS[resolution])))
+    for period in periods:
+        rollup = rollups.get(resolution, period)
+        assert not rollup.duplicated(["Source", "Target"]).any()
+        expected = _expected(edges, period)
+        for column, matrix in _dense(rollup, edges).items():
+            np.testing.assert_allclose(matrix, expected[column], err_msg=column)
+
+
+def test_incremental_days_match_bulk_rollups(tmp_path):
+    df = _random_frame(1)
+    bulk = EdgeRollups.from_edges(EdgeTable.from_frame(df))
+
+    incremental = EdgeRollups()
+    for date, day in df.groupby("date"):
+        assert incremental.add_day(date, day.drop(columns="date"))
+    assert not incremental.add_day(df["date"].iloc[0], df[df["date"] == df["date"].iloc[0]])
+
+    incremental.save(str(tmp_path / "rollups.pkl"))
+    incremental = EdgeRollups.load(str(tmp_path / "rollups.pkl"))
+
+    assert incremental.days == bulk.days
+    for resolution in RESOLUTIONS:
+        assert incremental.get_periods(resolution) == bulk.get_periods(resolution)
+        for period in bulk.get_periods(resolution):
+            expected = bulk.get(resolution, period).sort_values(["Source", "Target"], ignore_index=True)
+            result = incremental.get(resolution, period).sort_values(["Source", "Target"], ignore_index=True)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,96 @@
+from predictions.artifacts import Artifact
+from serving.service import StreamingService
+from serving.server import make_handler
+from http.server import ThreadingHTTPServer
+import urllib.request
+import urllib.error
+import numpy as np
+import threading
+import time
+import pytest
+import json
+
+
+class ConstantDES:
+    """
+    Stands for a DES model: holds whatever the state.
+    """
+    weights = [np.zeros((3, 3), dtype=np.float32)]
+
+    def predict(self, states):
+        decision = np.zeros((len(states), 3))
+        decision[:, 0] = 1
+        return decision, np.ones((len(states), 1))
+
+
+class FailingDES(ConstantDES):
+    def predict(self, states):
+        raise ValueError('broken model')
+
+
+class SlowDES(ConstantDES):
+    def predict(self, states):
+        time.sleep(0.5)
+        return super().predict(states)
+
+
+@pytest.fixture
+def service():
+    return StreamingService(des=Artifact(ConstantDES(), None, ['Price'], 3, {}))
+
+
+def _post(url, body):
+    request = urllib.request.Request(url + '/tick', data=json.dumps(body).encode(), method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_submit_requires_start(service):
+    with pytest.raises(RuntimeError):
+        service.submit(100.0)
+    with service:
+        assert service.predict(100.0, timeout=5)['ready'] is False
+    with pytest.raises(RuntimeError):
+        service.predict(100.0)
+
+
+def test_server_validates_ticks(service):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+    try:
+        with urllib.request.urlopen(url + '/metrics', timeout=5) as response:
+            metrics = json.loads(response.read(), parse_constant=lambda constant: pytest.fail('invalid JSON ' + constant))
+        assert metrics['latency_p50_ms'] is None
+        assert _post(url, {'price': 100.0})[0] == 503
+        service.start()
+        assert _post(url, {'price': 100.0, 'symbol': ['BTC']})[0] == 400
+        assert _post(url, {'price': 'abc'})[0] == 400
+        assert _post(url, [100.0])[0] == 400
+        for price in (100.0, 101.0, 102.0):
+            status, result = _post(url, {'price': price, 'symbol': 'ETH'})
+        assert status == 200
+        assert result['symbol'] == 'ETH' and result['action'] == 'hold'
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+@pytest.mark.parametrize('model, status', [(FailingDES(), 500), (SlowDES(), 504)])
+def test_server_reports_inference_failures(model, status):
+    service = StreamingService(des=Artifact(model, None, ['Price'], 3, {})).start()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service, timeout=0.1))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        code, body = _post('http://127.0.0.1:%d' % server.server_address[1], {'price': 100.0})
+        assert code == status and 'error' in body
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
@@ -0,0 +1,118 @@
+from network.sketches import CountMinSketch, HyperLogLogArray, NetworkSketch, SpaceSaving, sketch_days
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def _random_day(rng, nb_edges=20000, nb_actors=3000):
+    # a few hubs pay many counterparties, most actors only a handful
+    source = np.minimum(rng.zipf(1.3, nb_edges), nb_actors)
+    return pd.DataFrame({
+        "Source": source.astype(str),
+        "Target": rng.integers(0, nb_actors, nb_edges).astype(str),
+        "value": rng.lognormal(10, 2, nb_edges).round(),
+        "nb_transactions": 1,
+    })
+
+
+def test_distinct_counts_match_exact_counts():
+    rng = np.random.default_rng(0)
+    df = _random_day(rng)
+    sketch = NetworkSketch(precision=12)
+    sketch.update(df)
+
+    exact_out = df.groupby("Source")["Target"].nunique()
+    exact_in = df.groupby("Target")["Source"].nunique()
+    actors = exact_out.index.union(exact_in.index)
+    exact_total = pd.concat([
+        df[["Source", "Target"]].set_axis(["actor", "counterparty"], axis=1),
+        df[["Target", "Source"]].set_axis(["actor", "counterparty"], axis=1),
+    ]).groupby("actor")["counterparty"].nunique()
+
+    estimates = sketch.get_distinct_counterparties(list(actors))
+    expected = pd.DataFrame({
+        "out": exact_out.reindex(actors, fill_value=0),
+        "in": exact_in.reindex(actors, fill_value=0),
+        "total": exact_total.reindex(actors),
+    })
+
+    # the relative standard error is 1.04 / 64, and the small counts are only
+    # off when two counterparties collide in the same register
+    assert expected["out"].max() > 1000
+    error = (estimates - expected).abs()
+    assert (error <= 0.08 * expected + 1.5).all().all()
+    assert ((error / expected.clip(lower=1)).mean() < 0.01).all()
+
+
+def test_merged_daily_sketches_equal_the_sketch_of_every_day():
+    rng = np.random.default_rng(1)
+    days = [_random_day(rng, nb_edges=3000, nb_actors=500) for _ in range(3)]
+
+    whole = NetworkSketch(k=20)
+    whole.update(pd.concat(days, ignore_index=True))
+    merged = NetworkSketch(k=20)
+    for df in days:
+        daily = NetworkSketch(k=20)
+        daily.update(df)
+        merged.merge(daily)
+
+    pd.testing.assert_frame_equal(merged.get_distinct_counterparties(), whole.get_distinct_counterparties())
+    np.testing.assert_array_equal(merged.volume.table, whole.volume.table)
+    assert merged.nb_edges == whole.nb_edges
+
+
+def test_count_min_never_underestimates():
+    rng = np.random.default_rng(2)
+    keys = rng.zipf(1.5, 50000).astype(str)
+    weights = rng.random(len(keys)) * 100
+    sketch = CountMinSketch(width=512, depth=4)
+    sketch.add(keys, weights)
+
+    exact = pd.Series(weights).groupby(keys).sum()
+    estimates = sketch.estimate(list(exact.index))
+    assert (estimates.values >= exact.values - 1.0e-6).all()
+    assert ((estimates.values - exact.values) <= np.e / 512 * weights.sum()).mean() > 0.98
+
+
+@pytest.mark.parametrize("nb_batches", [1, 10])
+def test_space_saving_finds_the_heavy_hitters(nb_batches):
+    rng = np.random.default_rng(3)
+    keys = rng.zipf(1.2, 50000).astype(str)
+    weights = rng.random(len(keys))
+    exact = pd.Series(weights).groupby(keys).sum().sort_values(ascending=False)
+
+    summary = SpaceSaving(k=50)
+    for batch in np.array_split(np.arange(len(keys)), nb_batches):
+        other = SpaceSaving(k=50)
+        other.add(keys[batch], weights[batch])
+        summary.merge(other)
+
+    top = summary.top(10)
+    assert list(top.index) == list(exact.index[:10])
+    true_counts = exact[top.index]
+    assert (top["guaranteed"] <= true_counts + 1.0e-9).all()
+    assert (top["count"] >= true_counts - 1.0e-9).all()
+
+
+def test_hyperloglog_counts_small_sets_with_linear_counting():
+    counters = HyperLogLogArray(precision=10)
+    counters.add(np.array(["a"] * 5 + ["b"] * 50), np.arange(55).astype(str))
+    np.testing.assert_allclose(counters.count(["a", "b", "c"]).values, [5, 50, 0], rtol=0.05)
+
+
+def test_sketch_days_merges_by_period(tmp_path):
+    rng = np.random.default_rng(4)
+    days = {}
+    for date in pd.date_range("2015-01-01", periods=4, freq="D"):
+        days[date] = _random_day(rng, nb_edges=500, nb_actors=100)
+        days[date].to_csv(tmp_path / "{}-{}-{}.csv".format(date.year, date.month, date.day), index=False)
+
+    sketches = sketch_days(str(tmp_path), freq="M", max_workers=1)
+    whole = NetworkSketch()
+    whole.update(pd.concat(days.values(), ignore_index=True))
+
+    assert list(sketches) == [pd.Period("2015-01", "M")]
+    pd.testing.assert_frame_equal(
+        sketches[pd.Period("2015-01", "M")].get_distinct_counterparties().sort_index(),
+        whole.get_distinct_counterparties().sort_index(),
+    )
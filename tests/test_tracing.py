@@ -0,0 +1,44 @@
+from network.tracing import TaintTracer
+from network.edges import EdgeTable
+import pandas as pd
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def chain():
+    # a same-day chain A -> B -> C -> D, listed out of path order
+    return EdgeTable.from_frame(pd.DataFrame({
+        "Source": ["C", "A", "B"],
+        "Target": ["D", "B", "C"],
+        "value": [100, 100, 100],
+        "nb_transactions": [1, 1, 1],
+        "date": ["2015-01-01"] * 3,
+    }))
+
+
+@pytest.mark.parametrize("mode", [TaintTracer.PROPORTIONAL, TaintTracer.HAIRCUT])
+def test_chains_within_a_day(chain, mode):
+    result = TaintTracer(chain, mode=mode).trace({"A": 100.0}, 0, record_flows=True)
+
+    np.testing.assert_allclose(result.received.reindex(["B", "C", "D"]).values, [100, 100, 100])
+    np.testing.assert_allclose(result.holdings.iloc[-1].reindex(["A", "B", "C", "D"]).values, [0, 0, 0, 100], atol=1e-9)
+    assert len(result.flows) == 3
+    np.testing.assert_allclose(result.flows["taint"].values, 100)
+
+
+@pytest.mark.parametrize("mode", [TaintTracer.PROPORTIONAL, TaintTracer.HAIRCUT])
+def test_chains_within_a_day_by_hop(chain, mode):
+    result = TaintTracer(chain, mode=mode, max_hops=3).trace({"A": 100.0}, 0)
+
+    assert result.received_by_hop.loc["B", 1] == pytest.approx(100)
+    assert result.received_by_hop.loc["C", 2] == pytest.approx(100)
+    assert result.received_by_hop.loc["D", 3] == pytest.approx(100)
+
+
+@pytest.mark.parametrize("mode", [TaintTracer.PROPORTIONAL, TaintTracer.HAIRCUT])
+def test_max_hops_stops_the_chain(chain, mode):
+    result = TaintTracer(chain, mode=mode, max_hops=2).trace({"A": 100.0}, 0)
+
+    assert "D" not in result.received.index or result.received["D"] == pytest.approx(0)
+    assert result.holdings.iloc[-1]["C"] == pytest.approx(100)